@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import queue
+import logging
+import datetime
+import threading
+
+FIRESTORE_MAX_BATCH = 500
+
+
+class AuditSink:
+    """Buffered, asynchronous writer for audit_logs events.
+
+    emit() only enqueues. A background thread commits queued events in
+    Firestore batches when batch_size events are waiting or every
+    flush_interval seconds. Events that cannot be committed are appended
+    to a local JSONL spill file and replayed once Firestore accepts writes
+    again. close() drains everything that is still queued. With a governor,
+    commits count as non-essential Firestore writes.
+    """
+
+    def __init__(self, db, spill_path, collection='audit_logs', batch_size=50,
+                 flush_interval=5.0, replay_interval=60.0, governor=None):
+        self.db = db
+        self.governor = governor
+        self.spill_path = spill_path
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.replay_interval = replay_interval
+        self._queue = queue.Queue()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._last_replay = 0
+        self._thread = threading.Thread(target=self._run, name='AuditSink', daemon=True)
+        self._thread.start()
+
+    def emit(self, message, level="info", **extra):
+        event = {
+            'message': message,
+            'level': level,
+            'timestamp': datetime.datetime.now(datetime.timezone.utc),
+            'userName': 'BRIDGE_ENGINE'
+        }
+        event.update(extra)
+        self._queue.put(event)
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+
+    def flush(self):
+        """Commit everything queued right now (blocking)."""
+        with self._flush_lock:
+            events = self._drain()
+            if events:
+                failed = self._commit(events)
+                if failed:
+                    self._spill(failed)
+                    return
+            if os.path.exists(self.spill_path) and time.time() - self._last_replay >= self.replay_interval:
+                self._replay_spill()
+
+    def close(self, timeout=10.0):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try: self.flush()
+            except Exception as e: logging.warning(f"Audit flush error: {e}")
+        try: self.flush()
+        except Exception as e: logging.warning(f"Audit final flush error: {e}")
+
+    def _drain(self):
+        events = []
+        while True:
+            try: events.append(self._queue.get_nowait())
+            except queue.Empty: return events
+
+    def _commit(self, events):
+        """Write events in batches; returns the events that were not committed."""
+        for start in range(0, len(events), FIRESTORE_MAX_BATCH):
+            chunk = events[start:start + FIRESTORE_MAX_BATCH]
+            try:
+                batch = self.db.batch()
+                coll = self.db.collection(self.collection)
+                for event in chunk:
+                    batch.set(coll.document(), event)
+                if self.governor:
+                    # Audit traffic is non-essential: shed (and spilled) first under quota pressure
+                    self.governor.call('firestore', 'write', batch.commit, cost=len(chunk), essential=False)
+                else:
+                    batch.commit()
+            except Exception as e:
+                logging.warning(f"Failed to write audit logs to Firestore ({len(events) - start} queued): {e}")
+                return events[start:]
+        return []
+
+    def _spill(self, events):
+        try:
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                for event in events:
+                    row = dict(event, timestamp=event['timestamp'].isoformat())
+                    f.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+        except Exception as e:
+            logging.error(f"Audit spill failed, {len(events)} events dropped: {e}")
+
+    def _replay_spill(self):
+        self._last_replay = time.time()
+        try:
+            with open(self.spill_path, 'r', encoding='utf-8') as f:
+                events = [json.loads(line) for line in f if line.strip()]
+        except Exception as e:
+            logging.warning(f"Audit spill unreadable: {e}")
+            return
+        for event in events:
+            try: event['timestamp'] = datetime.datetime.fromisoformat(event['timestamp'])
+            except Exception: event['timestamp'] = datetime.datetime.now(datetime.timezone.utc)
+        failed = self._commit(events)
+        try: os.remove(self.spill_path)
+        except OSError: pass
+        if failed:
+            self._spill(failed)
+        else:
+            logging.info(f"Replayed {len(events)} spilled audit events")
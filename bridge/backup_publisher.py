@@ -0,0 +1,150 @@
+import os
+import gzip
+import json
+import time
+import shutil
+import hashlib
+import logging
+import datetime
+
+from streaming import dumps_record
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class BackupPublisher:
+    """Decides what to upload for a table's backup file after each cycle.
+
+    The full file (a plain JSON array at a stable Drive file, so the web
+    UI's backup link keeps working) is only uploaded when its content hash
+    differs from the last published one. With full_interval > 0, changes in
+    between full snapshots go out as a small cumulative delta file
+    (<name>_delta.json: every record changed since the last full snapshot)
+    until the interval elapses or the delta outgrows max_delta records.
+    extra_formats ('gzip', 'ndjson') are uploaded next to full snapshots.
+    State (hashes, links, shared file ids) is kept in state_path.
+    """
+
+    def __init__(self, state_path, full_interval=0, max_delta=2000, extra_formats=()):
+        self.state_path = state_path
+        self.full_interval = full_interval
+        self.max_delta = max_delta
+        self.extra_formats = tuple(extra_formats)
+        self.state = self._load()
+
+    @property
+    def shared_ids(self):
+        return self.state.setdefault('shared', [])
+
+    def mark_shared(self, file_id):
+        if file_id not in self.shared_ids:
+            self.shared_ids.append(file_id)
+
+    def published(self, key):
+        """Last published links for key: link/id (full snapshot), delta_link/delta_id."""
+        return dict(self.state.get('tables', {}).get(key, {}))
+
+    def publish(self, key, path, name, upload, changes=None):
+        """Publish path as name via upload(path, name) -> (link, id) if it changed.
+
+        changes maps doc id -> record for everything rewritten this cycle, or
+        None when that is unknown (forces a full snapshot). Returns
+        (link, id, what) where what is 'skipped', 'delta' or 'full'.
+        """
+        entry = self.state.setdefault('tables', {}).setdefault(key, {})
+        digest = self._file_hash(path)
+        if digest == entry.get('hash') and entry.get('link'):
+            logging.info(f"Backup unchanged, upload skipped: {name}")
+            return entry['link'], entry['id'], 'skipped'
+
+        delta_path = self._delta_path(path)
+        full_due = (not self.full_interval or not entry.get('link') or changes is None
+                    or time.time() - entry.get('full_at', 0) >= self.full_interval)
+        if not full_due:
+            delta = self._merge_delta(delta_path, entry, changes)
+            if len(delta['records']) <= self.max_delta:
+                delta_name = self._delta_path(name)
+                link, fid = upload(delta_path, delta_name)
+                if not link: raise Exception(f"upload of {delta_name} returned no link")
+                entry.update(hash=digest, delta_link=link, delta_id=fid, delta_count=len(delta['records']))
+                self._save()
+                logging.info(f"Backup delta published: {delta_name} ({len(delta['records'])} records since last full snapshot)")
+                return entry['link'], entry['id'], 'delta'
+
+        link, fid = upload(path, name)
+        if not link: raise Exception(f"upload of {name} returned no link")
+        for fmt in self.extra_formats:
+            try:
+                extra_path, extra_name = self._extra_file(fmt, path, name)
+                if extra_path: upload(extra_path, extra_name)
+            except Exception as e:
+                logging.warning(f"Backup {fmt} copy failed: {e}")
+        entry.clear()
+        entry.update(hash=digest, link=link, id=fid, full_at=time.time())
+        try: os.remove(delta_path)
+        except OSError: pass
+        self._save()
+        return link, fid, 'full'
+
+    def _merge_delta(self, delta_path, entry, changes):
+        delta = {'records': {}}
+        try:
+            with open(delta_path, 'r', encoding='utf-8') as f:
+                delta = json.load(f)
+            delta['records'] = {r.get('id'): r for r in delta.get('records', [])}
+        except (OSError, ValueError): pass
+        delta['records'].update(changes)
+        base = datetime.datetime.fromtimestamp(entry.get('full_at', 0), datetime.timezone.utc)
+        tmp = delta_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write('{"base":' + dumps_record({'fileId': entry.get('id'), 'publishedAt': base.isoformat()}))
+            f.write(',"generatedAt":' + json.dumps(datetime.datetime.now(datetime.timezone.utc).isoformat()))
+            f.write(',"records":[')
+            f.write(','.join(dumps_record(r) for r in delta['records'].values()))
+            f.write(']}')
+        os.replace(tmp, delta_path)
+        return delta
+
+    def _extra_file(self, fmt, path, name):
+        if fmt == 'gzip':
+            gz_path = path + '.gz'
+            with open(path, 'rb') as src, gzip.GzipFile(gz_path, 'wb', mtime=0) as dst:
+                shutil.copyfileobj(src, dst, HASH_CHUNK_SIZE)
+            return gz_path, name + '.gz'
+        if fmt == 'ndjson':
+            # Written alongside the JSON array by the sync loop
+            nd_path = os.path.splitext(path)[0] + '.ndjson'
+            if os.path.exists(nd_path):
+                return nd_path, os.path.splitext(name)[0] + '.ndjson'
+        return None, None
+
+    @staticmethod
+    def _delta_path(path):
+        root, ext = os.path.splitext(path)
+        return f"{root}_delta{ext}"
+
+    @staticmethod
+    def _file_hash(path):
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(HASH_CHUNK_SIZE)
+                if not chunk: break
+                h.update(chunk)
+        return h.hexdigest()
+
+    def _load(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp = self.state_path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f)
+            os.replace(tmp, self.state_path)
+        except Exception as e:
+            logging.warning(f"Backup publisher state save failed: {e}")
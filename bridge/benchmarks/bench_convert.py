@@ -0,0 +1,74 @@
+"""Micro-benchmark for row conversion.
+
+Compares the legacy per-cell loop (isinstance checks, dict built by
+enumerating columns, year re-parsed from the ISO string) with RowConverter
+on synthetic agenda rows, and checks that both produce the same records
+and years. Usage:
+
+    python benchmarks/bench_convert.py [--rows 100000] [--chunk 500]
+"""
+import os
+import sys
+import time
+import argparse
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from row_convert import RowConverter
+from bench_streaming import SyntheticCursor, COLUMNS
+
+
+def _legacy(rows, scope_year):
+    out = []
+    for row in rows:
+        data = {}
+        for i, col in enumerate(COLUMNS):
+            val = row[i]
+            if isinstance(val, (datetime.date, datetime.datetime)): val = val.isoformat()
+            if isinstance(val, (bytes, bytearray)): val = "[BINARY]"
+            data[col] = val
+        real_year = scope_year
+        date_val = data.get('TANGGAL SURAT DITERIMA')
+        if date_val and isinstance(date_val, str) and len(date_val) >= 4:
+            try:
+                real_year = int(date_val[:4])
+            except: pass
+        out.append((data, real_year))
+    return out
+
+
+def _compiled(rows, scope_year, chunk):
+    converter = RowConverter(COLUMNS, [int, datetime.datetime, str, datetime.date, str, str, str, str, bytearray])
+    return [(data, converter.year(row, scope_year)) for row, data in converter.iter_records(rows, chunk)]
+
+
+def _untyped(rows, scope_year, chunk):
+    # Every type code unknown (as a str-only description would report): all columns checked per chunk
+    converter = RowConverter(COLUMNS, [str] * len(COLUMNS))
+    return [(data, converter.year(row, scope_year)) for row, data in converter.iter_records(rows, chunk)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--chunk', type=int, default=500)
+    args = parser.parse_args()
+
+    rows = SyntheticCursor(args.rows).fetchall()
+    results, timings = {}, {}
+    for name, fn in (('legacy', lambda: _legacy(rows, 2024)),
+                     ('compiled', lambda: _compiled(rows, 2024, args.chunk)),
+                     ('untyped', lambda: _untyped(rows, 2024, args.chunk))):
+        t0 = time.perf_counter()
+        results[name] = fn()
+        timings[name] = time.perf_counter() - t0
+
+    for name in ('compiled', 'untyped'):
+        assert results[name] == results['legacy'], f"{name} records diverge from the legacy loop"
+    print(f"{args.rows} rows, chunk {args.chunk}")
+    for name, secs in timings.items():
+        print(f"  {name:>8}: {secs:7.3f}s  {args.rows / secs:>10,.0f} rows/s  x{timings['legacy'] / secs:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Micro-benchmark for record fingerprinting.
+
+Compares the legacy path (record dict + json.dumps + MD5) with the
+RecordHasher compat and fast modes on synthetic agenda rows, and checks
+that compat digests are identical to the legacy ones. Usage:
+
+    python benchmarks/bench_fingerprint.py [--rows 100000]
+"""
+import os
+import sys
+import time
+import argparse
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fingerprint import RecordHasher, legacy_record_hash, HAS_XXHASH
+from bench_streaming import SyntheticCursor, COLUMNS
+
+
+def _legacy(rows, extras):
+    out = []
+    for row, ex in zip(rows, extras):
+        data = {}
+        for i, col in enumerate(COLUMNS):
+            val = row[i]
+            if isinstance(val, (datetime.date, datetime.datetime)): val = val.isoformat()
+            if isinstance(val, (bytes, bytearray)): val = "[BINARY]"
+            data[col] = val
+        data['id'], data['year'], data['target_year_config'] = ex
+        out.append(legacy_record_hash(data))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    cursor = SyntheticCursor(args.rows)
+    rows = cursor.fetchall()
+    extras = [(f"2025_{r[0]}", 2025, 2025) for r in rows]
+    type_codes = [int, datetime.datetime, str, datetime.date, str, str, str, str, bytearray]
+
+    results = {}
+    t0 = time.perf_counter()
+    results['legacy'] = _legacy(rows, extras)
+    timings = {'legacy': time.perf_counter() - t0}
+    for mode in ('compat', 'fast'):
+        hasher = RecordHasher(COLUMNS, type_codes, mode=mode)
+        t0 = time.perf_counter()
+        results[mode] = [hasher.digest(r, ex) for r, ex in zip(rows, extras)]
+        timings[mode] = time.perf_counter() - t0
+
+    assert results['compat'] == results['legacy'], "compat digests diverge from legacy hashes"
+    print(f"{args.rows} rows, xxhash={'yes' if HAS_XXHASH else 'no'}")
+    for mode, secs in timings.items():
+        print(f"  {mode:>7}: {secs:7.3f}s  {args.rows / secs:>10,.0f} rows/s  x{timings['legacy'] / secs:.2f}")
+
+
+if __name__ == '__main__':
+    main()
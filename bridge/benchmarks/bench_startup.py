@@ -0,0 +1,102 @@
+"""Startup benchmark: how long until the tray could show its icon, and until the bridge is usable.
+
+Every run is a fresh interpreter (imports are cached per process). Times:
+import of bridge_logic, BridgeLogic() construction (what delays the icon),
+services ready (Drive/Firestore clients built) and first state access.
+Also lists which heavy SDKs were already imported when the constructor
+returned; with lazy imports that list should stay empty. Usage:
+
+    python benchmarks/bench_startup.py                 # fast start vs blocking, 5 runs each
+    python benchmarks/bench_startup.py --runs 10 --json
+    python benchmarks/bench_startup.py --importtime    # slowest modules of `import bridge_logic`
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+BRIDGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('googleapiclient', 'google_auth_oauthlib', 'google.oauth2', 'firebase_admin',
+                 'google.cloud.firestore', 'google.api_core', 'pyodbc')
+
+PROBE = """
+import sys, time, json
+t0 = time.perf_counter()
+import bridge_logic
+t1 = time.perf_counter()
+bridge = bridge_logic.BridgeLogic(background_init={fast})
+t2 = time.perf_counter()
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+bridge.wait_ready()
+t3 = time.perf_counter()
+bridge.processed_state
+t4 = time.perf_counter()
+with open(sys.argv[1], 'w') as f:
+    json.dump({{'importS': t1 - t0, 'constructS': t2 - t1, 'readyS': t3 - t1, 'stateS': t4 - t3, 'heavyAtIcon': heavy}}, f)
+"""
+
+
+def probe(fast, work_dir):
+    env = dict(os.environ, BRIDGE_DATA_DIR=work_dir, METRICS_PORT='0', BRIDGE_FAST_START='1')
+    result_path = os.path.join(work_dir, 'probe.json')
+    out = subprocess.run([sys.executable, '-c', PROBE.format(fast=fast, heavy=HEAVY_MODULES), result_path],
+                         cwd=BRIDGE_DIR, env=env, capture_output=True, text=True, timeout=300)
+    try:
+        with open(result_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        raise RuntimeError(f"probe failed:\n{out.stderr[-2000:]}")
+
+
+def import_profile(top):
+    """Slowest modules (cumulative µs) from python -X importtime."""
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import bridge_logic'],
+                         cwd=BRIDGE_DIR, capture_output=True, text=True, timeout=300)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:'): continue
+        own, cumulative, name = (p.strip() for p in line[len('import time:'):].split('|'))
+        if own.isdigit(): rows.append((int(cumulative), int(own), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    parser.add_argument('--importtime', action='store_true', help='show the slowest imports instead')
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    if args.importtime:
+        for cumulative, own, name in import_profile(args.top):
+            print(f"{cumulative / 1000:>9.1f} ms {own / 1000:>9.1f} ms  {name}")
+        return
+
+    results = []
+    for mode, fast in (('fast start', True), ('blocking', False)):
+        work_dir = tempfile.mkdtemp(prefix='mtp_bench_startup_')
+        try:
+            runs = [probe(fast, work_dir) for _ in range(args.runs)]
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        med = {k: round(statistics.median(r[k] for r in runs) * 1000, 1) for k in ('importS', 'constructS', 'readyS', 'stateS')}
+        results.append({'mode': mode, 'runs': args.runs, 'importMs': med['importS'],
+                        'iconMs': round(med['importS'] + med['constructS'], 1), 'readyMs': round(med['importS'] + med['readyS'], 1),
+                        'stateMs': med['stateS'], 'heavyAtIcon': runs[-1]['heavyAtIcon']})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<12} {'import ms':>10} {'icon ms':>9} {'ready ms':>9} {'state ms':>9}  heavy SDKs loaded at icon")
+    for r in results:
+        print(f"{r['mode']:<12} {r['importMs']:>10} {r['iconMs']:>9} {r['readyMs']:>9} {r['stateMs']:>9}  "
+              f"{', '.join(r['heavyAtIcon']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
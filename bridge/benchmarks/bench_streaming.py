@@ -0,0 +1,112 @@
+"""Peak-memory benchmark: buffered (fetchall + all_records) vs streaming sync.
+
+Each (mode, rows) pair runs in its own child process so peak RSS is not
+shared between runs. Usage:
+
+    python benchmarks/bench_streaming.py                 # 10k, 100k, 1M rows
+    python benchmarks/bench_streaming.py --rows 10000 50000
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import datetime
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from streaming import iter_rows, JsonArrayWriter, BufferedJsonWriter
+
+COLUMNS = ['NO URUT', 'TANGGAL SURAT DITERIMA', 'NOMOR SURAT', 'TANGGAL SURAT',
+           'ASAL SURAT', 'PERIHAL', 'DISPOSISI', 'KETERANGAN', 'LAMPIRAN SURAT']
+
+
+class SyntheticCursor:
+    """Minimal pyodbc-like cursor that generates agenda rows on demand."""
+
+    def __init__(self, total):
+        self.total = total
+        self.pos = 0
+        self.description = [(c, str, None, None, None, None, True) for c in COLUMNS]
+
+    def _make_row(self, i):
+        day = datetime.datetime(2025, 1, 1) + datetime.timedelta(minutes=i)
+        return (i + 1, day, f"B/{i + 1}/UN.1/2025", day.date(),
+                f"Fakultas Contoh {i % 37}", f"Permohonan data dan informasi nomor {i}",
+                "Wakil Rektor I", "Segera ditindaklanjuti", b"\x00" * 16)
+
+    def fetchmany(self, size):
+        end = min(self.pos + size, self.total)
+        chunk = [self._make_row(i) for i in range(self.pos, end)]
+        self.pos = end
+        return chunk
+
+    def fetchall(self):
+        return self.fetchmany(self.total - self.pos)
+
+
+def _convert(row):
+    data = {}
+    for i, col in enumerate(COLUMNS):
+        val = row[i]
+        if isinstance(val, (datetime.date, datetime.datetime)): val = val.isoformat()
+        if isinstance(val, (bytes, bytearray)): val = "[BINARY]"
+        data[col] = val
+    data['id'] = f"2025_{data['NO URUT']}"
+    return data
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+
+def run_child(mode, rows):
+    base = _peak_rss_mb()
+    cursor = SyntheticCursor(rows)
+    out = os.path.join(tempfile.gettempdir(), f"mtp_bench_{mode}_{os.getpid()}.json")
+    t0 = time.perf_counter()
+    if mode == 'streaming':
+        source, sink = iter_rows(cursor, 500), JsonArrayWriter(out)
+    else:
+        source, sink = cursor.fetchall(), BufferedJsonWriter(out)
+    with sink:
+        for row in source:
+            sink.write(_convert(row))
+    elapsed = time.perf_counter() - t0
+    size_mb = os.path.getsize(out) / (1024 * 1024)
+    os.remove(out)
+    print(json.dumps({'mode': mode, 'rows': rows, 'seconds': round(elapsed, 2),
+                      'peak_mb': round(_peak_rss_mb() - base, 1), 'json_mb': round(size_mb, 1)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'ROWS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], int(args.child[1]))
+        return
+
+    print(f"{'rows':>10} {'mode':>10} {'seconds':>9} {'peak MB':>9} {'json MB':>9}")
+    for rows in args.rows:
+        for mode in ('buffered', 'streaming'):
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, str(rows)],
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"{rows:>10} {mode:>10}  FAILED: {proc.stderr.strip().splitlines()[-1:]}")
+                continue
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"{r['rows']:>10} {r['mode']:>10} {r['seconds']:>9} {r['peak_mb']:>9} {r['json_mb']:>9}")
+
+
+if __name__ == '__main__':
+    main()
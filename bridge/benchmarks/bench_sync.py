@@ -0,0 +1,195 @@
+"""End-to-end sync benchmark against offline stand-ins (see tests/fakes.py).
+
+Runs BridgeLogic.perform_sync on Linux with a SQLite-backed Access source,
+an in-memory Firestore and a fake Drive, through three scenarios on the same
+state: first sync, no change (gated, then forced) and 1% of rows changed.
+Reports records/s, API calls per record, peak RSS and per-phase time.
+Usage:
+
+    python benchmarks/bench_sync.py                          # 10k rows, 1 table
+    python benchmarks/bench_sync.py --rows 50000 --years 2024 2025
+    python benchmarks/bench_sync.py --drive-latency 0.05 --error-rate 0.02 --json
+    python benchmarks/bench_sync.py --read-latency 0.2 --firestore-latency 0.05 --pipeline 0   # stages inline
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+
+BRIDGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BRIDGE_DIR)
+sys.path.insert(0, os.path.join(BRIDGE_DIR, 'tests'))
+import fakes
+
+
+class PeakRss:
+    """Samples RSS on a background thread; peak_mb is the high-water mark since start()."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def start(self):
+        self.peak = self._rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+        return round(self.peak / (1024 * 1024), 1)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self._rss())
+
+    @staticmethod
+    def _rss():
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, AttributeError):
+            pass
+        try:
+            import psutil
+            return psutil.Process().memory_info().rss
+        except ImportError:
+            import resource
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def make_bridge(args, work_dir, source_path):
+    os.environ.update({
+        'BRIDGE_DATA_DIR': work_dir,
+        'METRICS_PORT': '0',
+        'FIRESTORE_DAILY_READS': str(10 ** 9),
+        'FIRESTORE_DAILY_WRITES': str(10 ** 9),
+        'FIRESTORE_RATE_PER_SEC': str(args.firestore_rate),
+        'DRIVE_RATE_PER_SEC': str(args.drive_rate),
+        'DRIVE_UPLOAD_WORKERS': str(args.upload_workers),
+        'SYNC_TABLES': 'all' if len(args.years) > 1 else '',
+        'SYNC_SOURCE': 'odbc',  # the stand-in source speaks ODBC/DAO
+        'SYNC_PIPELINE': str(args.pipeline),
+    })
+    import bridge_logic
+    from audit_sink import AuditSink
+    from db_snapshot import SourceSnapshot
+
+    if not args.verbose: logging.getLogger().setLevel(logging.WARNING)
+    fakes.install(bridge_logic, odbc=fakes.FakeOdbc(read_latency=args.read_latency))
+    bridge = bridge_logic.BridgeLogic()
+
+    db = fakes.FakeFirestore(latency=args.firestore_latency, commit_latency=args.firestore_latency)
+    drive = fakes.FakeDrive(latency=args.drive_latency, upload_latency_per_mb=args.upload_latency_per_mb,
+                            error_rate=args.error_rate)
+    fakes.attach(bridge, db, drive)
+    bridge.db_path = source_path
+    bridge.target_year = args.years[0]
+    bridge.governor.base_delay = bridge.drive_batch.retry_delay = 0.01
+    bridge.db_snapshot = SourceSnapshot(os.path.join(work_dir, 'source_fingerprint.json'), work_dir)
+    bridge.audit_sink = AuditSink(db, os.path.join(work_dir, 'audit_spill.jsonl'), governor=bridge.governor)
+    return bridge, db, drive
+
+
+def run_scenario(name, bridge, db, drive, total_rows, force=False):
+    fs0, dr0, err0 = db.api_calls(), drive.api_calls(), drive.errors
+    rss = PeakRss().start()
+    t0 = time.perf_counter()
+    bridge.perform_sync(force=force)
+    bridge.audit_sink.flush()
+    elapsed = time.perf_counter() - t0
+    peak_mb = rss.stop()
+    cycle = bridge.metrics.last_cycle() or {}
+    fs_calls, drive_calls = db.api_calls() - fs0, drive.api_calls() - dr0
+    return {
+        'scenario': name,
+        'result': cycle.get('result'),
+        'seconds': round(elapsed, 3),
+        'records': total_rows,
+        'recordsPerS': round(total_rows / elapsed, 1) if elapsed else 0.0,
+        'written': cycle.get('counters', {}).get('records_written', 0),
+        'firestoreCalls': fs_calls,
+        'driveCalls': drive_calls,
+        'driveErrors': drive.errors - err0,
+        'apiCallsPerRecord': round((fs_calls + drive_calls) / total_rows, 4),
+        'peakRssMb': peak_mb,
+        'phasesS': cycle.get('phasesS', {}),
+        'pipeline': {t: s['pipeline'] for t, s in (bridge.last_sync_stats.get('tables') or {}).items()
+                     if 'pipeline' in s} if cycle.get('result') != 'skipped' else {},
+    }
+
+
+def print_report(results):
+    print(f"{'scenario':<20} {'result':>8} {'seconds':>8} {'rec/s':>10} {'written':>8} "
+          f"{'fs calls':>9} {'drive':>7} {'calls/rec':>10} {'peak MB':>8}")
+    for r in results:
+        print(f"{r['scenario']:<20} {str(r['result']):>8} {r['seconds']:>8} {r['recordsPerS']:>10} {r['written']:>8} "
+              f"{r['firestoreCalls']:>9} {r['driveCalls']:>7} {r['apiCallsPerRecord']:>10} {r['peakRssMb']:>8}")
+    print()
+    for r in results:
+        if not r['phasesS']: continue
+        print(f"{r['scenario']}: " + ", ".join(f"{p} {s:.3f}s" for p, s in r['phasesS'].items()))
+    for r in results:
+        for table, report in r['pipeline'].items():
+            stages = ", ".join(f"{name} {s['workS']:.3f}s" for name, s in report['stages'].items())
+            print(f"{r['scenario']} [{table}] stages ({report['wallS']:.3f}s wall, busiest {report['busiest']}): {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000, help='rows per agenda table')
+    parser.add_argument('--years', type=int, nargs='+', default=[2025], help='one agenda table per year')
+    parser.add_argument('--attachment-ratio', type=float, default=0.05)
+    parser.add_argument('--attachment-kb', type=int, default=32)
+    parser.add_argument('--change-fraction', type=float, default=0.01)
+    parser.add_argument('--firestore-latency', type=float, default=0.0, help='seconds per Firestore request')
+    parser.add_argument('--drive-latency', type=float, default=0.0, help='seconds per Drive request')
+    parser.add_argument('--upload-latency-per-mb', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of Drive requests failing with 429')
+    parser.add_argument('--firestore-rate', type=float, default=0, help='governor rate (0 = unlimited)')
+    parser.add_argument('--drive-rate', type=float, default=0, help='governor rate (0 = unlimited)')
+    parser.add_argument('--read-latency', type=float, default=0.0, help='seconds per 1000 source rows fetched')
+    parser.add_argument('--upload-workers', type=int, default=4)
+    parser.add_argument('--pipeline', type=int, choices=(0, 1), default=1, help='SYNC_PIPELINE (0 = stages inline)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    parser.add_argument('--keep', action='store_true', help='keep the work directory')
+    parser.add_argument('--verbose', action='store_true', help='show bridge logging')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='mtp_bench_sync_')
+    try:
+        source = os.path.join(work_dir, 'source.accdb')
+        tables = fakes.build_source_db(source, rows=args.rows, years=args.years,
+                                       attachment_ratio=args.attachment_ratio,
+                                       attachment_size=args.attachment_kb * 1024)
+        total = args.rows * len(tables)
+        bridge, db, drive = make_bridge(args, work_dir, source)
+
+        results = [run_scenario('first-sync', bridge, db, drive, total),
+                   run_scenario('no-change', bridge, db, drive, total),
+                   run_scenario('no-change (forced)', bridge, db, drive, total, force=True)]
+        time.sleep(0.01)  # make sure the edit lands on a new mtime
+        changed = fakes.mutate_source_db(source, args.change_fraction)
+        results.append(run_scenario(f'{args.change_fraction:.0%}-changed', bridge, db, drive, total))
+        results[-1]['changedRows'] = changed
+        bridge.shutdown()
+
+        if args.json: print(json.dumps(results, indent=2))
+        else: print_report(results)
+    finally:
+        if args.keep: print(f"work dir: {work_dir}")
+        else: shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
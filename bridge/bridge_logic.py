@@ -1,19 +1,41 @@
 import os
-import sys
 import datetime
 import traceback
 import json
-import shutil
 import tempfile
-import pyodbc 
 import io
+import hashlib
+import mimetypes
 import time
 import threading
 import logging
-import hashlib
-from dotenv import load_dotenv
+from collections import deque, defaultdict
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from streaming import iter_rows, JsonArrayWriter, BufferedJsonWriter, NdjsonWriter, TeeWriter
+from upload_pool import DriveUploadPool
+from governor import RequestGovernor, RequestShed
+from drive_index import DriveFolderIndex
+from drive_batch import DriveBatch
+from db_snapshot import SourceSnapshot
+from state_store import StateStore, StatePartition
+from fingerprint import RecordHasher, legacy_record_hash
+from row_convert import RowConverter
+from pipeline import Pipeline, Stage
+from audit_sink import AuditSink
+from triggers import FirestoreTriggerSource
+from backup_publisher import BackupPublisher
+from metrics import SyncMetrics
+from accdb_reader import AccessReader, decode_file_data
+from lazy_import import LazyImport, available
+from log_setup import configure_logging
+from env_files import PROJECT_ROOT, load_env
 
 # --- LIBRARIES CHECK ---
+# The Google/Firebase SDKs and pyodbc are only located here and imported on first use (fast tray startup)
+pyodbc = LazyImport('pyodbc')
+HAS_ODBC = available('pyodbc')
+
 try:
     import win32com.client
     import pythoncom
@@ -21,80 +43,250 @@ try:
 except ImportError:
     HAS_DAO = False
 
-try:
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from google.auth.transport.requests import Request
-    from googleapiclient.discovery import build
-    from googleapiclient.http import MediaFileUpload
-    HAS_GOOGLE = True
-except ImportError:
-    HAS_GOOGLE = False
+Credentials = LazyImport('google.oauth2.credentials', 'Credentials')
+InstalledAppFlow = LazyImport('google_auth_oauthlib.flow', 'InstalledAppFlow')
+Request = LazyImport('google.auth.transport.requests', 'Request')
+build = LazyImport('googleapiclient.discovery', 'build')
+MediaFileUpload = LazyImport('googleapiclient.http', 'MediaFileUpload')
+MediaIoBaseUpload = LazyImport('googleapiclient.http', 'MediaIoBaseUpload')
+HAS_GOOGLE = all(available(m) for m in ('googleapiclient', 'google_auth_oauthlib', 'google.oauth2'))
 
-try:
-    import firebase_admin
-    from firebase_admin import credentials, firestore
-    from google.api_core import exceptions as google_exceptions
-    HAS_FIREBASE = True
-except ImportError:
-    HAS_FIREBASE = False
+firebase_admin = LazyImport('firebase_admin')
+credentials = LazyImport('firebase_admin.credentials')
+firestore = LazyImport('firebase_admin.firestore')
+google_exceptions = LazyImport('google.api_core.exceptions')
+HAS_FIREBASE = available('firebase_admin')
+
+# DAO constants (RecordsetTypeEnum / DataTypeEnum)
+DAO_OPEN_FORWARD_ONLY = 8
+DAO_TEXT_TYPES = (10, 12)  # dbText, dbMemo
+
+AGENDA_TABLE_PREFIX = "DATA AGENDA SURAT MASUK"
+# config/ document for the heartbeat and cycle status: config/system is watched by the trigger listener,
+# and every write to it is a billed snapshot read
+STATUS_DOC = 'bridge_status'
 
 # --- LOGGING SETUP ---
-log_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bridge.log')
-
-# Reset log if larger than 5MB
-if os.path.exists(log_file) and os.path.getsize(log_file) > 5 * 1024 * 1024:
-    try: os.remove(log_file)
-    except: pass
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler(log_file, encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Hot paths only enqueue; a listener thread writes the rotating bridge.log, the console and the tray's ring buffer
+load_env()
+configure_logging()
+
+class _Ready:
+    """Attribute backed by a Future in obj._ready: reads block until the value has been set."""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None: return self
+        return obj._ready[self.name].result()
+
+    def __set__(self, obj, value):
+        with obj._ready_lock:
+            future = obj._ready.get(self.name)
+            if future is None or future.done():
+                future = obj._ready[self.name] = Future()
+            future.set_result(value)
+
 
 class BridgeLogic:
-    def __init__(self):
+    # Built by _init_services, on background threads with background_init
+    drive_service = _Ready()
+    firestore_db = _Ready()
+    audit_sink = _Ready()
+
+    def __init__(self, background_init=False):
+        """background_init=True (the tray's fast start; BRIDGE_FAST_START=0 turns it off) returns before the
+        Drive/Firestore clients exist: they are built on threads and wait_ready() blocks until they are."""
         logging.info("Initializing Bridge Logic...")
-        self.project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        # Load Env — try .env.local first (Next.js convention), then .env
-        env_local = os.path.join(self.project_root, '.env.local')
-        env_plain = os.path.join(self.project_root, '.env')
-        if os.path.exists(env_local):
-            load_dotenv(env_local)
-        elif os.path.exists(env_plain):
-            load_dotenv(env_plain)
+        self.project_root = PROJECT_ROOT
+        load_env()
         
-        # Paths
+        # Paths (runtime state files live in BRIDGE_DATA_DIR, default: next to this file)
+        self.data_dir = os.getenv('BRIDGE_DATA_DIR') or os.path.dirname(__file__)
         self.db_path = os.getenv('ACCESS_DB_PATH')
         self.creds_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.getenv('GOOGLE_CLIENT_SECRET', 'credentials.json')))
         self.token_path = os.path.join(os.path.dirname(self.creds_path), 'token.json')
-        self.state_file = os.path.join(os.path.dirname(__file__), 'sync_state.json')
+        self.state_file = os.path.join(self.data_dir, 'sync_state.db')
+        self.legacy_state_file = os.path.join(self.data_dir, 'sync_state.json')
         
         # Config
         self.target_table = "DATA AGENDA SURAT MASUK 2025"
         self.target_year = 2025
         self.drive_folder_id = os.getenv('GOOGLE_DRIVE_FOLDER_ID')
         
-        # Init Services
-        self.drive_service = self._init_drive() if HAS_GOOGLE else None
-        self.firestore_db = self._init_firestore() if HAS_FIREBASE else None
+        # Firestore batch writes: 500 ops per commit is the hard API limit
+        try: self.write_batch_size = max(1, min(int(os.getenv('FIRESTORE_BATCH_SIZE', '400')), 500))
+        except ValueError: self.write_batch_size = 400
+        self.last_sync_stats = {}
+
+        # Multi-table mode: "all" agenda tables or a list of tables/years (unset = target year only)
+        tables_env = os.getenv('SYNC_TABLES', '').strip()
+        if not tables_env: self.sync_tables = None
+        elif tables_env.lower() == 'all': self.sync_tables = 'all'
+        else: self.sync_tables = [t.strip() for t in tables_env.split(',') if t.strip()]
+        try: self.table_workers = max(1, int(os.getenv('SYNC_TABLE_WORKERS', '4')))
+        except ValueError: self.table_workers = 4
         
-        self.processed_state = self._load_state()
+        # Streaming row pipeline (fetchmany + incremental JSON backup); SYNC_STREAMING=0 restores fetchall
+        self.streaming_sync = os.getenv('SYNC_STREAMING', '1').lower() not in ('0', 'false', 'no')
+        try: self.fetch_chunk_size = max(1, int(os.getenv('SYNC_FETCH_SIZE', '500')))
+        except ValueError: self.fetch_chunk_size = 500
+        # Staged table scan: read/diff/attachments/uploads/write on their own threads behind bounded queues
+        # (SYNC_PIPELINE=0 runs the same stages inline); FIRESTORE_WRITE_WORKERS batch commits in flight
+        self.pipeline_sync = os.getenv('SYNC_PIPELINE', '1').lower() not in ('0', 'false', 'no')
+        try:
+            self.pipeline_queue = max(1, int(os.getenv('SYNC_PIPELINE_QUEUE', '256')))
+            self.write_workers = max(1, int(os.getenv('FIRESTORE_WRITE_WORKERS', '2')))
+        except ValueError:
+            self.pipeline_queue, self.write_workers = 256, 2
+        self._pipelines = set()
+
+        # Source backend: 'odbc' (Access driver + DAO on a copy) or, opt-in, 'native' (mmap reader, in place, no driver)
+        self.source_backend = 'native' if os.getenv('SYNC_SOURCE', 'odbc').lower() == 'native' else 'odbc'
         
-        # Validation
-        if not self.firestore_db:
-            logging.error("Firestore DB not initialized. Check serviceAccountKey.json")
+        # Per-phase timings, counters and API latency (metrics.json + local /metrics endpoint)
+        self.metrics = SyncMetrics(os.path.join(self.data_dir, 'metrics.json'))
+        try: self.metrics_port = int(os.getenv('METRICS_PORT', '9108'))
+        except ValueError: self.metrics_port = 9108
+
+        # Every Firestore/Drive call goes through the governor: daily budgets, rate limits, backoff, breaker
+        try:
+            budgets = {
+                'firestore.read': int(os.getenv('FIRESTORE_DAILY_READS', '50000')),
+                'firestore.write': int(os.getenv('FIRESTORE_DAILY_WRITES', '20000'))
+            }
+            rates = {
+                'firestore': float(os.getenv('FIRESTORE_RATE_PER_SEC', '50')),
+                'drive': float(os.getenv('DRIVE_RATE_PER_SEC', '10'))
+            }
+        except ValueError:
+            budgets, rates = {'firestore.read': 50000, 'firestore.write': 20000}, {'firestore': 50, 'drive': 10}
+        self.governor = RequestGovernor(
+            budgets=budgets, rates=rates, metrics=self.metrics,
+            state_path=os.path.join(self.data_dir, 'quota_usage.json')
+        )
+        
+        # Concurrent attachment uploads (DRIVE_UPLOAD_WORKERS=0 uploads inline)
+        try: self.upload_workers = max(0, int(os.getenv('DRIVE_UPLOAD_WORKERS', '4')))
+        except ValueError: self.upload_workers = 4
+        self.upload_pool = None
+        self._drive_creds = None
+        self._drive_local = threading.local()
+        # Attachment content (md5) queued for upload this cycle -> Future, so duplicates share one upload
+        self._content_uploads = {}
+        self._content_lock = threading.Lock()
+
+        # Attachment upload path: blobs up to ATTACHMENT_MEMORY_MAX_MB stay in memory (larger ones via a temp file, which
+        # also bounds what the upload queue holds);
+        # uploads up to DRIVE_MULTIPART_MAX_MB are one multipart request, larger ones resumable in DRIVE_CHUNK_MB chunks
+        try:
+            self.attachment_memory_max = int(float(os.getenv('ATTACHMENT_MEMORY_MAX_MB', '8')) * 1024 * 1024)
+            self.multipart_max = int(float(os.getenv('DRIVE_MULTIPART_MAX_MB', '5')) * 1024 * 1024)
+            # Resumable chunks must be a multiple of 256 KiB
+            self.upload_chunk_size = max(1, int(float(os.getenv('DRIVE_CHUNK_MB', '8')) * 4)) * 256 * 1024
+        except ValueError:
+            self.attachment_memory_max, self.multipart_max, self.upload_chunk_size = 8 * 1024 * 1024, 5 * 1024 * 1024, 8 * 1024 * 1024
+        
+        # Local index of the Drive folder (name -> id/size/md5), kept fresh via the changes API
+        try: index_ttl = float(os.getenv('DRIVE_INDEX_TTL_HOURS', '24')) * 3600
+        except ValueError: index_ttl = 24 * 3600
+        self.drive_index = DriveFolderIndex(os.path.join(self.data_dir, 'drive_index.json'), index_ttl)
+
+        # Permission grants and deletes go out as BatchHttpRequests of up to DRIVE_BATCH_SIZE calls
+        try: batch_size = int(os.getenv('DRIVE_BATCH_SIZE', '100'))
+        except ValueError: batch_size = 100
+        self.drive_batch = DriveBatch(
+            lambda batch, cost: self.governor.call('drive', 'batch', batch.execute, cost=cost), max_size=batch_size)
+        
+        # Backup file publishing: compact JSON, upload only on change, optional deltas between full snapshots
+        self.backup_indent = 2 if os.getenv('BACKUP_FORMAT', 'compact').lower() == 'pretty' else None
+        backup_extras = [f.strip().lower() for f in os.getenv('BACKUP_EXTRA_FORMATS', '').split(',') if f.strip()]
+        try:
+            full_interval = float(os.getenv('BACKUP_FULL_INTERVAL_HOURS', '0')) * 3600
+            max_delta = int(os.getenv('BACKUP_DELTA_MAX_RECORDS', '2000'))
+        except ValueError:
+            full_interval, max_delta = 0, 2000
+        self.backup_publisher = BackupPublisher(
+            os.path.join(self.data_dir, 'backup_state.json'),
+            full_interval=full_interval, max_delta=max_delta, extra_formats=backup_extras
+        )
+
+        # Record fingerprints: 'fast' (blake2b/xxhash) or 'compat' (legacy MD5 of sorted JSON)
+        self.hash_mode = 'compat' if os.getenv('SYNC_HASH_MODE', 'fast').lower() == 'compat' else 'fast'
+        
+        # Source change gate + reusable local DB snapshot (SYNC_SAMPLE_HASH=1 also hashes sampled blocks)
+        self.db_snapshot = SourceSnapshot(
+            os.path.join(self.data_dir, 'source_fingerprint.json'),
+            tempfile.gettempdir(),
+            sample_hash=os.getenv('SYNC_SAMPLE_HASH', '0').lower() in ('1', 'true', 'yes')
+        )
+        self._stats_lock = threading.Lock()
+        
+        # Record state opens on first use (see processed_state)
+        self._state = None
+        self._state_lock = threading.Lock()
+        # Mid-table checkpoints: committed state is made durable every N records or T seconds
+        try:
+            self.checkpoint_records = max(1, int(os.getenv('SYNC_CHECKPOINT_RECORDS', '1000')))
+            self.checkpoint_seconds = float(os.getenv('SYNC_CHECKPOINT_SECONDS', '30'))
+        except ValueError:
+            self.checkpoint_records, self.checkpoint_seconds = 1000, 30.0
+        
+        self.trigger_source = None
+        # Backup links last written to config/system
+        self._published_links = None
+        
+        # Init Services
+        self._ready = {'drive_service': Future(), 'firestore_db': Future(), 'audit_sink': Future()}
+        self._ready_lock = threading.Lock()
+        if background_init and os.getenv('BRIDGE_FAST_START', '1') != '0':
+            threading.Thread(target=self._init_drive_service, name='DriveInit', daemon=True).start()
+            threading.Thread(target=self._init_firestore_services, name='FirestoreInit', daemon=True).start()
+        else:
+            self._init_drive_service()
+            self._init_firestore_services()
+
+    def _init_drive_service(self):
+        try: self.drive_service = self._init_drive() if HAS_GOOGLE else None
+        finally:
+            if not self._ready['drive_service'].done(): self.drive_service = None
         if not self.drive_service:
             logging.error("Google Drive API not initialized. Check credentials.json")
+
+    def _init_firestore_services(self):
+        try:
+            self.firestore_db = self._init_firestore() if HAS_FIREBASE else None
+            # Audit trail goes through a buffered sink (spills to disk while Firestore is unreachable)
+            self.audit_sink = AuditSink(
+                self.firestore_db, os.path.join(self.data_dir, 'audit_spill.jsonl'), governor=self.governor
+            ) if self.firestore_db else None
+        finally:
+            # Readers must never stay blocked on a failed init
+            if not self._ready['firestore_db'].done(): self.firestore_db = None
+            if not self._ready['audit_sink'].done(): self.audit_sink = None
+        if not self.firestore_db:
+            logging.error("Firestore DB not initialized. Check serviceAccountKey.json")
             
         # Initial Status
         self.update_bridge_status("healthy")
 
+    def services_ready(self, *names):
+        """True once the named clients (default: all) have been built; never blocks."""
+        return all(self._ready[n].done() for n in names or self._ready)
+
+    def wait_ready(self, timeout=None):
+        """Block until the Drive/Firestore clients are built (they may be None if unavailable)."""
+        for future in list(self._ready.values()):
+            future.result(timeout)
+
+    @property
+    def processed_state(self):
+        if self._state is None:
+            with self._state_lock:
+                if self._state is None: self._state = self._load_state()
+        return self._state
+
     def _init_firestore(self):
         try:
             if firebase_admin._apps: return firestore.client()
@@ -132,41 +324,47 @@ class BridgeLogic:
                 with open(self.token_path, 'w') as token:
                     token.write(creds.to_json())
 
+            self._drive_creds = creds
             return build('drive', 'v3', credentials=creds)
         except Exception as e:
             logging.error(f"Drive Auth Failed: {e}")
             return None
 
     def _load_state(self):
-        if os.path.exists(self.state_file):
-            try:
-                with open(self.state_file, 'r') as f: return json.load(f)
-            except: return {}
-        return {}
+        """Open the record state store (migrates sync_state.json on first run)."""
+        try:
+            return StateStore(self.state_file, legacy_json_path=self.legacy_state_file)
+        except Exception as e:
+            logging.error(f"State store unavailable, using in-memory state: {e}")
+            return {}
 
     def _save_state(self):
         try:
-            with open(self.state_file, 'w') as f: json.dump(self.processed_state, f, indent=2)
-        except: pass
+            if isinstance(self.processed_state, StateStore): self.processed_state.commit()
+        except Exception as e:
+            logging.warning(f"State commit failed: {e}")
 
     def update_bridge_status(self, status, error=None):
         """Update Firestore heartbeat with resilience."""
         if not self.firestore_db: return
         try:
-            doc_ref = self.firestore_db.collection('config').document('system')
+            doc_ref = self.firestore_db.collection('config').document(STATUS_DOC)
             data = {
                 'syncStatus': status,
                 'lastActive': firestore.SERVER_TIMESTAMP,
             }
             if error: data['lastError'] = str(error)
             elif status == "healthy": data['lastError'] = None
+            data['quota'] = self.governor.snapshot()
             
-            # Use set with merge to ensure doc exists
-            doc_ref.set(data, merge=True)
+            # Use set with merge to ensure doc exists. Plain heartbeats are the first traffic shed under quota pressure.
+            self._fs('write', lambda: doc_ref.set(data, merge=True), essential=bool(error) or status != "healthy")
             logging.info(f"Heartbeat: {status.upper()}")
             
             if error:
                 self.log_event(f"System Error: {error}", "error")
+        except RequestShed as e:
+            logging.info(f"Heartbeat skipped: {e}")
         except google_exceptions.PermissionDenied:
             logging.error("Firestore Permission Denied! Check Security Rules.")
         except Exception as e:
@@ -175,20 +373,32 @@ class BridgeLogic:
     def log_event(self, message, level="info"):
         """Log event to local file and Firestore audit_logs."""
         logging.info(f"[{level.upper()}] {message}")
-        if not self.firestore_db: return
-        try:
-            self.firestore_db.collection('audit_logs').add({
-                'message': message,
-                'level': level,
-                'timestamp': firestore.SERVER_TIMESTAMP,
-                'userName': 'BRIDGE_ENGINE'
-            })
-        except Exception as e:
-            logging.warning(f"Failed to write audit log to Firestore: {e}")
+        if not self.audit_sink: return
+        # Buffered: committed in batches by the sink's background thread
+        self.audit_sink.emit(message, level)
+
+    def start_metrics_server(self):
+        """Serve /metrics (Prometheus text) and /metrics.json on 127.0.0.1:METRICS_PORT (0 = off)."""
+        return self.metrics.serve(self.metrics_port)
+
+    def shutdown(self):
+        """Flush buffered work before the process exits."""
+        self.stop_trigger_listener()
+        # A table scan still running stops at its next item and keeps its checkpoint marker
+        for pipeline in list(self._pipelines):
+            pipeline.cancel(RuntimeError("Bridge shutting down"))
+        # A client still being built (OAuth consent, slow network) has nothing queued; reading it would block the exit
+        if self.services_ready('drive_service'): self._flush_drive_batch()
+        # Keep whatever an interrupted cycle already wrote (its markers stay for the next cycle's resume)
+        self._save_state()
+        self.drive_index.save()
+        self.metrics.stop()
+        if self.services_ready('audit_sink') and self.audit_sink:
+            self.audit_sink.close()
 
     def sync_config(self):
         """Read configuration from Firestore."""
-        config_cache_file = os.path.join(os.path.dirname(__file__), 'config_cache.json')
+        config_cache_file = os.path.join(self.data_dir, 'config_cache.json')
         
         # Load from cache first to guarantee we have A path even if offline
         try:
@@ -205,39 +415,66 @@ class BridgeLogic:
             logging.info("  [FS] Fetching system config...")
             doc_ref = self.firestore_db.collection('config').document('system')
             # Add timeout and disable retry to avoid hanging 300s on Quota Exceeded
-            doc = doc_ref.get(timeout=5, retry=None)
+            doc = self._fs('read', lambda: doc_ref.get(timeout=5, retry=None), retries=0)
             data = doc.to_dict()
             if data:
-                self.db_path = data.get('accessDbPath', self.db_path)
-                self.drive_folder_id = data.get('driveFolderId', self.drive_folder_id)
-                self.target_year = int(data.get('targetYear', self.target_year))
-                logging.info(f"  [FS] Config sync: OK. DB: {self.db_path} | Target Year: {self.target_year}")
-                
-                # Save to cache
-                try:
-                    with open(config_cache_file, 'w', encoding='utf-8') as f:
-                        json.dump({
-                            'accessDbPath': self.db_path,
-                            'targetYear': self.target_year,
-                            'driveFolderId': self.drive_folder_id
-                        }, f)
-                except Exception: pass
+                self._apply_config(data)
             else:
                 logging.warning("  [FS] Config document not found.")
         except Exception as e:
             logging.warning(f"  [FS] Config sync failed: {e}. Using cached config: DB={self.db_path}")
 
+    def _apply_config(self, data):
+        """Apply a config/system document and refresh config_cache.json."""
+        self.db_path = data.get('accessDbPath', self.db_path)
+        self.drive_folder_id = data.get('driveFolderId', self.drive_folder_id)
+        self.target_year = int(data.get('targetYear', self.target_year))
+        logging.info(f"  [FS] Config sync: OK. DB: {self.db_path} | Target Year: {self.target_year}")
+        
+        # Save to cache
+        try:
+            with open(os.path.join(self.data_dir, 'config_cache.json'), 'w', encoding='utf-8') as f:
+                json.dump({
+                    'accessDbPath': self.db_path,
+                    'targetYear': self.target_year,
+                    'driveFolderId': self.drive_folder_id
+                }, f)
+        except Exception: pass
+
+    def start_trigger_listener(self, on_trigger, source_db=None):
+        """Subscribe to web "Sync now" triggers and config edits. Returns False if unavailable.
+
+        source_db defaults to Firestore; pass triggers.FakeConfigStore() to run offline.
+        """
+        db = source_db or self.firestore_db
+        if not db: return False
+        self.stop_trigger_listener()
+        try:
+            self.trigger_source = FirestoreTriggerSource(db, on_trigger, on_config=self._apply_config, governor=self.governor).start()
+            return True
+        except Exception as e:
+            logging.warning(f"Trigger listener failed to start: {e}")
+            self.trigger_source = None
+            return False
+
+    def trigger_listener_alive(self):
+        return bool(self.trigger_source) and self.trigger_source.is_alive()
+
+    def stop_trigger_listener(self):
+        if self.trigger_source:
+            self.trigger_source.stop()
+            self.trigger_source = None
+
     def _calculate_hash(self, data_dict):
-        """Create a digital fingerprint of the record to detect changes."""
-        # Clean data for consistent hashing (exclude volatile fields)
-        d = {k: v for k, v in data_dict.items() if k not in ['lastSyncAt', 'ts']}
-        d_str = json.dumps(d, sort_keys=True, default=str)
-        return hashlib.md5(d_str.encode('utf-8')).hexdigest()
-
-    def perform_sync(self):
-        """Core sync logic."""
+        """Create a digital fingerprint of the record to detect changes (legacy MD5/JSON form)."""
+        return legacy_record_hash(data_dict)
+
+    def perform_sync(self, force=False):
+        """Core sync logic. force=True bypasses the unchanged-source gate (manual triggers)."""
         sync_start = time.time()
         logging.info("--- Sync Cycle Started ---")
+        self.metrics.begin_cycle()
+        result = 'error'
         
         # Initialize COM for this thread
         if HAS_DAO:
@@ -253,20 +490,45 @@ class BridgeLogic:
                 self.update_bridge_status("healthy", error=f"Missing DB: {self.db_path}")
                 return
 
-            # Copy Database to temp to avoid locks
-            temp_db = os.path.join(tempfile.gettempdir(), f"MTP_Sync_{int(time.time())}.accdb")
-            logging.info(f"Copying DB to: {temp_db}")
+            # Cheap change gate: skip copy + DB engines when the source is untouched
+            fingerprint = None
             try:
-                shutil.copy2(self.db_path, temp_db)
-                logging.info("DB Copying Successful.")
-            except Exception as e:
-                logging.error(f"DB Copy Failed: {e}")
-                self.update_bridge_status("healthy", error=f"Copy Error: {e}")
-                return
+                scope = f"year={self.target_year}"
+                if self.sync_tables: scope += f";tables={self.sync_tables}"
+                fingerprint = self.db_snapshot.fingerprint(self.db_path, scope=scope)
+                if not force and self.db_snapshot.is_unchanged(fingerprint):
+                    logging.info("Source DB unchanged since last successful sync. Skipping cycle.")
+                    self.update_bridge_status("healthy")
+                    result = 'skipped'
+                    return
+            except OSError as e:
+                logging.warning(f"Source fingerprint failed, syncing anyway: {e}")
+
+            if self.source_backend == 'native':
+                # The native reader maps the source read-only in place: no copy needed
+                temp_db = self.db_path
+            else:
+                # Refresh the cached local copy to avoid locks
+                logging.info(f"Refreshing DB snapshot: {self.db_snapshot.cache_path}")
+                try:
+                    with self.metrics.phase('copy'):
+                        temp_db = self.db_snapshot.refresh_copy(self.db_path)
+                    self.metrics.inc('bytes_copied', os.path.getsize(temp_db))
+                    logging.info("DB Copying Successful.")
+                except Exception as e:
+                    logging.error(f"DB Copy Failed: {e}")
+                    self.update_bridge_status("healthy", error=f"Copy Error: {e}")
+                    return
 
             try:
-                logging.info("Initializing DB Engines (DAO/ODBC)...")
+                logging.info("Initializing DB Engines (DAO/ODBC)..." if self.source_backend == 'odbc' else "Opening DB (native reader)...")
                 self._process_database(temp_db)
+                stats = self.last_sync_stats
+                # Only a clean cycle may arm the gate; otherwise the next cycle retries
+                clean = not any(stats.get(k) for k in ('failed', 'att_errors', 'backup_failed', 'table_errors'))
+                result = 'ok' if clean else 'partial'
+                if fingerprint and clean:
+                    self.db_snapshot.mark_synced(fingerprint)
                 self.log_event(f"Sync Cycle Completed successfully in {time.time() - sync_start:.2f}s", "info")
             except Exception as e:
                 logging.error(f"Processing Error: {e}")
@@ -275,252 +537,1001 @@ class BridgeLogic:
             finally:
                 if HAS_DAO:
                     pythoncom.CoUninitialize()
-                if os.path.exists(temp_db):
+                # The cached snapshot is reused; only a lock-fallback copy is removed (never the source itself)
+                if temp_db not in (self.db_snapshot.cache_path, self.db_path) and os.path.exists(temp_db):
                     try: os.remove(temp_db)
                     except: pass
         except Exception as e:
             logging.critical(f"Fatal Sync Error: {e}")
+        finally:
+            summary = self.metrics.end_cycle(result, self.last_sync_stats if result in ('ok', 'partial') else None)
+            if summary and result != 'skipped':
+                phases = ", ".join(f"{p} {sec:.2f}s" for p, sec in summary['phasesS'].items())
+                logging.info(f"Cycle phases ({result}, {summary['durationS']:.2f}s, {summary['rowsPerS']} rows/s): {phases}")
 
     def _process_database(self, db_path):
-        """Internal processing logic."""
-        conn = None
-        dao_db = None
-        all_records = []
-        
-        # Init DAO
-        if HAS_DAO:
+        """Internal processing logic: sync the selected table(s) from one DB snapshot."""
+        reader = None
+        if self.source_backend == 'native':
+            # One mapped reader serves every table thread for this cycle
+            try:
+                reader = AccessReader(db_path)
+                available_tables = reader.table_names()
+            except Exception as e:
+                logging.error(f"Native Reader Failed: {e}")
+                raise
+        else:
+            # Init ODBC (table listing only; every table syncs on its own connection)
             try:
-                try: dao_engine = win32com.client.Dispatch("DAO.DBEngine.160")
-                except: dao_engine = win32com.client.Dispatch("DAO.DBEngine.120")
-                dao_db = dao_engine.OpenDatabase(db_path)
+                conn = pyodbc.connect(self._odbc_conn_str(db_path))
             except Exception as e:
-                logging.warning(f"DAO Init Failed: {e}")
+                logging.error(f"ODBC Connect Failed: {e}")
+                raise
+            try:
+                available_tables = [table.table_name for table in conn.cursor().tables(tableType='TABLE')]
+            finally:
+                conn.close()
 
-        # Init ODBC
+        # Auto-Detect Table Name(s)
         try:
-            conn_str = r"DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};DBQ=" + db_path + ";ReadOnly=1;"
-            conn = pyodbc.connect(conn_str)
-            cursor = conn.cursor()
+            tables = self._resolve_tables(available_tables)
         except Exception as e:
-            logging.error(f"ODBC Connect Failed: {e}")
+            logging.error(f"Table Read Failed: {e}")
+            if reader: reader.close()
             raise
 
-        # Auto-Detect Table Name
+        self.target_table = tables[0]
+        multi = self.sync_tables is not None
+        runs = [self._new_table_run(t, multi, reader) for t in tables]
+
+        # Existence checks for attachments become lookups in the Drive folder index
+        self._refresh_drive_index()
+        with self._content_lock: self._content_uploads.clear()
+        upload_pool = self._get_upload_pool()
+
         try:
-            available_tables = [table.table_name for table in cursor.tables(tableType='TABLE')]
-            valid_tables = [t for t in available_tables if t.startswith("DATA AGENDA SURAT MASUK")]
-            
-            if not valid_tables:
-                raise Exception("No 'DATA AGENDA SURAT MASUK' table found in database.")
-                
-            desired_table = f"DATA AGENDA SURAT MASUK {self.target_year}"
-            if desired_table in valid_tables:
-                self.target_table = desired_table
+            if len(runs) == 1:
+                self._sync_table(db_path, runs[0], upload_pool)
             else:
-                self.target_table = valid_tables[0] # Fallback to first available
-                logging.warning(f"Desired table [{desired_table}] not found. Falling back to [{self.target_table}].")
-                
-            self.log_event(f"Scanning table: [{self.target_table}]", "info")
-            cursor.execute(f"SELECT * FROM [{self.target_table}]")
-            columns = [col[0] for col in cursor.description]
-            rows = cursor.fetchall()
-        except Exception as e:
-            logging.error(f"Table Read Failed: {e}")
-            raise
+                logging.info(f"Syncing {len(runs)} tables concurrently: {', '.join(r['table'] for r in runs)}")
+                errors = []
+                with ThreadPoolExecutor(max_workers=min(len(runs), self.table_workers), thread_name_prefix='TableSync') as ex:
+                    futures = [(ex.submit(self._sync_table_thread, db_path, run, upload_pool), run) for run in runs]
+                    for future, run in futures:
+                        try: future.result()
+                        except Exception as e:
+                            # One broken table must not stop the others
+                            logging.error(f"Table Sync Failed [{run['table']}]: {e}")
+                            run['stats']['table_error'] = str(e)
+                            errors.append(e)
+                if len(errors) == len(runs): raise errors[0]
+        finally:
+            if reader: reader.close()
+            # Public link grants queued by the uploads
+            self._flush_drive_batch()
+            for run in runs:
+                # A failed table keeps its marker (uploads, grants) for the next cycle to resume from
+                if not run['done']: self._checkpoint(run)
+                elif isinstance(run['state'], StatePartition):
+                    try: run['state'].finish()
+                    except Exception as e: logging.warning(f"State commit failed [{run['table']}]: {e}")
 
-        stats = {"added": 0, "updated": 0, "skipped": 0}
-        
-        for row in rows:
-            data = {}
-            for i, col in enumerate(columns):
-                val = row[i]
-                if isinstance(val, (datetime.date, datetime.datetime)): val = val.isoformat()
-                if isinstance(val, (bytes, bytearray)): val = "[BINARY]"
-                data[col] = val
-            
-            no_urut = data.get('NO URUT')
-            if no_urut is None: continue
-
-            # ID format: "{year}_{no_urut}" — matches the original Node.js bridge
-            # format so existing Firestore documents are updated (not duplicated).
-            # Determine Year from Date Field
-            # Default to target_year (2025) if missing, but try to parse real year
-            real_year = int(self.target_year)
-            date_val = data.get('TANGGAL SURAT DITERIMA')
-            if date_val and isinstance(date_val, str) and len(date_val) >= 4:
-                try:
-                    real_year = int(date_val[:4])
-                except: pass
+        self._save_state()
+        self.drive_index.save()
+        stats = self._merge_table_stats(runs)
+        self.last_sync_stats = stats
+        if multi:
+            logging.info(f"Sync Results (all tables): {stats['added']} added, {stats['updated']} updated, {stats['skipped']} skipped (unchanged), {stats['failed']} failed.")
 
-            # ID format: "{year}_{no_urut}"
-            doc_id = f"{real_year}_{no_urut}"
-            data['id'] = doc_id
-            data['year'] = real_year
-            data['target_year_config'] = int(self.target_year) # Keep track of original scan scope
-            
-            # 1. Check existing state for hashing
-            cached = self.processed_state.get(doc_id, {})
-            current_hash = self._calculate_hash(data)
-            
-            # Attachments Management
-            attachments = []
-            cached_atts = cached.get('attachments', []) if isinstance(cached.get('attachments'), list) else []
-            
-            if dao_db:
+        with self.metrics.phase('backup_upload'):
+            self._publish_backups(runs, stats)
+
+    def _resolve_tables(self, available_tables):
+        """Tables to sync this cycle. Default: the target year's table (first agenda table as fallback)."""
+        valid_tables = [t for t in available_tables if t.startswith(AGENDA_TABLE_PREFIX)]
+        if not valid_tables:
+            raise Exception("No 'DATA AGENDA SURAT MASUK' table found in database.")
+
+        if self.sync_tables == 'all':
+            return sorted(valid_tables)
+        if self.sync_tables:
+            wanted = []
+            for name in self.sync_tables:
+                table = name if name.startswith(AGENDA_TABLE_PREFIX) else f"{AGENDA_TABLE_PREFIX} {name}"
+                if table in valid_tables: wanted.append(table)
+                else: logging.warning(f"Configured table [{table}] not found. Skipping.")
+            if wanted: return wanted
+            logging.warning("None of the SYNC_TABLES exist. Falling back to the target year.")
+
+        desired_table = f"{AGENDA_TABLE_PREFIX} {self.target_year}"
+        if desired_table in valid_tables:
+            return [desired_table]
+        logging.warning(f"Desired table [{desired_table}] not found. Falling back to [{valid_tables[0]}].")
+        return [valid_tables[0]] # Fallback to first available
+
+    def _new_table_run(self, table, multi, reader=None):
+        """Per-table context: scan year, state partition, stats, backup file and source reader (None = ODBC/DAO)."""
+        year = int(self.target_year)
+        suffix = table[len(AGENDA_TABLE_PREFIX):].strip()
+        if multi and suffix.isdigit():
+            year = int(suffix)
+        state = self.processed_state.partition(table) if isinstance(self.processed_state, StateStore) else self.processed_state
+        json_name = f"latest_data_{suffix or year}.json" if multi else 'latest_data.json'
+        return {
+            'table': table,
+            'year': year,
+            'state': state,
+            'stats': {"added": 0, "updated": 0, "skipped": 0, "failed": 0, "att_errors": 0,
+                      "batches": 0, "batch_ms_total": 0.0, "batch_ms_max": 0.0},
+            'json_path': os.path.join(self.data_dir, json_name),
+            # Records rewritten this cycle, for backup deltas (None = not tracked / too many)
+            'changes': {} if self.backup_publisher.full_interval else None,
+            'att_key_is_text': None,
+            'reader': reader,
+            # Checkpoint marker: Drive files created for this table this cycle, and the last committed record
+            'started': time.time(),
+            'uploads': {},
+            'last_no_urut': None,
+            'unsaved': 0,
+            'checkpoint_at': time.time(),
+            'done': False,
+            # Phase timings, merged into self.metrics when the table finishes
+            'timings': defaultdict(float)
+        }
+
+    @staticmethod
+    def _odbc_conn_str(db_path):
+        return r"DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};DBQ=" + db_path + ";ReadOnly=1;"
+
+    def _open_dao(self, db_path):
+        try: dao_engine = win32com.client.Dispatch("DAO.DBEngine.160")
+        except: dao_engine = win32com.client.Dispatch("DAO.DBEngine.120")
+        return dao_engine.OpenDatabase(db_path)
+
+    def _sync_table_thread(self, db_path, run, upload_pool):
+        # DAO is COM: every table thread needs its own apartment
+        if HAS_DAO: pythoncom.CoInitialize()
+        try:
+            self._sync_table(db_path, run, upload_pool)
+        finally:
+            if HAS_DAO: pythoncom.CoUninitialize()
+
+    def _sync_table(self, db_path, run, upload_pool):
+        """Scan one agenda table into Firestore, Drive and its backup file (stages: _table_pipeline)."""
+        table, stats, state, timings = run['table'], run['stats'], run['state'], run['timings']
+        self._resume_table(run)
+        perf = time.perf_counter
+        conn = None
+        dao_db = None
+        reader = run.get('reader')
+
+        # Init DAO (the native reader decodes attachments itself)
+        if HAS_DAO and not reader:
+            try:
+                dao_db = self._open_dao(db_path)
+            except Exception as e:
+                logging.warning(f"DAO Init Failed [{table}]: {e}")
+
+        try:
+            try:
+                if not reader:
+                    conn = pyodbc.connect(self._odbc_conn_str(db_path))
+                    cursor = conn.cursor()
+            except Exception as e:
+                logging.error(f"ODBC Connect Failed [{table}]: {e}")
+                raise
+
+            try:
+                self.log_event(f"Scanning table: [{table}]", "info")
+                t0 = perf()
+                if reader: cursor = reader.cursor(table)
+                else: cursor.execute(f"SELECT * FROM [{table}]")
+                columns = [col[0] for col in cursor.description]
+                type_codes = [col[1] for col in cursor.description]
+                hasher = RecordHasher(columns, type_codes, mode=self.hash_mode)
+                converter = RowConverter(columns, type_codes)
+                # Streaming mode pulls rows in chunks instead of materializing the table
+                rows = iter_rows(cursor, self.fetch_chunk_size, timings) if self.streaming_sync else cursor.fetchall()
+                timings['odbc_read'] += perf() - t0
+            except Exception as e:
+                logging.error(f"Table Read Failed [{table}]: {e}")
+                raise
+
+            # One forward-only pass (DAO or native) instead of a recordset per row
+            att_index = None
+            if dao_db or reader:
                 try:
-                    attachments = self._extract_attachments(dao_db, no_urut, cached_atts)
+                    t0 = perf()
+                    att_index = self._build_attachment_index(dao_db, run)
+                    timings['dao_attachments'] += perf() - t0
                 except Exception as e:
-                    attachments = cached_atts
-                    logging.warning(f"Attachments Error [Rec {no_urut}]: {e}")
-            else:
-                attachments = cached_atts
-            
-            data['attachments'] = attachments
-            data['attachment_link'] = ", ".join([a.get('driveViewLink', '') for a in attachments])
-
-            # ALWAYS add to all_records for JSON backup (Fail-safe)
-            all_records.append(data)
-
-            # 2. Smart Sync: Only write if hash changed OR never uploaded OR attachments changed
-            atts_changed = (str(attachments) != str(cached_atts))
-            if cached.get('hash') != current_hash or not cached.get('uploaded') or atts_changed:
-                if self.firestore_db:
-                    try:
-                        self.firestore_db.collection('surat_masuk').document(doc_id).set(data, merge=True)
-                        action = "updated" if cached.get('uploaded') else "added"
-                        stats[action] += 1
-                    except Exception as e:
-                        logging.warning(f"Firestore Write Failed [Rec {no_urut}]: {e}")
-                        continue
-                
-                # Update Local State
-                self.processed_state[doc_id] = {
+                    logging.warning(f"Attachment index scan failed, falling back to per-row lookups: {e}")
+
+            # Backup JSON sink: streamed to disk record by record, or buffered (legacy)
+            backup_writer = JsonArrayWriter if self.streaming_sync else BufferedJsonWriter
+            backup = backup_writer(run['json_path'], indent=self.backup_indent)
+            if 'ndjson' in self.backup_publisher.extra_formats:
+                backup = TeeWriter(backup, NdjsonWriter(os.path.splitext(run['json_path'])[0] + '.ndjson'))
+
+            scan = {
+                'hasher': hasher,
+                'converter': converter,
+                'att_index': att_index,
+                'upload_pool': upload_pool,
+                'backup': backup,
+                # DAO is COM, one handle per thread: the table thread's serves inline runs, the attachments thread opens its own
+                'dao': threading.local(),
+                'dao_path': db_path if dao_db else None,
+                'rows': 0,
+                'records': 0,
+                'awaiting': deque(),
+                'pending': [],
+                # Inline, records wait (in scan order) for their uploads while later rows are read;
+                # the uploads stage thread can simply block on each one in turn
+                'max_awaiting': 0 if self.pipeline_sync else (max(upload_pool.workers * 4, 16) if upload_pool else 0)
+            }
+            scan['dao'].db = dao_db
+            pipeline = self._table_pipeline(run, scan, converter.iter_records(rows, self.fetch_chunk_size, timings))
+            with backup:
+                self._pipelines.add(pipeline)
+                try: pipeline.run(threaded=self.pipeline_sync)
+                finally: self._pipelines.discard(pipeline)
+        finally:
+            if conn: conn.close()
+            if dao_db: dao_db.Close()
+
+        report = stats['pipeline'] = pipeline.report()
+        logging.info(f"Pipeline [{table}]: {report['wallS']:.2f}s, busiest stage {report['busiest']} ("
+                     + ", ".join(f"{name} {s['workS']:.2f}s" for name, s in report['stages'].items()) + ")")
+        stats['batch_ms_avg'] = round(stats['batch_ms_total'] / stats['batches'], 1) if stats['batches'] else 0.0
+        self.metrics.add_times(timings)
+        self.metrics.inc('rows', scan['rows'])
+        self.metrics.inc('records_written', stats['added'] + stats['updated'])
+        # Each table's progress is durable as soon as it finishes
+        if isinstance(state, StatePartition): state.commit(stats)
+        run['done'] = True
+        logging.info(f"Sync Results [{table}]: {stats['added']} added, {stats['updated']} updated, {stats['skipped']} skipped (unchanged), {stats['failed']} failed.")
+        if stats['batches']:
+            logging.info(f"Firestore Batches [{table}]: {stats['batches']} committed, avg {stats['batch_ms_avg']}ms, max {stats['batch_ms_max']:.1f}ms.")
+
+    def _table_pipeline(self, run, scan, records):
+        """Stages of a table scan, fed with (raw row, record dict) pairs.
+
+        Order is kept end to end (one thread per stage) except in the write
+        stage, whose FIRESTORE_WRITE_WORKERS threads commit batches
+        concurrently. Upload concurrency is the upload pool's; a full pool
+        blocks the attachments stage, a full queue the stage before it.
+        """
+        size = self.pipeline_queue
+        return Pipeline(f"Sync[{run['table']}]", records, [
+            Stage('diff', lambda item, emit: self._diff_record(run, scan, item, emit), queue_size=size),
+            Stage('attachments', lambda rec, emit: self._resolve_attachments(run, scan, rec, emit), queue_size=size,
+                  thread_init=lambda: self._attachment_thread(run, scan)),
+            Stage('uploads', lambda rec, emit: self._await_uploads(run, scan, rec, emit), queue_size=size,
+                  finish=lambda emit: self._drain_uploads(run, scan, emit)),
+            Stage('write', lambda batch, emit: self._commit_write_batch(run, batch), workers=self.write_workers,
+                  queue_size=self.write_workers * 2)
+        ])
+
+    def _diff_record(self, run, scan, item, emit):
+        """Stage: derive the record id and year, fingerprint the row and look up its cached state."""
+        row, data = item
+        scan['rows'] += 1
+        no_urut = data.get('NO URUT')
+        if no_urut is None: return
+
+        # ID format: "{year}_{no_urut}" — matches the original Node.js bridge
+        # format so existing Firestore documents are updated (not duplicated).
+        # Year comes from TANGGAL SURAT DITERIMA, defaulting to the table's scan year
+        scope_year, state = run['year'], run['state']
+        real_year = scan['converter'].year(row, scope_year)
+        doc_id = f"{real_year}_{no_urut}"
+        data['id'] = doc_id
+        data['year'] = real_year
+        data['target_year_config'] = scope_year # Keep track of original scan scope
+
+        # Check existing state for hashing
+        hasher = scan['hasher']
+        cached = state.get(doc_id, {})
+        extras = (doc_id, real_year, scope_year)
+        t0 = time.perf_counter()
+        current_hash = hasher.digest(row, extras)
+        run['timings']['hash'] += time.perf_counter() - t0
+        cached_hash = cached.get('hash')
+        if cached_hash != current_hash and RecordHasher.is_legacy(cached_hash) \
+                and hasher.legacy_digest(row, extras) == cached_hash:
+            # Unchanged record stored under the old MD5 fingerprint: upgrade the hash in place
+            cached = dict(cached, hash=current_hash)
+            state[doc_id] = cached
+
+        emit({
+            'doc_id': doc_id,
+            'no_urut': no_urut,
+            'data': data,
+            'cached': cached,
+            'cached_atts': cached.get('attachments', []) if isinstance(cached.get('attachments'), list) else [],
+            'hash': current_hash,
+            'attachments': []
+        })
+        scan['records'] += 1
+        if scan['records'] % 100 == 0:
+            logging.info(f"Progress [{run['table']}]: {scan['records']} records scanned...")
+
+    def _resolve_attachments(self, run, scan, rec, emit):
+        """Stage: link each attachment to Drive; new uploads are queued on the pool and come back as Futures."""
+        dao_db, att_index = getattr(scan['dao'], 'db', None), scan['att_index']
+        rec['attachments'] = rec['cached_atts']
+        if dao_db or (run.get('reader') and att_index is not None):
+            t0 = time.perf_counter()
+            no_urut = rec['no_urut']
+            try:
+                indexed = att_index.get(self._attachment_key(no_urut), []) if att_index is not None else None
+                rec['attachments'] = self._extract_attachments(dao_db, no_urut, rec['cached_atts'], indexed, scan['upload_pool'],
+                                                               run, rec['cached'].get('att_meta', {}))
+                run['timings']['dao_attachments'] += time.perf_counter() - t0
+            except Exception as e:
+                self._count_attachment_error(run['stats'])
+                logging.warning(f"Attachments Error [Rec {no_urut}]: {e}")
+        emit(rec)
+
+    @contextmanager
+    def _attachment_thread(self, run, scan):
+        """COM apartment and DAO handle for the attachments stage thread (the native reader needs neither)."""
+        if not scan['dao_path']:
+            yield
+            return
+        pythoncom.CoInitialize()
+        try:
+            try: scan['dao'].db = self._open_dao(scan['dao_path'])
+            except Exception as e: logging.warning(f"DAO Init Failed [{run['table']}]: {e}")
+            try: yield
+            finally:
+                dao_db = getattr(scan['dao'], 'db', None)
+                if dao_db: dao_db.Close()
+        finally:
+            pythoncom.CoUninitialize()
+
+    def _await_uploads(self, run, scan, rec, emit):
+        """Stage: finalize records in scan order once their uploads are done; changed ones go on in write batches."""
+        awaiting = scan['awaiting']
+        awaiting.append(rec)
+        while awaiting and (len(awaiting) > scan['max_awaiting'] or self._uploads_done(awaiting[0]['attachments'])):
+            self._queue_write(scan, self._finalize_record(run, awaiting.popleft(), scan['backup']), emit)
+
+    def _drain_uploads(self, run, scan, emit):
+        """Uploads stage finish: finalize the records still waiting and send the last, partial write batch."""
+        while scan['awaiting']:
+            self._queue_write(scan, self._finalize_record(run, scan['awaiting'].popleft(), scan['backup']), emit)
+        if scan['pending']:
+            emit(scan['pending'])
+            scan['pending'] = []
+
+    def _queue_write(self, scan, item, emit):
+        if item is None: return
+        scan['pending'].append(item)
+        if len(scan['pending']) >= self.write_batch_size:
+            batch, scan['pending'] = scan['pending'], []
+            emit(batch)
+
+    @staticmethod
+    def _merge_table_stats(runs):
+        """Cycle totals; per-table stats stay available under 'tables'."""
+        total = {"added": 0, "updated": 0, "skipped": 0, "failed": 0, "att_errors": 0,
+                 "batches": 0, "batch_ms_total": 0.0, "batch_ms_max": 0.0, "table_errors": 0}
+        for run in runs:
+            s = run['stats']
+            for key in ("added", "updated", "skipped", "failed", "att_errors", "batches", "batch_ms_total"):
+                total[key] += s.get(key, 0)
+            total['batch_ms_max'] = max(total['batch_ms_max'], s.get('batch_ms_max', 0.0))
+            if s.get('table_error'): total['table_errors'] += 1
+        total['batch_ms_avg'] = round(total['batch_ms_total'] / total['batches'], 1) if total['batches'] else 0.0
+        total['tables'] = {run['table']: run['stats'] for run in runs}
+        return total
+
+    def _publish_backups(self, runs, stats):
+        """Upload each table's backup; status goes to config/bridge_status, changed links to config/system."""
+        links, errors = {}, []
+        for run in runs:
+            if run['stats'].get('table_error'): continue
+            if not self.drive_service:
+                # Not a transient failure: records are synced, the backup waits for Drive (no retry loop of full cycles)
+                run['stats']['backup'] = 'unavailable'
+                continue
+            try:
+                # Skipped when the content matches the last upload; may go out as a delta
+                dl_link, dl_id, published = self.backup_publisher.publish(
+                    run['table'], run['json_path'], f"latest_data_{run['year']}.json",
+                    self._upload_simple_file, run['changes'])
+                run['stats']['backup'] = published
+                if published != 'skipped':
+                    self.metrics.inc('backup_uploads')
+                    self.metrics.inc('bytes_backup', os.path.getsize(run['json_path']) if published == 'full' else 0)
+                links[run['year']] = (dl_link, dl_id, run['table'])
+            except Exception as e:
+                run['stats']['backup_failed'] = stats['backup_failed'] = True
+                errors.append(f"[{run['table']}] {e}")
+                logging.error(f"Backup Upload Failed [{run['table']}]: {e}")
+        # Links are shared before they are published to config/system
+        self._flush_drive_batch()
+
+        if not self.drive_service:
+            errors.append("Google Drive not initialized")
+            logging.warning("Backup not uploaded: Google Drive not initialized.")
+        if not self.firestore_db: return
+        try:
+            config = self.firestore_db.collection('config')
+            status = {
+                'syncStatus': 'healthy',
+                'lastSyncAt': firestore.SERVER_TIMESTAMP,
+                'lastActive': firestore.SERVER_TIMESTAMP,
+                'lastError': f"Backup Upload Failed: {'; '.join(errors)}" if errors else None
+            }
+            self._fs('write', lambda: config.document(STATUS_DOC).set(status, merge=True))
+            update = {}
+            if links:
+                primary = links.get(int(self.target_year)) or next(iter(links.values()))
+                update['backup_json_url'] = primary[0]
+                update['backup_json_id'] = primary[1]
+                if self.sync_tables is not None:
+                    update['backup_json_urls'] = {str(year): link for year, (link, _, _) in links.items()}
+                if self.backup_publisher.full_interval:
+                    update['backup_delta_url'] = self.backup_publisher.published(primary[2]).get('delta_link')
+            # Backups are updated in place, so the links rarely move
+            if update and update != self._published_links:
+                self._fs('write', lambda: config.document('system').update(update))
+                self._published_links = update
+        except Exception as e:
+            stats['backup_failed'] = True
+            logging.error(f"Backup Upload Failed: {e}")
+
+    def _count_attachment_error(self, stats):
+        # Called from upload workers too
+        with self._stats_lock:
+            stats['att_errors'] = stats.get('att_errors', 0) + 1
+
+    @staticmethod
+    def _uploads_done(attachments):
+        return not any(isinstance(a, Future) and not a.done() for a in attachments)
+
+    def _finalize_record(self, run, rec, backup):
+        """Join a record's uploads and write it to the backup; returns its Firestore write if it changed (else None)."""
+        stats = run['stats']
+        data, cached, cached_atts = rec['data'], rec['cached'], rec['cached_atts']
+        attachments = []
+        for a in rec['attachments']:
+            if isinstance(a, Future):
+                try: a = a.result()
+                except Exception as e:
+                    logging.warning(f"    [ATT] Upload worker failed [Rec {rec['no_urut']}]: {e}")
+                    self._count_attachment_error(stats)
+                    a = None
+            if a: attachments.append(a)
+
+        data['attachments'] = attachments
+        data['attachment_link'] = ", ".join([a.get('driveViewLink', '') for a in attachments])
+
+        # ALWAYS add to JSON backup (Fail-safe)
+        t0 = time.perf_counter()
+        backup.write(data)
+        run['timings']['backup_write'] += time.perf_counter() - t0
+
+        attachments, att_meta = self._split_attachment_meta(attachments)
+        att_meta = att_meta or cached.get('att_meta', {})
+
+        # Smart Sync: Only write if hash changed OR never uploaded OR attachments changed
+        atts_changed = (str(attachments) != str(cached_atts))
+        if cached.get('hash') != rec['hash'] or not cached.get('uploaded') or atts_changed:
+            changes = run['changes']
+            if changes is not None:
+                if len(changes) < self.backup_publisher.max_delta: changes[rec['doc_id']] = data
+                else: run['changes'] = None
+            # Local state is only updated once the record's batch has committed
+            return {
+                'doc_id': rec['doc_id'],
+                'no_urut': rec['no_urut'],
+                'data': data,
+                'action': "updated" if cached.get('uploaded') else "added",
+                'state': {
                     'uploaded': True,
-                    'hash': current_hash,
+                    'hash': rec['hash'],
                     'attachments': attachments,
+                    'att_meta': att_meta,
                     'ts': str(datetime.datetime.now())
                 }
-            else:
-                stats["skipped"] += 1
-            
-            if (stats["added"] + stats["updated"] + stats["skipped"]) % 100 == 0:
-                total = stats["added"] + stats["updated"] + stats["skipped"]
-                logging.info(f"Progress: {total} records scanned...")
+            }
+        stats["skipped"] += 1
+        # Content hashes are local bookkeeping only: record them without a Firestore write
+        if att_meta != cached.get('att_meta', {}):
+            run['state'][rec['doc_id']] = dict(cached, att_meta=att_meta)
+        return None
 
-        self._save_state()
-        logging.info(f"Sync Results: {stats['added']} added, {stats['updated']} updated, {stats['skipped']} skipped (unchanged).")
+    @staticmethod
+    def _split_attachment_meta(attachments):
+        """Strip the private '_md5'/'_sig' keys from attachment links; returns (links, {fileName: {'md5', 'sig'}})."""
+        links, meta = [], {}
+        for a in attachments:
+            if '_md5' in a or '_sig' in a:
+                meta[a['fileName']] = {'md5': a.get('_md5'), 'sig': a.get('_sig')}
+                a = {k: v for k, v in a.items() if not k.startswith('_')}
+            links.append(a)
+        return links, meta
+
+    def _commit_write_batch(self, run, pending):
+        """Commit record writes as one Firestore WriteBatch; only a committed batch updates the table's state."""
+        stats, state = run['stats'], run['state']
+        if not self.firestore_db:
+            with self._stats_lock:
+                for item in pending:
+                    state[item['doc_id']] = item['state']
+                self._advance_last_no_urut(run, pending)
+            self._maybe_checkpoint(run, len(pending))
+            return
 
-        # Backup JSON (Always update as it's a single file write)
-        json_path = os.path.join(os.path.dirname(__file__), 'latest_data.json')
         try:
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(all_records, f, ensure_ascii=False, indent=2)
-            dl_link, dl_id = self._upload_simple_file(json_path, f"latest_data_{self.target_year}.json")
-            
-            if self.firestore_db:
-                self.firestore_db.collection('config').document('system').update({
-                    'backup_json_url': dl_link,
-                    'backup_json_id': dl_id,
-                    'syncStatus': 'healthy',
-                    'lastSyncAt': firestore.SERVER_TIMESTAMP,
-                    'lastActive': firestore.SERVER_TIMESTAMP,
-                    'lastError': None
-                })
+            batch = self.firestore_db.batch()
+            for item in pending:
+                ref = self.firestore_db.collection('surat_masuk').document(item['doc_id'])
+                batch.set(ref, item['data'], merge=True)
+            t0 = time.perf_counter()
+            self._fs('write', batch.commit, cost=len(pending))
+            elapsed_ms = (time.perf_counter() - t0) * 1000
         except Exception as e:
-            logging.error(f"Backup Upload Failed: {e}")
+            first, last = pending[0]['no_urut'], pending[-1]['no_urut']
+            logging.warning(f"Firestore Batch Failed [Rec {first}..{last}, {len(pending)} ops]: {e}")
+            # State untouched: these records are retried next cycle
+            with self._stats_lock: stats["failed"] += len(pending)
+            return
 
-        if conn: conn.close()
-        if dao_db: dao_db.Close()
+        with self._stats_lock:
+            run['timings']['firestore_write'] += elapsed_ms / 1000
+            stats["batches"] += 1
+            stats["batch_ms_total"] += elapsed_ms
+            stats["batch_ms_max"] = max(stats["batch_ms_max"], elapsed_ms)
+            for item in pending:
+                stats[item['action']] += 1
+                state[item['doc_id']] = item['state']
+            self._advance_last_no_urut(run, pending)
+        logging.info(f"  [FS] Batch committed: {len(pending)} records in {elapsed_ms:.0f}ms")
+        self._maybe_checkpoint(run, len(pending))
 
-    def _extract_attachments(self, dao_db, no_urut, cached_attachments=None):
-        results = []
-        if cached_attachments is None: cached_attachments = []
-        cached_map = {a.get('fileName'): a for a in cached_attachments if isinstance(a, dict) and a.get('fileName')}
+    @staticmethod
+    def _advance_last_no_urut(run, pending):
+        """Raise the table's last committed NO URUT to the highest one in a committed batch (under _stats_lock).
+
+        Write workers commit batches out of order, so the highest is kept, not the latest.
+        """
+        def order(value):
+            try: return (0, float(value), '')
+            except (TypeError, ValueError): return (1, 0.0, str(value))
+        top = max((item['no_urut'] for item in pending), key=order)
+        if run['last_no_urut'] is None or order(top) > order(run['last_no_urut']):
+            run['last_no_urut'] = top
+
+    def _maybe_checkpoint(self, run, written):
+        """Make committed records durable every checkpoint_records records or checkpoint_seconds seconds."""
+        with self._stats_lock:
+            run['unsaved'] += written
+            due = run['unsaved'] >= self.checkpoint_records or time.time() - run['checkpoint_at'] >= self.checkpoint_seconds
+            if due: run['unsaved'], run['checkpoint_at'] = 0, time.time()
+        if due: self._checkpoint(run)
+
+    def _checkpoint(self, run):
+        """Commit the table's state and record how far it got: last committed NO URUT and Drive files created."""
+        state = run['state']
+        run['unsaved'], run['checkpoint_at'] = 0, time.time()
+        if not isinstance(state, StatePartition): return
+        with self._stats_lock:
+            uploads = {fid: dict(u) for fid, u in run['uploads'].items()}
+            last_no_urut = run['last_no_urut']
         try:
-            # Smart Data Type Handler: Try numeric query first, if schema uses Text fallback to string query
+            state.checkpoint({'started': run['started'], 'last_no_urut': last_no_urut, 'uploads': uploads})
+        except Exception as e:
+            logging.warning(f"Checkpoint failed [{run['table']}]: {e}")
+
+    def _resume_table(self, run):
+        """Pick up after a cycle that died inside this table: reuse the Drive files it created and re-send their grants."""
+        state = run['state']
+        progress = state.interrupted() if isinstance(state, StatePartition) else None
+        if progress:
+            uploads = progress.get('uploads', {})
+            logging.info(f"Resuming interrupted sync of [{run['table']}]: last committed NO URUT {progress.get('last_no_urut')}, "
+                         f"{len(uploads)} Drive files to reuse")
+            index_ready = self.drive_index.is_ready(self.drive_folder_id)
+            for fid, u in uploads.items():
+                name = u.get('name')
+                if index_ready and name and (self.drive_index.lookup(name) or {}).get('id') != fid:
+                    continue  # deleted from Drive since
+                run['uploads'][fid] = dict(u)
+                if u.get('md5'):
+                    done = Future()
+                    done.set_result({'driveFileId': fid})
+                    with self._content_lock: self._content_uploads.setdefault(u['md5'], done)
+                if not u.get('shared'):
+                    self._share_public(fid, name or fid, on_shared=lambda fid=fid: self._note_upload(run, fid, shared=True))
+        # The marker exists from the start, so uploads made before the first checkpoint are recorded too
+        self._checkpoint(run)
+
+    def _note_upload(self, run, fid, **info):
+        # Called from upload workers and batch callbacks
+        with self._stats_lock:
+            run['uploads'].setdefault(fid, {}).update(info)
+
+    @staticmethod
+    def _attachment_key(value):
+        """Normalize a NO URUT value so ODBC and DAO reads of the same row compare equal."""
+        if isinstance(value, float) and value.is_integer(): value = int(value)
+        return str(value).strip()
+
+    def _build_attachment_index(self, dao_db, run):
+        """Scan [NO URUT], [LAMPIRAN SURAT] once and map each record to its attachment metadata.
+
+        Only FileName and the FileData size are read here; blobs are left untouched
+        until a row actually has a file that is not in the local state. With the
+        native reader, each entry also carries the file handle ('file') to save from.
+        """
+        index = {}
+        if run.get('reader'):
+            files_by_key = run['reader'].attachments(run['table'], 'LAMPIRAN SURAT', 'NO URUT')
+            for key, files in files_by_key.items():
+                index[self._attachment_key(key)] = [{'fileName': f.file_name, 'size': f.size, 'stamp': f.timestamp, 'file': f}
+                                                    for f in files]
+        else:
+            query = f"SELECT [NO URUT], [LAMPIRAN SURAT] FROM [{run['table']}]"
+            rs = dao_db.OpenRecordset(query, DAO_OPEN_FORWARD_ONLY)
+            try:
+                # Key column type decides how targeted lookups are quoted (once per table, not per row)
+                run['att_key_is_text'] = rs.Fields("NO URUT").Type in DAO_TEXT_TYPES
+                while not rs.EOF:
+                    key = self._attachment_key(rs.Fields("NO URUT").Value)
+                    child_rs = rs.Fields("LAMPIRAN SURAT").Value
+                    files = []
+                    while not child_rs.EOF:
+                        try: size = child_rs.Fields("FileData").FieldSize
+                        except Exception: size = None
+                        files.append({'fileName': child_rs.Fields("FileName").Value, 'size': size,
+                                      'stamp': self._attachment_stamp(child_rs)})
+                        child_rs.MoveNext()
+                    child_rs.Close()
+                    if files: index[key] = files
+                    rs.MoveNext()
+            finally:
+                rs.Close()
+        logging.info(f"  [ATT] Attachment index [{run['table']}]: {sum(len(v) for v in index.values())} files across {len(index)} records")
+        return index
+
+    def _open_attachment_recordset(self, dao_db, no_urut, run):
+        """Open the [LAMPIRAN SURAT] recordset of a single record."""
+        table, key_is_text = run['table'], run.get('att_key_is_text')
+        if key_is_text is None:
+            # Key type unknown (no index scan): try numeric first, fall back to a quoted string
             try:
-                query = f"SELECT [LAMPIRAN SURAT] FROM [{self.target_table}] WHERE [NO URUT] = {no_urut}"
-                rs = dao_db.OpenRecordset(query)
+                return dao_db.OpenRecordset(f"SELECT [LAMPIRAN SURAT] FROM [{table}] WHERE [NO URUT] = {no_urut}")
             except:
-                # If numeric query throws type mismatch, use String quotes
-                query = f"SELECT [LAMPIRAN SURAT] FROM [{self.target_table}] WHERE [NO URUT] = '{no_urut}'"
-                rs = dao_db.OpenRecordset(query)
+                return dao_db.OpenRecordset(f"SELECT [LAMPIRAN SURAT] FROM [{table}] WHERE [NO URUT] = '{no_urut}'")
+        if key_is_text:
+            escaped = str(no_urut).replace("'", "''")
+            return dao_db.OpenRecordset(f"SELECT [LAMPIRAN SURAT] FROM [{table}] WHERE [NO URUT] = '{escaped}'")
+        return dao_db.OpenRecordset(f"SELECT [LAMPIRAN SURAT] FROM [{table}] WHERE [NO URUT] = {no_urut}")
 
+    def _attachment_files(self, dao_db, no_urut, indexed_files, run):
+        """Yield (fileName, signature, stored size, read(), save_to(path)) per attachment, from the native index or DAO.
+
+        read() returns the file bytes; it must be called before the next item
+        (the DAO field moves with the recordset).
+        """
+        if run.get('reader'):
+            for f in indexed_files or []:
+                yield f['fileName'], self._attachment_sig(f), f['size'], f['file'].data, f['file'].save
+            return
+        rs = self._open_attachment_recordset(dao_db, no_urut, run)
+        try:
             if not rs.EOF:
                 child_rs = rs.Fields("LAMPIRAN SURAT").Value
                 while not child_rs.EOF:
-                    fname = child_rs.Fields("FileName").Value
-                    smart_name = f"{self.target_year}_{no_urut}_{fname}"
-                    
-                    if fname in cached_map:
-                        # Skip drive upload/check entirely if we already uploaded it before
-                        results.append(cached_map[fname])
-                    else:
-                        # Check Cache/Existing
-                        existing = self._check_drive_file(smart_name)
-                        if existing:
-                            logging.info(f"    [ATT] Found cached & existing drive file: {fname}")
-                            results.append({
-                                'fileName': fname,
-                                'driveViewLink': f"https://drive.google.com/file/d/{existing['id']}/view?usp=sharing",
-                                'driveFileId': existing['id']
-                            })
-                        else:
-                            logging.info(f"    [ATT] Extracting and Uploading: {fname}...")
-                            self.log_event(f"Uploading Attachment: {fname} for Doc#{no_urut}", "info")
-                            
-                            temp_dir = os.path.join(os.path.dirname(__file__), 'temp_att')
-                            if not os.path.exists(temp_dir): os.makedirs(temp_dir)
-                            path = os.path.join(temp_dir, smart_name)
-                            
-                            if os.path.exists(path):
-                                try: os.remove(path)
-                                except: pass
-                                
-                            child_rs.Fields("FileData").SaveToFile(path)
-                        
-                        if os.path.exists(path):
-                            res = self._upload_to_drive(path, smart_name)
-                            if res:
-                                logging.info(f"    [ATT] Upload Success [{fname}] -> Drive ID: {res['id']}")
-                                self.log_event(f"Success: {fname} uploaded", "success")
-                                results.append({
-                                    'fileName': fname,
-                                    'driveViewLink': res['link'],
-                                    'driveFileId': res['id']
-                                })
-                            else:
-                                logging.warning(f"    [ATT] Upload Failed for: {fname}")
-                                self.log_event(f"Failed to upload: {fname}", "error")
-                                
-                            try: os.remove(path)
-                            except: pass
+                    field = child_rs.Fields("FileData")
+                    try: size = field.FieldSize
+                    except Exception: size = None
+                    sig = self._attachment_sig({'size': size, 'stamp': self._attachment_stamp(child_rs)})
+                    yield child_rs.Fields("FileName").Value, sig, size, lambda: decode_file_data(field.Value), field.SaveToFile
                     child_rs.MoveNext()
+        finally:
             rs.Close()
+
+    @staticmethod
+    def _attachment_stamp(child_rs):
+        try: return child_rs.Fields("FileTimeStamp").Value
+        except Exception: return None
+
+    @staticmethod
+    def _attachment_sig(entry):
+        """Cheap change signature (stored size + FileTimeStamp): the blob is only hashed when this moves."""
+        if entry.get('size') is None and entry.get('stamp') is None: return None
+        return f"{entry.get('size')}:{entry.get('stamp')}"
+
+    def _extract_attachments(self, dao_db, no_urut, cached_attachments=None, indexed_files=None, upload_pool=None, run=None,
+                             cached_meta=None):
+        """Resolve a record's attachments to Drive links: cached, found by md5, or uploaded (pool uploads as Futures)."""
+        if run is None: run = self._new_table_run(self.target_table, False)
+        results = []
+        if cached_attachments is None: cached_attachments = []
+        if cached_meta is None: cached_meta = {}
+        cached_map = {a.get('fileName'): a for a in cached_attachments if isinstance(a, dict) and a.get('fileName')}
+
+        if indexed_files is not None:
+            for f in indexed_files:
+                hit = self._cached_attachment(cached_map, cached_meta, f['fileName'], self._attachment_sig(f), run, no_urut)
+                if not hit: break
+                results.append(hit)
+            else:
+                return results
+            results = []
+
+        try:
+            for fname, sig, size, read, save_to in self._attachment_files(dao_db, no_urut, indexed_files, run):
+                smart_name = f"{run['year']}_{no_urut}_{fname}"
+
+                hit = self._cached_attachment(cached_map, cached_meta, fname, sig, run, no_urut)
+                if hit:
+                    # Skip drive upload/check entirely if we already uploaded it before
+                    results.append(hit)
+                    continue
+
+                # Small blobs stay in memory; only large ones touch the disk. size is the stored
+                # (maybe deflated) size, so a blob that decodes past the limit is spilled too
+                source = None
+                if size is not None and size <= self.attachment_memory_max:
+                    try: source = read()
+                    except Exception as e:
+                        logging.warning(f"    [ATT] In-memory read failed, using a temp file [{fname}]: {e}")
+                if source is None or len(source) > self.attachment_memory_max:
+                    temp_dir = os.path.join(self.data_dir, 'temp_att')
+                    if not os.path.exists(temp_dir): os.makedirs(temp_dir)
+                    path = os.path.join(temp_dir, smart_name)
+
+                    if os.path.exists(path):
+                        try: os.remove(path)
+                        except: pass
+
+                    if source is None: save_to(path)
+                    else:
+                        with open(path, 'wb') as f: f.write(source)
+                    if not os.path.exists(path): continue
+                    source = path
+                md5 = self._content_md5(source)
+                meta = {'_md5': md5, '_sig': sig}
+
+                # Same name, same bytes (e.g. only the timestamp moved): keep the link
+                cached = cached_map.get(fname)
+                if cached and cached_meta.get(fname, {}).get('md5') == md5:
+                    self._discard_source(source)
+                    results.append(dict(cached, **meta))
+                    continue
+
+                existing = self._find_drive_content(md5, smart_name)
+                if existing is not None:
+                    logging.info(f"    [ATT] Same content already in Drive, linked: {fname}")
+                    self._discard_source(source)
+                    self.metrics.inc('attachments_deduped')
+                    results.append(self._relabel_attachment(existing, fname, meta))
+                    continue
+
+                if cached: logging.info(f"    [ATT] Content changed, uploading new version: {fname}")
+                else: logging.info(f"    [ATT] Extracting and Uploading: {fname}...")
+                self.log_event(f"Uploading Attachment: {fname} for Doc#{no_urut}", "info")
+                if upload_pool:
+                    with self._content_lock:
+                        # Another record may have queued the same content since the lookup above
+                        pending = self._content_uploads.get(md5)
+                        claimed = not self._upload_alive(pending)
+                        # Claim the content with a placeholder; submit (it blocks while the pool is full) outside the lock
+                        if claimed: pending = self._content_uploads[md5] = Future()
+                    if claimed:
+                        try: upload = upload_pool.submit(self._upload_attachment, source, smart_name, fname, run, meta)
+                        except Exception as e:
+                            pending.set_exception(e)
+                            raise
+                        upload.add_done_callback(lambda f, placeholder=pending: self._forward_result(f, placeholder))
+                        results.append(pending)
+                        continue
+                    self._discard_source(source)
+                    self.metrics.inc('attachments_deduped')
+                    results.append(self._relabel_attachment(pending, fname, meta))
+                else:
+                    res = self._upload_attachment(None, source, smart_name, fname, run, meta)
+                    if res: results.append(res)
         except Exception as e: 
+            self._count_attachment_error(run['stats'])
             logging.error(f"  [ATT ERROR - ExTrack] No Urut {no_urut}: {e}")
             self.log_event(f"Attachment extraction failed for {no_urut}: {e}", "error")
         return results
 
+    def _cached_attachment(self, cached_map, cached_meta, fname, sig, run, no_urut):
+        """The cached link for fname if its signature is unchanged (None = re-check the content).
+
+        Entries from before content hashing are trusted once and get their md5
+        from the Drive index, so they are not all re-read on the first cycle.
+        """
+        cached = cached_map.get(fname)
+        if not cached: return None
+        meta = cached_meta.get(fname)
+        if meta is None:
+            entry = self.drive_index.lookup(f"{run['year']}_{no_urut}_{fname}")
+            md5 = entry.get('md5Checksum') if entry and entry.get('id') == cached.get('driveFileId') else None
+            return dict(cached, _md5=md5, _sig=sig)
+        if meta.get('sig') != sig: return None
+        return dict(cached, _md5=meta.get('md5'), _sig=sig)
+
+    @staticmethod
+    def _content_md5(source):
+        if isinstance(source, (bytes, bytearray)): return hashlib.md5(source).hexdigest()
+        h = hashlib.md5()
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    @staticmethod
+    def _discard_source(source):
+        if isinstance(source, str):
+            try: os.remove(source)
+            except OSError: pass
+
+    @staticmethod
+    def _relabel_attachment(existing, fname, meta):
+        """Link for fname pointing at another file's Drive copy: a Drive file, a link dict or a pending upload."""
+        if isinstance(existing, Future):
+            out = Future()
+
+            def done(f):
+                try: res = f.result()
+                except Exception as e:
+                    out.set_exception(e)
+                    return
+                out.set_result(dict(res, fileName=fname, **meta) if res else None)
+            existing.add_done_callback(done)
+            return out
+        fid = existing.get('driveFileId') or existing['id']
+        return {
+            'fileName': fname,
+            'driveViewLink': f"https://drive.google.com/file/d/{fid}/view?usp=sharing",
+            'driveFileId': fid,
+            **meta
+        }
+
+    @staticmethod
+    def _forward_result(done, target):
+        """Settle target with the result or exception of the finished Future done."""
+        try: res = done.result()
+        except Exception as e:
+            target.set_exception(e)
+            return
+        target.set_result(res)
+
+    @staticmethod
+    def _upload_alive(pending):
+        """A queued upload that is still running or succeeded (failed ones are retried by the next duplicate)."""
+        return pending is not None and not (pending.done() and (pending.exception() or not pending.result()))
+
+    def _find_drive_content(self, md5, smart_name):
+        """A Drive file (or an upload queued this cycle) with this content, else None."""
+        with self._content_lock:
+            pending = self._content_uploads.get(md5)
+        if self._upload_alive(pending):
+            return pending.result() if pending.done() else pending
+        if not self.drive_service: return None
+        if self.drive_index.is_ready(self.drive_folder_id):
+            return self.drive_index.lookup_content(md5)
+        try:
+            # md5Checksum is not searchable; uploads carry it as appProperties.contentMd5
+            q = f"appProperties has {{ key='contentMd5' and value='{md5}' }} and trashed = false"
+            if self.drive_folder_id: q += f" and '{self.drive_folder_id}' in parents"
+            files = self._drive(self._drive_client().files().list(q=q, fields="files(id)", pageSize=1)).get('files', [])
+            if files: return files[0]
+        except Exception: pass
+        # Uploaded before content hashing: same name and same bytes
+        existing = self._check_drive_file(smart_name)
+        return existing if existing and existing.get('md5Checksum') == md5 else None
+
+    def _upload_attachment(self, service, source, smart_name, fname, run, meta=None):
+        """Upload one extracted attachment (bytes, or a temp file path that is removed afterwards). Runs on upload workers."""
+        in_memory = isinstance(source, (bytes, bytearray))
+        meta = meta or {}
+        try:
+            t0 = time.perf_counter()
+            app_properties = {'contentMd5': meta['_md5']} if meta.get('_md5') else None
+            res = self._upload_to_drive(source, smart_name, service, app_properties,
+                                        on_shared=lambda fid: self._note_upload(run, fid, shared=True))
+            self.metrics.add_time('drive_upload', time.perf_counter() - t0)
+            if res:
+                self.metrics.inc('attachments_uploaded')
+                try: self.metrics.inc('bytes_uploaded', len(source) if in_memory else os.path.getsize(source))
+                except OSError: pass
+                self._note_upload(run, res['id'], name=smart_name, md5=meta.get('_md5'))
+                logging.info(f"    [ATT] Upload Success [{fname}] -> Drive ID: {res['id']}")
+                self.log_event(f"Success: {fname} uploaded", "success")
+                return {
+                    'fileName': fname,
+                    'driveViewLink': res['link'],
+                    'driveFileId': res['id'],
+                    **meta
+                }
+            logging.warning(f"    [ATT] Upload Failed for: {fname}")
+            self.log_event(f"Failed to upload: {fname}", "error")
+            self._count_attachment_error(run['stats'])
+            return None
+        finally:
+            if not in_memory:
+                try: os.remove(source)
+                except: pass
+
+    def _get_upload_pool(self):
+        """Lazily start the shared Drive upload pool (None = upload serially)."""
+        if self.upload_pool is None and self.upload_workers > 0 and self.drive_service and self._drive_creds:
+            self.upload_pool = DriveUploadPool(self._build_drive_service, workers=self.upload_workers)
+        return self.upload_pool
+
+    def _build_drive_service(self):
+        """Separate Drive client for a worker thread (see DriveUploadPool)."""
+        return build('drive', 'v3', credentials=self._drive_creds, cache_discovery=False)
+
+    def _drive_client(self):
+        """The calling thread's own Drive client (table, stage and tray threads); the shared one without credentials."""
+        if not self._drive_creds: return self.drive_service
+        service = getattr(self._drive_local, 'service', None)
+        if service is None: service = self._drive_local.service = self._build_drive_service()
+        return service
+
+    def _fs(self, kind, fn, cost=1, essential=True, **kwargs):
+        """Run a Firestore call through the request governor."""
+        return self.governor.call('firestore', kind, fn, cost=cost, essential=essential, **kwargs)
+
+    def _drive(self, request, kind='read', essential=True):
+        """Execute a Drive API request through the request governor."""
+        return self.governor.call('drive', kind, request.execute, essential=essential)
+
+    def _refresh_drive_index(self):
+        """Sync the local Drive folder index; returns False if lookups must fall back to queries."""
+        if not self.drive_service or not self.drive_folder_id: return False
+        try:
+            self.drive_index.refresh(self._drive_client(), self.drive_folder_id, execute=self._drive)
+            return True
+        except Exception as e:
+            logging.warning(f"  [DRIVE] Folder index refresh failed: {e}")
+            return False
+
     def _check_drive_file(self, name):
         if not self.drive_service: return None
+        if self.drive_index.is_ready(self.drive_folder_id):
+            return self.drive_index.lookup(name)
         try:
             q = f"name = '{name}' and trashed = false"
             if self.drive_folder_id: q += f" and '{self.drive_folder_id}' in parents"
-            res = self.drive_service.files().list(q=q, fields="files(id)").execute()
+            res = self._drive(self._drive_client().files().list(q=q, fields="files(id, md5Checksum)"))
             files = res.get('files', [])
             return files[0] if files else None
         except: return None
 
-    def _upload_to_drive(self, path, name):
-        if not self.drive_service: return None
+    def _media_body(self, source, name, mimetype=None):
+        """Upload body for bytes or a file path: one multipart request when small, resumable chunks when large."""
+        mimetype = mimetype or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if isinstance(source, (bytes, bytearray)):
+            return MediaIoBaseUpload(io.BytesIO(source), mimetype=mimetype, chunksize=self.upload_chunk_size,
+                                     resumable=len(source) > self.multipart_max)
+        return MediaFileUpload(source, mimetype=mimetype, chunksize=self.upload_chunk_size,
+                               resumable=os.path.getsize(source) > self.multipart_max)
+
+    def _upload_to_drive(self, source, name, service=None, app_properties=None, on_shared=None):
+        service = service or self._drive_client()
+        if not service: return None
         try:
             meta = {'name': name}
             if self.drive_folder_id: meta['parents'] = [self.drive_folder_id]
-            media = MediaFileUpload(path, resumable=True)
-            f = self.drive_service.files().create(body=meta, media_body=media, fields='id').execute()
+            if app_properties: meta['appProperties'] = app_properties
+            media = self._media_body(source, name)
+            f = self._drive(service.files().create(body=meta, media_body=media, fields='id, size, md5Checksum'), 'write')
             fid = f.get('id')
-            self.drive_service.permissions().create(fileId=fid, body={'type': 'anyone', 'role': 'reader'}).execute()
+            self.drive_index.add(name, fid, f.get('size'), f.get('md5Checksum'))
+            self._share_public(fid, name, service, on_shared and (lambda: on_shared(fid)))
             return {'id': fid, 'link': f"https://drive.google.com/file/d/{fid}/view?usp=sharing"}
         except Exception as e: 
             logging.error(f"    [DRIVE UPLOAD ERROR] {e}")
@@ -530,35 +1541,39 @@ class BridgeLogic:
         if not self.drive_service: return None, None
         try:
             # HARDCODE FIX: Force use of specific ID from ENV to keep link stable & secure
-            # This ID must be set in .env as GOOGLE_BACKUP_FILE_ID
+            # This ID must be set in .env as GOOGLE_BACKUP_FILE_ID (target year's full snapshot only)
             target_id = os.environ.get('GOOGLE_BACKUP_FILE_ID')
             
             existing = None
-            if "latest_data" in name and target_id:
+            if name == f"latest_data_{self.target_year}.json" and target_id:
                 existing = {'id': target_id} 
             else:
                 existing = self._check_drive_file(name)
 
-            media = MediaFileUpload(path, resumable=True)
+            mimetype = 'application/gzip' if name.endswith('.gz') else ('application/x-ndjson' if name.endswith('.ndjson') else None)
+            media = self._media_body(path, name, mimetype)
             if existing:
                 try:
-                    self.drive_service.files().update(fileId=existing['id'], media_body=media).execute()
+                    self._drive(self._drive_client().files().update(fileId=existing['id'], media_body=media), 'write')
                     fid = existing['id']
                 except Exception as update_err:
                     logging.warning(f"Update failed for hardcoded ID, falling back to create: {update_err}")
                     # Fallback if update fails (e.g. permission lost)
                     meta = {'name': name}
                     if self.drive_folder_id: meta['parents'] = [self.drive_folder_id]
-                    f = self.drive_service.files().create(body=meta, media_body=media, fields='id').execute()
+                    f = self._drive(self._drive_client().files().create(body=meta, media_body=media, fields='id'), 'write')
                     fid = f.get('id')
+                    self.drive_index.add(name, fid)
             else:
                 meta = {'name': name}
                 if self.drive_folder_id: meta['parents'] = [self.drive_folder_id]
-                f = self.drive_service.files().create(body=meta, media_body=media, fields='id').execute()
+                f = self._drive(self._drive_client().files().create(body=meta, media_body=media, fields='id'), 'write')
                 fid = f.get('id')
+                self.drive_index.add(name, fid)
             
-            try: self.drive_service.permissions().create(fileId=fid, body={'type': 'anyone', 'role': 'reader'}).execute()
-            except: pass
+            # Public link only needs to be granted once per file
+            if fid not in self.backup_publisher.shared_ids:
+                self._share_public(fid, name, on_shared=lambda: self.backup_publisher.mark_shared(fid))
             
             logging.info(f"Backup JSON uploaded. ID: {fid}")
             return f"https://drive.google.com/uc?export=download&id={fid}", fid
@@ -568,17 +1583,40 @@ class BridgeLogic:
 
     def check_for_signal_file(self):
         if not self.drive_service: return None
+        if self._refresh_drive_index():
+            hit = self.drive_index.lookup('sync_signal.txt')
+            return hit['id'] if hit else None
         try:
             q = "name = 'sync_signal.txt' and trashed = false"
             if self.drive_folder_id: q += f" and '{self.drive_folder_id}' in parents"
-            res = self.drive_service.files().list(q=q, fields="files(id)").execute()
+            res = self._drive(self._drive_client().files().list(q=q, fields="files(id)"), essential=False)
             files = res.get('files', [])
             return files[0]['id'] if files else None
         except: return None
 
     def delete_drive_file(self, fid):
-        try: self.drive_service.files().delete(fileId=fid).execute()
-        except: pass
+        if not self.drive_service: return
+
+        def deleted(response, exc):
+            if exc is None: self.drive_index.remove(fid)
+        # Rides along with any permission grants still queued
+        self.drive_batch.add(lambda svc: svc.files().delete(fileId=fid), deleted)
+        self._flush_drive_batch()
+
+    def _share_public(self, fid, name, service=None, on_shared=None):
+        """Queue the anyone-with-link reader grant for fid; it goes out with the next Drive batch."""
+        def granted(response, exc):
+            if exc is not None:
+                logging.warning(f"    [DRIVE] Public link grant failed [{name}]: {exc}")
+                self.log_event(f"Failed to share: {name}", "error")
+            elif on_shared: on_shared()
+        self.drive_batch.add(lambda svc: svc.permissions().create(fileId=fid, body={'type': 'anyone', 'role': 'reader'}),
+                             granted, service)
+
+    def _flush_drive_batch(self):
+        if not self.drive_service or not len(self.drive_batch): return
+        try: self.drive_batch.flush(self._drive_client())
+        except Exception as e: logging.warning(f"  [DRIVE] Batch flush failed: {e}")
 
 if __name__ == '__main__':
     # Test Run
@@ -8,17 +8,16 @@ import datetime
 from PIL import Image, ImageDraw
 
 # --- PRE-INIT LOGGING ---
-log_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bridge.log')
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] (TRAY) %(message)s",
-    handlers=[logging.FileHandler(log_file, encoding='utf-8'), logging.StreamHandler(sys.stdout)]
-)
+from env_files import load_env
+from log_setup import configure_logging, stop_logging, log_file
+load_env()
+log_ring = configure_logging(tag='TRAY')
 
 # --- DEPENDENCIES CHECK ---
 try:
     import pystray
     from bridge_logic import BridgeLogic
+    from sync_scheduler import SyncScheduler, tooltip_text, PRIORITY_PERIODIC, PRIORITY_SIGNAL, PRIORITY_MANUAL
 except ImportError as e:
     logging.critical(f"Missing Dependencies: {e}")
     sys.exit(1)
@@ -38,6 +37,10 @@ class BridgeTrayApp:
         self.running = True
         self.icon = None
         self.last_sync = "Never"
+        self.sync_counter_reset = False
+        self.log_window = None
+        # One worker runs every sync; overlapping triggers coalesce into one follow-up run
+        self.scheduler = SyncScheduler(self.safe_sync, on_change=self.refresh_tooltip)
         logging.info(f"Tray Process Started. PID: {os.getpid()}")
 
     def _create_icon_image(self, status='ok'):
@@ -45,7 +48,7 @@ class BridgeTrayApp:
         image = Image.new('RGB', (width, height), (255, 255, 255))
         dc = ImageDraw.Draw(image)
         # Gradient background
-        color = (0, 102, 204) if status == 'ok' else (255, 102, 0)
+        color = {'ok': (0, 102, 204), 'starting': (128, 128, 128)}.get(status, (255, 102, 0))
         dc.rectangle([0, 0, 64, 64], fill=color)
         # Mail Symbol
         dc.polygon([(10, 20), (54, 20), (32, 40)], fill=(255, 255, 255))
@@ -56,13 +59,21 @@ class BridgeTrayApp:
         """Heartbeat and Signal Listener Loop."""
         logging.info("Bridge loop thread started.")
         
+        # 0. Services are built in the background: leave the "starting" icon up until they are
+        if self.bridge:
+            t0 = time.perf_counter()
+            self.bridge.wait_ready()
+            logging.info(f"Bridge services ready after {time.perf_counter() - t0:.1f}s.")
+            self.set_status('ok')
+
         # 1. Immediate Config Sync (BLOCKING) - crucial to get DB path first
         if self.bridge:
             logging.info("Fetching initial configuration...")
             self.bridge.sync_config()
+            self.bridge.start_metrics_server()
 
         # 2. Start Initial Sync (Background)
-        threading.Thread(target=self.safe_sync, daemon=True).start()
+        self.scheduler.request("startup", PRIORITY_PERIODIC)
 
         sync_counter = 0
 
@@ -72,33 +83,45 @@ class BridgeTrayApp:
                     try: 
                         self.bridge = BridgeLogic()
                         logging.info("Bridge logic re-initialized.")
+                        self.set_status('ok')
                     except: 
                         time.sleep(30)
                         continue
 
-                # 1. Sync Config from Firestore (Remote control)
-                # (Already done at startup, but keep doing it periodically or only if needed)
-                if sync_counter % 5 == 0: # Sync config every 5 loops (~5 mins) to save reads
+                # 1. Push listener (web "Sync now" + config edits); (re)started whenever it is down
+                listening = self.bridge.trigger_listener_alive()
+                if not listening:
+                    listening = self.bridge.start_trigger_listener(self.on_remote_trigger)
+
+                # Fallback polling only while the listener is unavailable
+                if not listening and sync_counter % 5 == 0: # Sync config every 5 loops (~5 mins) to save reads
                     self.bridge.sync_config()
 
                 # 2. Heartbeat (Status report)
                 self.bridge.update_bridge_status("healthy")
                 
-                # 3. Check Signal (Triggered from Web)
-                sig_id = self.bridge.check_for_signal_file()
+                # 3. Check Signal (Triggered from Web) - Drive fallback when not listening
+                sig_id = None if listening else self.bridge.check_for_signal_file()
                 if sig_id:
                     logging.info(f"Sync Signal Received: {sig_id}")
                     self.bridge.delete_drive_file(sig_id)
-                    threading.Thread(target=self.safe_sync, daemon=True).start()
+                    self.scheduler.request("drive signal", PRIORITY_SIGNAL, force=True)
                     sync_counter = 0 # Reset counter if signaled
 
+                # Remote triggers reset the periodic countdown too
+                if self.sync_counter_reset:
+                    self.sync_counter_reset = False
+                    sync_counter = 0
+
                 # 4. Periodic Sync (Every 10 minutes / 10 cycles)
                 sync_counter += 1
                 if sync_counter >= 10:
                     logging.info("Periodic sync triggered (10m interval).")
-                    threading.Thread(target=self.safe_sync, daemon=True).start()
+                    self.scheduler.request("periodic", PRIORITY_PERIODIC)
                     sync_counter = 0
 
+                self.refresh_tooltip()
+
                 # Sleep 60s but check running flag
                 for _ in range(60):
                     if not self.running: break
@@ -107,45 +130,103 @@ class BridgeTrayApp:
                 logging.error(f"Loop Error: {e}")
                 time.sleep(10)
 
-    def safe_sync(self):
+    def safe_sync(self, force=False):
+        """Runs on the scheduler's worker thread only."""
         try:
             if self.bridge:
-                self.bridge.perform_sync()
+                self.bridge.perform_sync(force=force)
                 self.last_sync = datetime.datetime.now().strftime("%H:%M:%S")
-                if self.icon:
-                    self.icon.title = f"MailTrackerPro (Last Sync: {self.last_sync})"
         except Exception as e:
             logging.error(f"Sync Thread Error: {e}")
 
+    def set_status(self, status):
+        if self.icon: self.icon.icon = self._create_icon_image(status)
+
+    def refresh_tooltip(self):
+        if not self.icon: return
+        phases = self.bridge.metrics.summary() if self.bridge else ""
+        self.icon.title = tooltip_text(self.scheduler.summary(), self.last_sync, phases)
+
+    def on_remote_trigger(self):
+        """Called from the Firestore listener thread when the web UI requests a sync."""
+        logging.info("Remote sync trigger received.")
+        self.sync_counter_reset = True
+        self.scheduler.request("web trigger", PRIORITY_MANUAL, force=True)
+
     def on_sync_now(self, icon, item):
         logging.info("Manual sync triggered from tray.")
-        threading.Thread(target=self.safe_sync, daemon=True).start()
-        icon.notify("Sync process started in background.", "MailTrackerPro")
+        busy = self.scheduler.queue_depth() > 0
+        self.scheduler.request("tray", PRIORITY_MANUAL, force=True)
+        icon.notify("Sync queued after the running cycle." if busy else "Sync process started in background.", "MailTrackerPro")
 
     def on_view_logs(self, icon, item):
-        if os.path.exists(log_file):
-            os.system(f'start powershell -NoExit -Command "Get-Content \'{log_file}\' -Wait -Tail 50"')
-        else:
-            icon.notify("Log file not found.", "MailTrackerPro")
+        if self.log_window and self.log_window.is_alive(): return
+        self.log_window = threading.Thread(target=self._run_log_window, args=(icon,), name='LogWindow', daemon=True)
+        self.log_window.start()
+
+    def _run_log_window(self, icon):
+        """Live view of the in-memory log tail (no file re-reads); PowerShell tail if Tk is unavailable."""
+        try:
+            import tkinter as tk
+            from tkinter.scrolledtext import ScrolledText
+        except ImportError:
+            if os.path.exists(log_file()):
+                os.system(f'start powershell -NoExit -Command "Get-Content \'{log_file()}\' -Wait -Tail 50"')
+            else:
+                icon.notify("Log file not found.", "MailTrackerPro")
+            return
+
+        root = tk.Tk()
+        root.title("MailTrackerPro Bridge - Live Logs")
+        text = ScrolledText(root, width=140, height=40, font=('Consolas', 9), state='disabled')
+        text.pack(fill='both', expand=True)
+        seen = 0
+
+        def poll():
+            nonlocal seen
+            seen, lines = log_ring.since(seen)
+            if lines:
+                follow = text.yview()[1] >= 0.999
+                text.configure(state='normal')
+                text.insert('end', "\n".join(lines) + "\n")
+                # Bounded like the buffer itself
+                excess = int(text.index('end-1c').split('.')[0]) - log_ring.lines.maxlen
+                if excess > 0: text.delete('1.0', f"{excess + 1}.0")
+                text.configure(state='disabled')
+                if follow: text.see('end')
+            root.after(1000, poll)
+
+        poll()
+        root.mainloop()
 
     def on_quit(self, icon, item):
         logging.info("Shutting down...")
         self.running = False
+        self.scheduler.stop()
         if self.bridge:
-            try: self.bridge.update_bridge_status("offline")
+            # Skipped while Firestore is still initializing: the read would wait for it
+            if self.bridge.services_ready('firestore_db'):
+                try: self.bridge.update_bridge_status("offline")
+                except: pass
+            # Flush queued audit events before the hard exit below
+            try: self.bridge.shutdown()
             except: pass
         if self.icon:
             self.icon.stop()
+        # os._exit skips atexit: write out what is still queued for bridge.log
+        stop_logging()
         os._exit(0)
 
     def start(self):
-        image = self._create_icon_image('ok' if self.bridge else 'warn')
+        status = 'warn' if not self.bridge else ('ok' if self.bridge.services_ready() else 'starting')
+        image = self._create_icon_image(status)
         menu = pystray.Menu(
             pystray.MenuItem("Sync Now", self.on_sync_now),
             pystray.MenuItem("View Live Logs", self.on_view_logs),
             pystray.MenuItem("Quit Bridge", self.on_quit)
         )
-        self.icon = pystray.Icon("MailTrackerPro", image, "MailTrackerPro Bridge", menu)
+        title = "MailTrackerPro Bridge (starting...)" if status == 'starting' else "MailTrackerPro Bridge"
+        self.icon = pystray.Icon("MailTrackerPro", image, title, menu)
         
         # Start Thread
         t = threading.Thread(target=self.run_bridge_loop, daemon=True)
@@ -164,10 +245,10 @@ if __name__ == "__main__":
         # Show alert if possible or just exit
         sys.exit(0)
 
-    # Pre-init bridge
+    # Pre-init bridge: returns right away, Drive/Firestore clients are built while the icon is up
     bridge_obj = None
     try:
-        bridge_obj = BridgeLogic()
+        bridge_obj = BridgeLogic(background_init=True)
     except Exception as e:
         logging.error(f"Initial Bridge Init Failed: {e}")
 
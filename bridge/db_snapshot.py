@@ -0,0 +1,92 @@
+import os
+import json
+import time
+import hashlib
+import logging
+
+COPY_CHUNK_SIZE = 4 * 1024 * 1024
+SAMPLE_BLOCK_SIZE = 64 * 1024
+SAMPLE_BLOCKS = 16
+
+
+class SourceSnapshot:
+    """Change gate and reusable local copy of the Access source file.
+
+    fingerprint() is cheap (stat, plus optionally a hash of a few sampled
+    blocks), so a cycle can compare it with the fingerprint of the last
+    successful sync and skip the copy and the DB engines entirely when the
+    file has not been touched. When it has, refresh_copy() re-copies it in
+    chunks over one cached local file instead of a new temp file per cycle.
+    """
+
+    def __init__(self, state_path, cache_dir, sample_hash=False):
+        self.state_path = state_path
+        self.cache_path = os.path.join(cache_dir, 'MTP_Sync_cache.accdb')
+        self.sample_hash = sample_hash
+        self.last = self._load()
+
+    def fingerprint(self, path, scope=None):
+        st = os.stat(path)
+        fp = {
+            'path': os.path.normcase(os.path.abspath(path)),
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'scope': scope
+        }
+        if self.sample_hash:
+            fp['sample'] = self._sample_hash(path, st.st_size)
+        return fp
+
+    def is_unchanged(self, fp):
+        return bool(self.last) and self.last == fp
+
+    def mark_synced(self, fp):
+        self.last = fp
+        tmp = self.state_path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(fp, f)
+            os.replace(tmp, self.state_path)
+        except Exception as e:
+            logging.warning(f"Source fingerprint save failed: {e}")
+
+    def refresh_copy(self, path):
+        """Copy the source over the cached local snapshot and return the snapshot path."""
+        part = self.cache_path + '.part'
+        t0 = time.time()
+        with open(path, 'rb') as src, open(part, 'wb') as dst:
+            while True:
+                chunk = src.read(COPY_CHUNK_SIZE)
+                if not chunk: break
+                dst.write(chunk)
+        try:
+            os.replace(part, self.cache_path)
+            target = self.cache_path
+        except OSError as e:
+            # Previous snapshot still locked by a DB engine: use the fresh copy under its own name
+            target = os.path.join(os.path.dirname(self.cache_path), f"MTP_Sync_{int(time.time())}.accdb")
+            os.replace(part, target)
+            logging.warning(f"Snapshot cache locked ({e}), using {target}")
+        size_mb = os.path.getsize(target) / (1024 * 1024)
+        logging.info(f"DB snapshot refreshed: {size_mb:.1f} MB in {time.time() - t0:.2f}s")
+        return target
+
+    def _sample_hash(self, path, size):
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            if size <= SAMPLE_BLOCK_SIZE * SAMPLE_BLOCKS:
+                h.update(f.read())
+            else:
+                step = (size - SAMPLE_BLOCK_SIZE) // (SAMPLE_BLOCKS - 1)
+                for i in range(SAMPLE_BLOCKS):
+                    f.seek(i * step)
+                    h.update(f.read(SAMPLE_BLOCK_SIZE))
+        return h.hexdigest()
+
+    def _load(self):
+        if not os.path.exists(self.state_path): return None
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
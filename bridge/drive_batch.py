@@ -0,0 +1,89 @@
+import time
+import logging
+import threading
+
+from upload_pool import is_rate_limited
+
+# Drive accepts up to 100 calls in one batch request
+MAX_BATCH_SIZE = 100
+
+
+class DriveBatch:
+    """Queue of small Drive calls (permission grants, deletes) sent as BatchHttpRequests.
+
+    add() takes build(service) -> request plus an optional callback(response,
+    exception) that maps the result back to whatever queued it. The queue goes
+    out when it reaches max_size and on flush(). Requests are built from the
+    flushing thread's own service (see DriveUploadPool).
+    Calls rate-limited inside a batch are resent after retry_delay; when the
+    whole batch fails they wait for the next flush (at most max_attempts sends).
+    """
+
+    def __init__(self, execute, max_size=MAX_BATCH_SIZE, max_attempts=3, retry_delay=1.0):
+        self.execute = execute  # execute(batch, cost): runs the batch request (through the governor)
+        self.max_size = max(1, min(max_size, MAX_BATCH_SIZE))
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._items = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def add(self, build, callback=None, service=None):
+        """Queue one call; with a service, a full queue is sent right away from this thread."""
+        with self._lock:
+            self._items.append((build, callback, 0))
+            full = len(self._items) >= self.max_size
+        if full and service is not None: self.flush(service)
+
+    def flush(self, service):
+        """Send everything queued so far, max_size calls per HTTP request. Returns the number sent."""
+        with self._flush_lock:
+            with self._lock:
+                items, self._items = self._items, []
+            sent, deferred = 0, []
+            while items:
+                retry = []
+                for i in range(0, len(items), self.max_size):
+                    chunk = items[i:i + self.max_size]
+                    again, failed = self._send(service, chunk)
+                    if failed: deferred.extend(again)
+                    else: retry.extend(again)
+                sent += len(items)
+                items = retry
+                if items: time.sleep(self.retry_delay)
+            if deferred:
+                with self._lock:
+                    self._items.extend(deferred)
+            return sent
+
+    def _send(self, service, items):
+        """One batch request; returns (calls to send again, whether the whole batch failed)."""
+        responses = {}
+
+        def collect(request_id, response, exception):
+            responses[request_id] = (response, exception)
+
+        batch_error = None
+        try:
+            batch = service.new_batch_http_request(callback=collect)
+            for n, (build, _, _) in enumerate(items):
+                batch.add(build(service), request_id=str(n))
+            self.execute(batch, len(items))
+        except Exception as e:
+            batch_error = e
+            logging.warning(f"  [DRIVE] Batch of {len(items)} calls failed: {e}")
+
+        retry = []
+        for n, (build, callback, attempts) in enumerate(items):
+            response, exc = responses.get(str(n), (None, batch_error or Exception("no response in batch")))
+            if exc is not None and (batch_error or is_rate_limited(exc)) and attempts + 1 < self.max_attempts:
+                retry.append((build, callback, attempts + 1))
+                continue
+            if callback:
+                try: callback(response, exc)
+                except Exception as e: logging.warning(f"  [DRIVE] Batch callback failed: {e}")
+        return retry, batch_error is not None
@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import logging
+import threading
+
+FILE_FIELDS = "id, name, size, md5Checksum"
+
+
+class DriveFolderIndex:
+    """Local name -> file index of the bridge's Drive folder.
+
+    Built with one paginated files().list of the folder, persisted to disk and
+    kept current through the Drive changes API page token, so existence checks
+    are dictionary lookups instead of a files().list query per name. A full
+    rebuild happens when the persisted index is older than ttl_seconds or was
+    built for another folder. Files are also looked up by content
+    (md5Checksum), which is what attachment dedup matches on.
+    """
+
+    def __init__(self, cache_path, ttl_seconds=24 * 3600):
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self.folder_id = None
+        self.built_at = 0
+        self.page_token = None
+        self.files = {}
+        self._names_by_id = {}
+        self._names_by_md5 = {}
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._load()
+
+    def is_ready(self, folder_id):
+        return bool(folder_id) and self.folder_id == folder_id and self.page_token is not None
+
+    def lookup(self, name):
+        with self._lock:
+            entry = self.files.get(name)
+            return dict(entry) if entry else None
+
+    def lookup_content(self, md5):
+        """Any indexed file with this md5Checksum, as {'id', 'name', ...}."""
+        with self._lock:
+            name = self._names_by_md5.get(md5) if md5 else None
+            entry = self.files.get(name) if name else None
+            return dict(entry, name=name) if entry and entry.get('md5Checksum') == md5 else None
+
+    def add(self, name, file_id, size=None, md5=None):
+        with self._lock:
+            self._put({'id': file_id, 'name': name, 'size': size, 'md5Checksum': md5})
+
+    def remove(self, file_id):
+        with self._lock:
+            self._drop(file_id)
+
+    def refresh(self, service, folder_id, execute=None):
+        """Bring the index up to date: incremental via changes, or a full listing when stale.
+
+        execute(request) runs each API request (e.g. through the request governor).
+        """
+        execute = execute or (lambda request: request.execute())
+        expired = time.time() - self.built_at > self.ttl_seconds
+        if not self.is_ready(folder_id) or expired:
+            self._rebuild(service, folder_id, execute)
+        else:
+            self._apply_changes(service, execute)
+        self.save()
+
+    def _rebuild(self, service, folder_id, execute):
+        # Take the changes token first so nothing created during the listing is missed
+        token = execute(service.changes().getStartPageToken()).get('startPageToken')
+        files, page = {}, None
+        while True:
+            res = execute(service.files().list(
+                q=f"'{folder_id}' in parents and trashed = false",
+                fields=f"nextPageToken, files({FILE_FIELDS})",
+                pageSize=1000, pageToken=page
+            ))
+            for f in res.get('files', []):
+                files[f['name']] = self._entry(f)
+            page = res.get('nextPageToken')
+            if not page: break
+        with self._lock:
+            self.folder_id = folder_id
+            self.files = files
+            self._names_by_id = {e['id']: n for n, e in files.items()}
+            self._names_by_md5 = {e['md5Checksum']: n for n, e in files.items() if e.get('md5Checksum')}
+            self.page_token = token
+            self.built_at = time.time()
+            self._dirty = True
+        logging.info(f"  [DRIVE] Folder index rebuilt: {len(files)} files")
+
+    def _apply_changes(self, service, execute):
+        token, applied = self.page_token, 0
+        while token:
+            res = execute(service.changes().list(
+                pageToken=token, pageSize=1000, spaces='drive',
+                fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}, parents, trashed))"
+            ))
+            with self._lock:
+                for change in res.get('changes', []):
+                    f = change.get('file') or {}
+                    in_folder = self.folder_id in (f.get('parents') or [])
+                    if change.get('removed') or f.get('trashed') or not in_folder:
+                        self._drop(change.get('fileId'))
+                    else:
+                        self._put(f)
+                    applied += 1
+                if res.get('newStartPageToken'):
+                    self.page_token = res['newStartPageToken']
+                    self._dirty = True
+                    break
+            token = res.get('nextPageToken')
+        if applied:
+            logging.info(f"  [DRIVE] Folder index: {applied} changes applied")
+
+    @staticmethod
+    def _entry(f):
+        return {'id': f['id'], 'size': f.get('size'), 'md5Checksum': f.get('md5Checksum')}
+
+    def _put(self, f):
+        old_name = self._names_by_id.get(f['id'])
+        if old_name and old_name != f['name']:
+            self.files.pop(old_name, None)
+        self.files[f['name']] = self._entry(f)
+        self._names_by_id[f['id']] = f['name']
+        if f.get('md5Checksum'): self._names_by_md5[f['md5Checksum']] = f['name']
+        self._dirty = True
+
+    def _drop(self, file_id):
+        name = self._names_by_id.pop(file_id, None)
+        if name and self.files.get(name, {}).get('id') == file_id:
+            md5 = self.files.pop(name).get('md5Checksum')
+            if md5 and self._names_by_md5.get(md5) == name: del self._names_by_md5[md5]
+            self._dirty = True
+
+    def _load(self):
+        if not os.path.exists(self.cache_path): return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.folder_id = data.get('folderId')
+            self.built_at = data.get('builtAt', 0)
+            self.page_token = data.get('pageToken')
+            self.files = data.get('files', {})
+            self._names_by_id = {e['id']: n for n, e in self.files.items()}
+            self._names_by_md5 = {e['md5Checksum']: n for n, e in self.files.items() if e.get('md5Checksum')}
+        except Exception as e:
+            logging.warning(f"Drive index cache unreadable, will rebuild: {e}")
+
+    def save(self):
+        with self._lock:
+            if not self._dirty: return
+            data = {
+                'folderId': self.folder_id,
+                'builtAt': self.built_at,
+                'pageToken': self.page_token,
+                'files': dict(self.files)
+            }
+            self._dirty = False
+        tmp = self.cache_path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.cache_path)
+        except Exception as e:
+            logging.warning(f"Drive index save failed: {e}")
@@ -0,0 +1,18 @@
+import os
+from dotenv import load_dotenv
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_env():
+    """Load the project's .env.local (Next.js convention), else .env; variables already set win.
+
+    Entry points call this before configure_logging(), so BRIDGE_DATA_DIR
+    from the file also places bridge.log.
+    """
+    for name in ('.env.local', '.env'):
+        path = os.path.join(PROJECT_ROOT, name)
+        if os.path.exists(path):
+            load_dotenv(path)
+            return path
+    return None
@@ -0,0 +1,128 @@
+import json
+import math
+import hashlib
+import datetime
+from json.encoder import encode_basestring_ascii
+
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+# Fields that never take part in a record fingerprint
+VOLATILE_FIELDS = ('lastSyncAt', 'ts')
+# Derived fields the sync loop adds to every record before hashing
+EXTRA_FIELDS = ('id', 'year', 'target_year_config')
+
+
+def legacy_record_hash(data_dict):
+    """Reference fingerprint: MD5 of the sorted-key JSON of the converted record."""
+    d = {k: v for k, v in data_dict.items() if k not in VOLATILE_FIELDS}
+    d_str = json.dumps(d, sort_keys=True, default=str)
+    return hashlib.md5(d_str.encode('utf-8')).hexdigest()
+
+
+def _json_float(v):
+    if v != v: return 'NaN'
+    if v == math.inf: return 'Infinity'
+    if v == -math.inf: return '-Infinity'
+    return float.__repr__(v)
+
+
+def _json_value(v):
+    """Encode one raw row value exactly as json.dumps(..., default=str) sees its converted form."""
+    if v is None: return 'null'
+    if v is True: return 'true'
+    if v is False: return 'false'
+    if isinstance(v, str): return encode_basestring_ascii(v)
+    if isinstance(v, int): return int.__repr__(v)
+    if isinstance(v, float): return _json_float(v)
+    if isinstance(v, (datetime.date, datetime.datetime)): return '"' + v.isoformat() + '"'
+    if isinstance(v, (bytes, bytearray)): return '"[BINARY]"'
+    return encode_basestring_ascii(str(v))
+
+
+def _json_encoder(type_code):
+    if type_code is str:
+        return lambda v: encode_basestring_ascii(v) if v.__class__ is str else _json_value(v)
+    if type_code is int:
+        return lambda v: int.__repr__(v) if v.__class__ is int else _json_value(v)
+    if type_code in (datetime.datetime, datetime.date):
+        return lambda v: '"' + v.isoformat() + '"' if v.__class__ is type_code else _json_value(v)
+    return _json_value
+
+
+def _raw_value(v):
+    """Type-tagged text form used by the fast fingerprint."""
+    if v is None: return '\x00'
+    cls = v.__class__
+    if cls is str: return 's' + v
+    if cls is int: return 'i' + int.__repr__(v)
+    if cls is datetime.datetime or cls is datetime.date: return 'd' + v.isoformat()
+    if cls is float: return 'f' + float.__repr__(v)
+    if cls is bool: return 'b1' if v else 'b0'
+    if isinstance(v, (bytes, bytearray)): return 'x'
+    return 'o' + str(v)
+
+
+def _raw_encoder(type_code):
+    if type_code is str:
+        return lambda v: 's' + v if v.__class__ is str else _raw_value(v)
+    if type_code is int:
+        return lambda v: 'i' + int.__repr__(v) if v.__class__ is int else _raw_value(v)
+    if type_code in (datetime.datetime, datetime.date):
+        return lambda v: 'd' + v.isoformat() if v.__class__ is type_code else _raw_value(v)
+    return _raw_value
+
+
+class RecordHasher:
+    """Per-table record fingerprint compiled once from cursor.description.
+
+    mode='fast' feeds a type-tagged encoding of the row tuple straight into
+    blake2b (or xxh3_128 when xxhash is installed); digests carry a 'b2:' /
+    'xx:' prefix. mode='compat' produces the legacy MD5-of-JSON digest,
+    byte-for-byte, without building the record dict or the JSON string
+    through json.dumps. legacy_digest() is always available so hashes stored
+    by older versions can be recognised and upgraded.
+    """
+
+    def __init__(self, columns, type_codes, mode='fast'):
+        self.mode = mode
+        # Same key resolution as the record dict: later duplicates and extras win
+        sources = {}
+        for i, col in enumerate(columns):
+            sources[col] = ('row', i, _json_encoder(type_codes[i]))
+        for j, key in enumerate(EXTRA_FIELDS):
+            sources[key] = ('extra', j, _json_value)
+        for key in VOLATILE_FIELDS:
+            sources.pop(key, None)
+
+        self._json_plan = [(encode_basestring_ascii(k) + ': ', kind, idx, enc)
+                           for k, (kind, idx, enc) in sorted(sources.items())]
+        self._raw_plan = [(idx, _raw_encoder(type_codes[idx])) for kind, idx, _ in sources.values() if kind == 'row']
+        if HAS_XXHASH:
+            self._prefix, self._new_hash = 'xx:', xxhash.xxh3_128
+        else:
+            self._prefix, self._new_hash = 'b2:', lambda: hashlib.blake2b(digest_size=16)
+
+    @staticmethod
+    def is_legacy(digest):
+        return isinstance(digest, str) and len(digest) == 32 and ':' not in digest
+
+    def digest(self, row, extras):
+        """Fingerprint a raw row; extras are the values of EXTRA_FIELDS, in order."""
+        if self.mode == 'compat':
+            return self.legacy_digest(row, extras)
+        h = self._new_hash()
+        parts = [enc(v) if (v := row[i]) is not None else '\x00' for i, enc in self._raw_plan]
+        parts.extend([_raw_value(v) for v in extras])
+        h.update('\x1f'.join(parts).encode('utf-8', 'surrogatepass'))
+        return self._prefix + h.hexdigest()
+
+    def legacy_digest(self, row, extras):
+        parts = []
+        for key_json, kind, idx, enc in self._json_plan:
+            v = row[idx] if kind == 'row' else extras[idx]
+            parts.append(key_json + ('null' if v is None else enc(v)))
+        return hashlib.md5(('{' + ', '.join(parts) + '}').encode('ascii')).hexdigest()
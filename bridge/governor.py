@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import random
+import logging
+import datetime
+import threading
+
+from upload_pool import is_rate_limited
+
+# Firestore daily quotas reset at midnight Pacific time
+QUOTA_DAY_OFFSET = datetime.timedelta(hours=-8)
+# Share of a daily budget that non-essential traffic (heartbeats, audit logs) may consume
+BACKGROUND_BUDGET_SHARE = 0.8
+
+
+class RequestShed(Exception):
+    """A non-essential request was dropped to protect quota for sync writes."""
+
+
+class QuotaExhausted(Exception):
+    """The configured daily budget for this kind of request is used up."""
+
+
+def is_quota_error(exc):
+    if is_rate_limited(exc): return True
+    code = getattr(exc, 'code', None)
+    if code == 429 or getattr(code, 'value', None) == 429: return True
+    text = str(exc)
+    return 'RESOURCE_EXHAUSTED' in text or 'Quota exceeded' in text or 'Too Many Requests' in text
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cost=1):
+        """Take cost tokens, sleeping off any deficit (large batches may borrow ahead)."""
+        if self.rate <= 0: return
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= cost
+            deficit = -self.tokens
+        if deficit > 0:
+            time.sleep(deficit / self.rate)
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=3, cooldown=300.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self):
+        if self.opened_at is None: return 'closed'
+        return 'open' if time.time() - self.opened_at < self.cooldown else 'half-open'
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_quota_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            if self.opened_at is None:
+                logging.warning(f"Circuit breaker OPEN after {self.failures} quota errors; shedding background traffic")
+            self.opened_at = time.time()
+
+
+class RequestGovernor:
+    """Central gate for every Firestore and Drive call made by the bridge.
+
+    call() counts the request against a daily budget, waits on a per-service
+    token bucket, retries quota/rate-limit errors with exponential backoff and
+    jitter, and feeds a per-service circuit breaker. Non-essential requests
+    (essential=False) are shed with RequestShed while the breaker is open or
+    once they would eat into the last 20% of a daily budget, so sync writes
+    keep working as long as possible. A budget of 0 means unlimited. With a
+    metrics sink, every call is reported via observe_call().
+    """
+
+    def __init__(self, budgets=None, rates=None, max_retries=4, base_delay=1.0,
+                 breaker_threshold=3, breaker_cooldown=300.0, state_path=None, metrics=None):
+        self.budgets = budgets or {}
+        self.metrics = metrics
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._buckets = {svc: TokenBucket(rate, max(rate * 5, 1)) for svc, rate in (rates or {}).items()}
+        self._breakers = {}
+        self._breaker_args = (breaker_threshold, breaker_cooldown)
+        self.day = self._quota_day()
+        self.used = {}
+        self.shed = 0
+        self._load()
+
+    def call(self, service, kind, fn, cost=1, essential=True, retries=None):
+        key = f"{service}.{kind}"
+        breaker = self._breaker(service)
+        with self._lock:
+            self._roll_day()
+            budget = self.budgets.get(key, 0)
+            used = self.used.get(key, 0)
+            if not essential and (breaker.state == 'open' or (budget and used + cost > budget * BACKGROUND_BUDGET_SHARE)):
+                self.shed += 1
+                self._observe(service, kind, None, 'shed')
+                raise RequestShed(f"{key} shed (breaker {breaker.state}, {used}/{budget})")
+            if budget and used + cost > budget:
+                self._observe(service, kind, None, 'exhausted')
+                raise QuotaExhausted(f"{key} daily budget exhausted ({used}/{budget})")
+            self.used[key] = used + cost
+
+        # Rates are per request (a 400-op batch commit is one request); budgets count ops
+        bucket = self._buckets.get(service)
+        if bucket: bucket.acquire()
+
+        retries = self.max_retries if retries is None else retries
+        attempt = 0
+        t0 = time.perf_counter()
+        while True:
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_quota_error(e):
+                    self._observe(service, kind, time.perf_counter() - t0, 'error')
+                    raise
+                with self._lock:
+                    breaker.record_quota_failure()
+                if attempt >= retries or (not essential and breaker.state == 'open'):
+                    self._observe(service, kind, time.perf_counter() - t0, 'quota_error')
+                    raise
+                delay = self.base_delay * (2 ** attempt) + random.uniform(0, self.base_delay)
+                logging.warning(f"  [{service.upper()}] Quota/rate limit on {kind}, retrying in {delay:.1f}s ({attempt + 1}/{retries})")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            with self._lock:
+                breaker.record_success()
+            self._observe(service, kind, time.perf_counter() - t0, 'ok' if not attempt else 'ok_retried')
+            return result
+
+    def _observe(self, service, kind, seconds, outcome):
+        if self.metrics: self.metrics.observe_call(service, kind, seconds, outcome)
+
+    def snapshot(self):
+        """Budget usage for the status document; also persists the counters."""
+        with self._lock:
+            self._roll_day()
+            data = {
+                'day': self.day,
+                'used': dict(self.used),
+                'budgets': {k: v for k, v in self.budgets.items() if v},
+                'breakers': {svc: b.state for svc, b in self._breakers.items()},
+                'shed': self.shed
+            }
+        self._save(data)
+        return data
+
+    def _breaker(self, service):
+        with self._lock:
+            if service not in self._breakers:
+                self._breakers[service] = CircuitBreaker(*self._breaker_args)
+            return self._breakers[service]
+
+    @staticmethod
+    def _quota_day():
+        return (datetime.datetime.now(datetime.timezone.utc) + QUOTA_DAY_OFFSET).strftime('%Y-%m-%d')
+
+    def _roll_day(self):
+        today = self._quota_day()
+        if today != self.day:
+            self.day, self.used, self.shed = today, {}, 0
+
+    def _load(self):
+        if not self.state_path or not os.path.exists(self.state_path): return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('day') == self.day:
+                self.used = data.get('used', {})
+                self.shed = data.get('shed', 0)
+        except Exception: pass
+
+    def _save(self, data):
+        if not self.state_path: return
+        try:
+            with open(self.state_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+        except Exception: pass
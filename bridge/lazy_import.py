@@ -0,0 +1,42 @@
+import importlib
+import importlib.util
+import threading
+
+
+def available(name):
+    """True if module name can be imported, without importing it (only its parent packages)."""
+    try: return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError): return False
+
+
+class LazyImport:
+    """Stand-in for a module, or one name in it, that imports it on first use.
+
+    Attribute access and calls are forwarded, so `build(...)`,
+    `firestore.SERVER_TIMESTAMP` and `except google_exceptions.NotFound`
+    read the same as with a real import; the SDK is only loaded (once,
+    thread-safe) when something first touches it.
+    """
+
+    def __init__(self, module, attr=None):
+        self._module = module
+        self._attr = attr
+        self._target = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    target = importlib.import_module(self._module)
+                    self._target = getattr(target, self._attr) if self._attr else target
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<lazy {self._module}{'.' + self._attr if self._attr else ''}>"
@@ -0,0 +1,168 @@
+import os
+import sys
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+    import fcntl
+
+BRIDGE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+RING_LINES = 2000
+
+_listener = None
+_ring = None
+_path = None
+_lock = threading.Lock()
+
+
+@contextmanager
+def _interprocess_lock(path):
+    """Exclusive lock on path (a side file), shared by every process that logs to the same file."""
+    with open(path, 'a+b') as f:
+        if msvcrt:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK gives up after ~10s; keep waiting
+            try: yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try: yield
+            finally: fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class SharedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that tolerates other processes appending to (and rotating) the same file.
+
+    Size is taken from the file on disk, not this process's stream, and the
+    rollover runs under a lock file so only one process renames. A process
+    whose file was rotated away by another reopens the new one before its
+    next write. On Windows a rename fails while another process holds the
+    file open; the rollover is then retried after the next `retry_after`
+    bytes instead of on every record.
+    """
+
+    def __init__(self, filename, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS, retry_after=256 * 1024):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backups, encoding='utf-8', delay=True)
+        self.lock_path = self.baseFilename + '.lock'
+        self.retry_after = retry_after
+        self._next_check = 0
+
+    def emit(self, record):
+        self._reopen_if_rotated()
+        super().emit(record)
+
+    def shouldRollover(self, record):
+        if not self.maxBytes: return False
+        try: size = os.path.getsize(self.baseFilename)
+        except OSError: return False
+        return size >= self.maxBytes and size >= self._next_check
+
+    def doRollover(self):
+        with _interprocess_lock(self.lock_path):
+            self._reopen_if_rotated()
+            try: size = os.path.getsize(self.baseFilename)
+            except OSError: size = 0
+            if size < self.maxBytes: return  # another process just rotated
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+            try:
+                super().doRollover()
+                self._next_check = 0
+            except OSError:
+                # Still open elsewhere (Windows): keep appending, try again a bit later
+                self._next_check = size + self.retry_after
+                if self.stream is None: self.stream = self._open()
+
+    def _reopen_if_rotated(self):
+        if not self.stream: return
+        try:
+            if os.stat(self.baseFilename).st_ino == os.fstat(self.stream.fileno()).st_ino: return
+        except OSError:
+            pass  # gone (renamed by another process)
+        self.stream.close()
+        self.stream = None  # reopened by the next emit
+
+
+class RingBufferHandler(logging.Handler):
+    """Last `capacity` formatted lines in memory, numbered so a viewer can poll for new ones."""
+
+    def __init__(self, capacity=RING_LINES):
+        super().__init__()
+        self.lines = deque(maxlen=capacity)
+        self.seq = 0
+
+    def emit(self, record):
+        try: line = self.format(record)
+        except Exception: return
+        with self.lock:
+            self.seq += 1
+            self.lines.append((self.seq, line))
+
+    def since(self, seq=0):
+        """(latest seq, lines newer than seq)."""
+        with self.lock:
+            return self.seq, [line for n, line in self.lines if n > seq]
+
+
+def log_file():
+    """bridge.log in use, or where configure_logging() would put it: BRIDGE_DATA_DIR, default next to this file."""
+    return _path or os.path.join(os.getenv('BRIDGE_DATA_DIR') or BRIDGE_DIR, 'bridge.log')
+
+
+def configure_logging(tag=None, path=None, level=logging.INFO):
+    """Route the root logger through a queue; file, console and ring buffer are written by one listener thread.
+
+    Only the first call configures anything (like logging.basicConfig), so
+    whichever entry point runs first picks the tag and the file.
+    """
+    global _listener, _ring, _path
+    with _lock:
+        if _listener: return _ring
+        path = _path = path or log_file()
+        fmt = logging.Formatter(f"%(asctime)s [%(levelname)s] {f'({tag}) ' if tag else ''}%(message)s")
+        handlers = [SharedRotatingFileHandler(path), logging.StreamHandler(sys.stdout), RingBufferHandler()]
+        for h in handlers:
+            h.setFormatter(fmt)
+        _ring = handlers[-1]
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        # Drain what is queued before the interpreter exits (os._exit callers use stop_logging)
+        atexit.register(stop_logging)
+        return _ring
+
+
+def stop_logging():
+    """Flush queued records to the file; call before os._exit()."""
+    global _listener
+    with _lock:
+        if _listener:
+            _listener.stop()
+            _listener = None
+            for h in logging.getLogger().handlers[:]:
+                if isinstance(h, logging.handlers.QueueHandler): logging.getLogger().removeHandler(h)
+
+
+def ring_buffer():
+    return _ring
@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Sync phases in pipeline order (used for reporting order only)
+PHASES = ('copy', 'odbc_read', 'convert', 'hash', 'dao_attachments', 'drive_upload',
+          'firestore_write', 'backup_write', 'backup_upload')
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total, out = 0, []
+        for bound, n in zip(self.buckets + ('+Inf',), self.counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+
+class SyncMetrics:
+    """Per-phase timers, counters and API latency histograms for the bridge.
+
+    Phase times are summed across threads (table workers, upload workers), so
+    in a concurrent cycle they can add up to more than the wall-clock time.
+    end_cycle() closes the current cycle, keeps the last `history` cycles and
+    rewrites json_path; serve() exposes everything on a local-only HTTP port
+    as Prometheus text (/metrics) and JSON (/metrics.json).
+    """
+
+    def __init__(self, json_path=None, history=20):
+        self.json_path = json_path
+        self.history = deque(maxlen=history)
+        self.phase_totals = defaultdict(float)
+        self.counters = defaultdict(int)
+        self.api_calls = defaultdict(int)
+        self.api_latency = {}
+        self.cycles = defaultdict(int)
+        self._cycle = None
+        self._lock = threading.Lock()
+        self._server = None
+
+    # --- Recording ----------------------------------------------------------
+
+    def begin_cycle(self):
+        with self._lock:
+            self._cycle = {'started': time.time(), 't0': time.perf_counter(),
+                           'phases': defaultdict(float), 'counters': defaultdict(int)}
+
+    def add_time(self, phase, seconds):
+        with self._lock:
+            self.phase_totals[phase] += seconds
+            if self._cycle: self._cycle['phases'][phase] += seconds
+
+    def add_times(self, timings):
+        for phase, seconds in timings.items():
+            self.add_time(phase, seconds)
+
+    @contextmanager
+    def phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    def inc(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+            if self._cycle: self._cycle['counters'][name] += n
+
+    def observe_call(self, service, kind, seconds, outcome):
+        """One API request (including governor retries) and how it ended; seconds=None if never sent."""
+        key = (service, kind)
+        with self._lock:
+            self.api_calls[(service, kind, outcome)] += 1
+            if seconds is None: return
+            if key not in self.api_latency: self.api_latency[key] = Histogram()
+            self.api_latency[key].observe(seconds)
+
+    def end_cycle(self, result, stats=None):
+        with self._lock:
+            cycle, self._cycle = self._cycle, None
+            self.cycles[result] += 1
+        if not cycle: return None
+        duration = time.perf_counter() - cycle['t0']
+        counters, phases = dict(cycle['counters']), dict(cycle['phases'])
+        summary = {
+            'startedAt': cycle['started'],
+            'result': result,
+            'durationS': round(duration, 3),
+            'phasesS': {p: round(phases[p], 3) for p in self._ordered(phases)},
+            'counters': counters,
+            'rowsPerS': round(counters.get('rows', 0) / duration, 1) if duration else 0.0,
+            'bytesPerS': round(sum(v for k, v in counters.items() if k.startswith('bytes_')) / duration, 1) if duration else 0.0
+        }
+        if phases.get('copy') and counters.get('bytes_copied'):
+            summary['copyBytesPerS'] = round(counters['bytes_copied'] / phases['copy'], 1)
+        if phases.get('odbc_read') and counters.get('rows'):
+            summary['readRowsPerS'] = round(counters['rows'] / phases['odbc_read'], 1)
+        if stats:
+            summary['stats'] = {k: v for k, v in stats.items() if isinstance(v, (int, float))}
+        with self._lock:
+            self.history.append(summary)
+        self.save()
+        return summary
+
+    # --- Reporting ----------------------------------------------------------
+
+    def last_cycle(self):
+        with self._lock:
+            return self.history[-1] if self.history else None
+
+    def summary(self):
+        """Short text for the tray tooltip: last cycle time and its two slowest phases."""
+        last = self.last_cycle()
+        if not last: return "no cycle yet"
+        if last['result'] == 'skipped': return f"last: unchanged ({last['durationS']:.1f}s)"
+        top = sorted(last['phasesS'].items(), key=lambda kv: kv[1], reverse=True)[:2]
+        phases = ", ".join(f"{p} {s:.1f}s" for p, s in top if s >= 0.05)
+        return f"last {last['durationS']:.1f}s" + (f" ({phases})" if phases else "")
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'updatedAt': time.time(),
+                'cycles': dict(self.cycles),
+                'phaseTotalsS': {p: round(self.phase_totals[p], 3) for p in self._ordered(self.phase_totals)},
+                'counters': dict(self.counters),
+                'api': [
+                    {'service': s, 'kind': k, 'outcome': o, 'count': n}
+                    for (s, k, o), n in sorted(self.api_calls.items())
+                ],
+                'apiLatency': {
+                    f"{s}.{k}": {'count': h.count, 'sumS': round(h.sum, 3),
+                                 'buckets': {str(b): n for b, n in h.cumulative()}}
+                    for (s, k), h in self.api_latency.items()
+                },
+                'history': list(self.history)
+            }
+
+    def save(self):
+        if not self.json_path: return
+        tmp = self.json_path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, indent=2)
+            os.replace(tmp, self.json_path)
+        except Exception as e:
+            logging.warning(f"metrics.json write failed: {e}")
+
+    def prometheus(self):
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+
+        with self._lock:
+            # Gauges describe the last cycle that actually synced (not an unchanged-source skip)
+            last = next((c for c in reversed(self.history) if c['result'] != 'skipped'), None)
+            metric('mtp_sync_cycles_total', 'counter', 'Sync cycles by result.',
+                   [({'result': r}, n) for r, n in sorted(self.cycles.items())])
+            metric('mtp_sync_phase_seconds_total', 'counter', 'Time spent per sync phase (summed across threads).',
+                   [({'phase': p}, round(self.phase_totals[p], 6)) for p in self._ordered(self.phase_totals)])
+            metric('mtp_sync_events_total', 'counter', 'Rows, bytes and other sync counters.',
+                   [({'counter': c}, v) for c, v in sorted(self.counters.items())])
+            if last:
+                metric('mtp_sync_last_duration_seconds', 'gauge', 'Wall-clock time of the last cycle.', [({}, last['durationS'])])
+                metric('mtp_sync_last_phase_seconds', 'gauge', 'Per-phase time of the last cycle.',
+                       [({'phase': p}, s) for p, s in last['phasesS'].items()])
+                metric('mtp_sync_last_rows_per_second', 'gauge', 'Rows processed per second in the last cycle.', [({}, last['rowsPerS'])])
+                metric('mtp_sync_last_bytes_per_second', 'gauge', 'Bytes processed per second in the last cycle.', [({}, last['bytesPerS'])])
+            metric('mtp_api_requests_total', 'counter', 'Firestore/Drive requests by outcome.',
+                   [({'service': s, 'kind': k, 'outcome': o}, n) for (s, k, o), n in sorted(self.api_calls.items())])
+            lines.append("# HELP mtp_api_request_seconds Firestore/Drive request latency, retries included.")
+            lines.append("# TYPE mtp_api_request_seconds histogram")
+            for (s, k), h in sorted(self.api_latency.items()):
+                for bound, n in h.cumulative():
+                    lines.append(f'mtp_api_request_seconds_bucket{{service="{s}",kind="{k}",le="{bound}"}} {n}')
+                lines.append(f'mtp_api_request_seconds_sum{{service="{s}",kind="{k}"}} {round(h.sum, 6)}')
+                lines.append(f'mtp_api_request_seconds_count{{service="{s}",kind="{k}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _ordered(phases):
+        return [p for p in PHASES if p in phases] + sorted(p for p in phases if p not in PHASES)
+
+    # --- HTTP endpoint ------------------------------------------------------
+
+    def serve(self, port, host='127.0.0.1'):
+        """Start the local metrics endpoint on a daemon thread. Returns False if the port is taken."""
+        if self._server or not port: return bool(self._server)
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                if path == '/metrics':
+                    body, ctype = metrics.prometheus().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+                elif path == '/metrics.json':
+                    body, ctype = json.dumps(metrics.to_dict()).encode('utf-8'), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', ctype)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            logging.warning(f"Metrics endpoint not started on {host}:{port}: {e}")
+            return False
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='MetricsHTTP', daemon=True).start()
+        logging.info(f"Metrics endpoint: http://{host}:{port}/metrics")
+        return True
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,225 @@
+import time
+import queue
+import threading
+from contextlib import nullcontext
+
+_END = object()
+
+
+class PipelineAborted(Exception):
+    """Raised inside stage threads (by emit) once the pipeline is stopping; never escapes run()."""
+
+
+class Stage:
+    """One step of a Pipeline.
+
+    fn(item, emit) handles one item and passes results on with emit() (zero,
+    one or many per item). finish(emit), if given, runs once after the last
+    item, e.g. to flush a partial batch. With workers > 1, fn runs on that many
+    threads and items leave the stage out of order. thread_init is a context
+    manager factory entered on each worker thread (COM apartment, per-thread
+    connection). queue_size bounds the stage's input queue; a full queue
+    blocks whoever feeds it, which is the pipeline's backpressure.
+    """
+
+    def __init__(self, name, fn, workers=1, queue_size=64, finish=None, thread_init=None):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.queue_size = max(queue_size, self.workers)
+        self.finish = finish
+        self.thread_init = thread_init
+        self.items = 0
+        self.busy = 0.0     # seconds in fn/finish, summed over workers
+        self.waiting = 0.0  # part of busy spent in emit (downstream full, or downstream work when inline)
+        self._lock = threading.Lock()
+
+    def _record(self, busy, waiting, items=1):
+        with self._lock:
+            self.items += items
+            self.busy += busy
+            self.waiting += waiting
+
+    def stats(self):
+        return {'items': self.items, 'workers': self.workers,
+                'workS': round(self.busy - self.waiting, 3), 'waitS': round(self.waiting, 3)}
+
+
+class Pipeline:
+    """A source iterator feeding a chain of stages through bounded queues.
+
+    run() gives the source and every stage worker their own thread, so the
+    I/O of one stage overlaps with the others and a run takes about as long
+    as its slowest stage; run(threaded=False) calls the same stage functions
+    inline on the calling thread, one item at a time. The first exception
+    from the source or a stage (or cancel()) stops everything: reading stops,
+    queued items are dropped, finish hooks are skipped, all threads are
+    joined and run() raises it.
+    """
+
+    def __init__(self, name, source, stages, source_name='read'):
+        self.name = name
+        self.source = source
+        self.stages = stages
+        self.source_stage = Stage(source_name, None)
+        self.wall = 0.0
+        self._error = None
+        self._abort = threading.Event()
+        self._lock = threading.Lock()
+
+    def run(self, threaded=True):
+        t0 = time.perf_counter()
+        try:
+            if threaded: self._run_threads()
+            else: self._run_inline()
+        finally:
+            self.wall = time.perf_counter() - t0
+        if self._error is not None: raise self._error
+
+    def cancel(self, error=None):
+        """Stop the run; run() raises error (first one wins)."""
+        with self._lock:
+            if self._error is None: self._error = error or PipelineAborted(f"{self.name} cancelled")
+        self._abort.set()
+
+    def report(self):
+        """Per-stage items and seconds of work (excluding time in emit) and wait, plus the busiest stage."""
+        stages = {s.name: s.stats() for s in [self.source_stage] + self.stages}
+        busiest = max(stages, key=lambda n: stages[n]['workS'] / stages[n]['workers'])
+        return {'wallS': round(self.wall, 3), 'stages': stages, 'busiest': busiest}
+
+    # --- Inline ---------------------------------------------------------------
+
+    def _run_inline(self):
+        emits = [self._drop]
+        for stage in reversed(self.stages):
+            emits.insert(0, self._inline_emit(stage, emits[0]))
+        src, source = self.source_stage, None
+        perf = time.perf_counter
+        try:
+            source = iter(self.source)
+            while not self._abort.is_set():
+                t0 = perf()
+                try: item = next(source)
+                except StopIteration: break
+                t1 = perf()
+                emits[0](item)
+                src._record(perf() - t0, perf() - t1)
+            else:
+                return
+            for i, stage in enumerate(self.stages):
+                if stage.finish: self._call(stage, stage.finish, emits[i + 1], count=0)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            self.cancel(e)
+        finally:
+            self._close(source)
+
+    def _inline_emit(self, stage, downstream):
+        return lambda item: self._call(stage, stage.fn, downstream, item)
+
+    def _call(self, stage, fn, downstream, *args, count=1):
+        waited = [0.0]
+
+        def emit(item):
+            t = time.perf_counter()
+            try: downstream(item)
+            finally: waited[0] += time.perf_counter() - t
+
+        t0 = time.perf_counter()
+        try: fn(*args, emit)
+        finally: stage._record(time.perf_counter() - t0, waited[0], count)
+
+    @staticmethod
+    def _drop(item):
+        pass
+
+    @staticmethod
+    def _close(source):
+        close = getattr(source, 'close', None)
+        if close:
+            try: close()
+            except Exception: pass
+
+    # --- Threaded -------------------------------------------------------------
+
+    def _run_threads(self):
+        queues = [queue.Queue(maxsize=s.queue_size) for s in self.stages]
+        live = [s.workers for s in self.stages]
+        threads = [threading.Thread(target=self._read, args=(queues[0] if queues else None,),
+                                    name=f"{self.name}-{self.source_stage.name}", daemon=True)]
+        for i, stage in enumerate(self.stages):
+            downstream = queues[i + 1] if i + 1 < len(queues) else None
+            for n in range(stage.workers):
+                threads.append(threading.Thread(target=self._work, args=(stage, queues[i], downstream, live, i),
+                                                name=f"{self.name}-{stage.name}-{n}", daemon=True))
+        for t in threads: t.start()
+        try:
+            for t in threads:
+                while t.is_alive(): t.join(0.1)
+        except BaseException as e:
+            # Interrupted while waiting (KeyboardInterrupt): stop the threads, then report it
+            self.cancel(e)
+            for t in threads: t.join()
+
+    def _put(self, q, item):
+        while True:
+            if self._abort.is_set(): raise PipelineAborted()
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q):
+        while True:
+            if self._abort.is_set(): raise PipelineAborted()
+            try: return q.get(timeout=0.1)
+            except queue.Empty: continue
+
+    def _emitter(self, q):
+        if q is None: return self._drop
+        return lambda item: self._put(q, item)
+
+    def _read(self, out):
+        src, source = self.source_stage, None
+        emit = self._emitter(out)
+        perf = time.perf_counter
+        try:
+            source = iter(self.source)
+            while True:
+                t0 = perf()
+                try: item = next(source)
+                except StopIteration: break
+                t1 = perf()
+                emit(item)
+                src._record(perf() - t0, perf() - t1)
+            emit(_END)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            self.cancel(e)
+        finally:
+            self._close(source)
+
+    def _work(self, stage, inbox, out, live, i):
+        emit = self._emitter(out)
+        try:
+            with stage.thread_init() if stage.thread_init else nullcontext():
+                while True:
+                    item = self._get(inbox)
+                    if item is _END:
+                        self._put(inbox, _END)  # for the other workers of this stage
+                        break
+                    self._call(stage, stage.fn, emit, item)
+                with self._lock:
+                    live[i] -= 1
+                    last = live[i] == 0
+                if last:
+                    if stage.finish: self._call(stage, stage.finish, emit, count=0)
+                    emit(_END)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            self.cancel(e)
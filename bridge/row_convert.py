@@ -0,0 +1,85 @@
+import datetime
+from decimal import Decimal
+from itertools import islice
+from time import perf_counter
+
+# Type codes whose values never need converting (never a date or bytes)
+PASSTHROUGH_TYPES = (int, float, bool, Decimal)
+# Value types a checked column may hold and still be left as is
+_PLAIN = frozenset((str, int, float, bool, Decimal, type(None)))
+
+
+def convert_value(v):
+    """Reference conversion of one cell: dates to ISO strings, binary to a placeholder."""
+    if isinstance(v, (datetime.date, datetime.datetime)): return v.isoformat()
+    if isinstance(v, (bytes, bytearray)): return "[BINARY]"
+    return v
+
+
+def _converter(type_code):
+    # None and mistyped values fall through to convert_value
+    if type_code in (datetime.datetime, datetime.date):
+        return lambda v: v.isoformat() if v.__class__ is type_code else convert_value(v)
+    if type_code in (bytes, bytearray):
+        return lambda v: "[BINARY]" if v.__class__ is type_code else convert_value(v)
+    return None
+
+
+class RowConverter:
+    """Per-table row -> record dict conversion compiled once from cursor.description.
+
+    Columns typed int/float/bool/Decimal are never touched; date and binary
+    columns get a direct converter; text and unknown type codes (pyodbc and
+    the native reader both report some odd columns as str) are checked once
+    per chunk with set(map(type, column)) and only converted when a value
+    actually needs it. Rows are converted a chunk at a time, column-wise, and
+    the records are identical to the old per-cell isinstance loop, including
+    duplicate column names (last one wins).
+    """
+
+    def __init__(self, columns, type_codes, year_column='TANGGAL SURAT DITERIMA'):
+        self.columns = list(columns)
+        self._convert = []  # (index, converter) for date/binary columns
+        self._check = []    # indexes of columns whose values are checked per chunk
+        for i, type_code in enumerate(type_codes):
+            if type_code in PASSTHROUGH_TYPES: continue
+            conv = _converter(type_code)
+            if conv: self._convert.append((i, conv))
+            else: self._check.append(i)
+        # Same column the record dict would keep for that key
+        self._year_idx = {col: i for i, col in enumerate(self.columns)}.get(year_column)
+
+    def records(self, rows):
+        """Convert a list of raw rows into record dicts."""
+        if not rows: return []
+        cols = list(zip(*rows))
+        for i, conv in self._convert:
+            cols[i] = list(map(conv, cols[i]))
+        for i in self._check:
+            if not set(map(type, cols[i])) <= _PLAIN:
+                cols[i] = list(map(convert_value, cols[i]))
+        names = self.columns
+        return [dict(zip(names, r)) for r in zip(*cols)]
+
+    def iter_records(self, rows, chunk_size=500, timings=None):
+        """Yield (raw row, record) pairs; conversion time goes to timings['convert']."""
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk: return
+            t0 = perf_counter()
+            records = self.records(chunk)
+            if timings is not None: timings['convert'] += perf_counter() - t0
+            yield from zip(chunk, records)
+
+    def year(self, row, default):
+        """Year of the record's date column, read from the raw value; default when missing or unparseable."""
+        if self._year_idx is None: return default
+        v = row[self._year_idx]
+        cls = v.__class__
+        if cls is datetime.datetime or cls is datetime.date: return v.year
+        if cls is not str: v = convert_value(v)
+        if v and isinstance(v, str) and len(v) >= 4:
+            try: return int(v[:4])
+            except ValueError: pass
+        return default
@@ -0,0 +1,154 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+
+
+class StateStore:
+    """SQLite-backed per-record sync state, keyed by doc_id.
+
+    Behaves like the dict that used to be dumped to sync_state.json
+    (get / [] / in / len), but records are read on demand and every
+    assignment is an upsert inside the current transaction. commit() makes
+    the pending upserts durable atomically; a crash before that leaves the
+    previous committed state intact.
+    """
+
+    def __init__(self, db_path, legacy_json_path=None):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS records (doc_id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        if legacy_json_path:
+            self._migrate_json(legacy_json_path)
+
+    def get(self, doc_id, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM records WHERE doc_id = ?", (doc_id,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def __getitem__(self, doc_id):
+        value = self.get(doc_id)
+        if value is None: raise KeyError(doc_id)
+        return value
+
+    def __setitem__(self, doc_id, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO records (doc_id, data) VALUES (?, ?)",
+                               (doc_id, json.dumps(value, default=str)))
+
+    def __delitem__(self, doc_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM records WHERE doc_id = ?", (doc_id,))
+
+    def __contains__(self, doc_id):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM records WHERE doc_id = ?", (doc_id,)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def rollback(self):
+        with self._lock:
+            self._conn.rollback()
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def _migrate_json(self, json_path):
+        """One-time import of the old sync_state.json; the file is renamed afterwards."""
+        if not os.path.exists(json_path): return
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone(): return
+            try:
+                with open(json_path, 'r') as f:
+                    legacy = json.load(f)
+            except Exception as e:
+                logging.warning(f"Legacy state unreadable, starting fresh: {e}")
+                legacy = {}
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO records (doc_id, data) VALUES (?, ?)",
+                                       ((k, json.dumps(v, default=str)) for k, v in legacy.items()))
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", (json_path,))
+        try: os.replace(json_path, json_path + '.migrated')
+        except OSError: pass
+        logging.info(f"Migrated {len(legacy)} records from {os.path.basename(json_path)} to {os.path.basename(self.db_path)}")
+
+    def partition(self, name):
+        return StatePartition(self, name)
+
+    def set_meta(self, key, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value, default=str)))
+
+    def delete_meta(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+
+class StatePartition:
+    """Per-table view of a StateStore for tables that sync concurrently.
+
+    Records stay keyed by the global doc_id (same ids as Firestore), so reads
+    and writes go straight to the shared store. What the partition adds is
+    its own bookkeeping and commit point: commit() makes a table's progress
+    durable as soon as that table finishes, and stores its last stats under
+    meta key 'table:<name>'. While a table syncs, checkpoint() commits the
+    writes so far and records how far it got under 'cycle:<name>'; finish()
+    drops that marker once the cycle has completed the table.
+    """
+
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+        self.writes = 0
+
+    def get(self, doc_id, default=None):
+        return self.store.get(doc_id, default)
+
+    def __getitem__(self, doc_id):
+        return self.store[doc_id]
+
+    def __setitem__(self, doc_id, value):
+        self.store[doc_id] = value
+        self.writes += 1
+
+    def __contains__(self, doc_id):
+        return doc_id in self.store
+
+    def commit(self, stats=None):
+        if stats is not None:
+            self.store.set_meta(f"table:{self.name}", dict(stats, writes=self.writes))
+        self.store.commit()
+
+    def last_stats(self):
+        return self.store.get_meta(f"table:{self.name}")
+
+    def checkpoint(self, progress):
+        self.store.set_meta(f"cycle:{self.name}", progress)
+        self.store.commit()
+
+    def interrupted(self):
+        """Progress left by a cycle that never finished this table, or None."""
+        return self.store.get_meta(f"cycle:{self.name}")
+
+    def finish(self):
+        self.store.delete_meta(f"cycle:{self.name}")
+        self.store.commit()
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+
+# Compact JSON element encoding (indent=None); indent=2 is the old pretty-printed layout
+COMPACT_SEPARATORS = (',', ':')
+
+
+def dumps_record(obj, indent=None):
+    separators = COMPACT_SEPARATORS if indent is None else None
+    return json.dumps(obj, ensure_ascii=False, indent=indent, separators=separators, default=str)
+
+
+def iter_rows(cursor, chunk_size=500, timings=None):
+    """Yield rows from an executed cursor, pulling them with fetchmany in chunks.
+
+    With a timings dict, time spent in fetchmany is added to timings['odbc_read'].
+    """
+    while True:
+        t0 = time.perf_counter()
+        chunk = cursor.fetchmany(chunk_size)
+        if timings is not None: timings['odbc_read'] += time.perf_counter() - t0
+        if not chunk:
+            break
+        for row in chunk:
+            yield row
+
+
+class JsonArrayWriter:
+    """Write a JSON array to disk one element at a time.
+
+    Elements are written to a sibling temp file as they arrive and the file is
+    moved over the target on commit(), so a cycle that dies half-way never
+    leaves a truncated latest_data.json behind.
+    """
+
+    def __init__(self, path, indent=2):
+        self.path = path
+        self.indent = indent
+        self.count = 0
+        self._tmp_path = path + '.tmp'
+        self._fh = open(self._tmp_path, 'w', encoding='utf-8')
+        self._fh.write('[')
+
+    def write(self, obj):
+        self._fh.write(',\n' if self.count else '\n')
+        self._fh.write(dumps_record(obj, self.indent))
+        self.count += 1
+
+    def commit(self):
+        if self._fh is None: return
+        self._fh.write('\n]' if self.count else ']')
+        self._fh.close()
+        self._fh = None
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        if self._fh is None: return
+        self._fh.close()
+        self._fh = None
+        try: os.remove(self._tmp_path)
+        except OSError: pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None: self.commit()
+        else: self.abort()
+        return False
+
+
+class BufferedJsonWriter:
+    """Legacy sink: keep every element in memory and dump the list on commit()."""
+
+    def __init__(self, path, indent=2):
+        self.path = path
+        self.indent = indent
+        self.records = []
+
+    @property
+    def count(self):
+        return len(self.records)
+
+    def write(self, obj):
+        self.records.append(obj)
+
+    def commit(self):
+        separators = COMPACT_SEPARATORS if self.indent is None else None
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.records, f, ensure_ascii=False, indent=self.indent, separators=separators, default=str)
+
+    def abort(self):
+        self.records = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None: self.commit()
+        else: self.abort()
+        return False
+
+
+class NdjsonWriter(JsonArrayWriter):
+    """Same sink contract, one compact JSON record per line."""
+
+    def __init__(self, path):
+        self.path = path
+        self.indent = None
+        self.count = 0
+        self._tmp_path = path + '.tmp'
+        self._fh = open(self._tmp_path, 'w', encoding='utf-8')
+
+    def write(self, obj):
+        self._fh.write(dumps_record(obj) + '\n')
+        self.count += 1
+
+    def commit(self):
+        if self._fh is None: return
+        self._fh.close()
+        self._fh = None
+        os.replace(self._tmp_path, self.path)
+
+
+class TeeWriter:
+    """Fan one record stream out to several sinks; commit/abort apply to all of them."""
+
+    def __init__(self, *writers):
+        self.writers = writers
+
+    @property
+    def count(self):
+        return self.writers[0].count
+
+    def write(self, obj):
+        for w in self.writers: w.write(obj)
+
+    def commit(self):
+        for w in self.writers: w.commit()
+
+    def abort(self):
+        for w in self.writers: w.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None: self.commit()
+        else: self.abort()
+        return False
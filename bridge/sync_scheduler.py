@@ -0,0 +1,141 @@
+import time
+import logging
+import threading
+
+# Trigger priorities: a higher one wins when triggers are coalesced
+PRIORITY_PERIODIC = 0
+PRIORITY_SIGNAL = 1
+PRIORITY_MANUAL = 2
+
+PRIORITY_NAMES = {PRIORITY_PERIODIC: 'periodic', PRIORITY_SIGNAL: 'signal', PRIORITY_MANUAL: 'manual'}
+
+# Windows truncates tray tooltips at 128 characters
+TOOLTIP_MAX = 127
+
+
+def tooltip_text(summary, last_sync, detail='', limit=TOOLTIP_MAX):
+    """Tray tooltip: scheduler state and last sync first, then as much of detail (metrics) as still fits."""
+    text = f"MailTrackerPro | {summary}\nLast Sync: {last_sync}"[:limit]
+    room = limit - len(text) - 3
+    if detail and room > 0:
+        text += " | " + (detail if len(detail) <= room else detail[:room - 1] + "~")
+    return text
+
+
+class SyncRequest:
+    def __init__(self, reason, priority, force):
+        self.reason = reason
+        self.priority = priority
+        self.force = force
+        self.queued_at = time.monotonic()
+        self.coalesced = 0
+
+    def merge(self, reason, priority, force):
+        """Fold another trigger into this pending run; the higher priority names it."""
+        self.coalesced += 1
+        self.force = self.force or force
+        if priority > self.priority:
+            self.priority, self.reason = priority, reason
+
+
+class SyncScheduler:
+    """Single-flight sync runner.
+
+    All triggers go through request(); exactly one worker thread calls
+    run_sync(force=...), so cycles never overlap. Triggers that arrive while
+    a cycle is running collapse into one pending follow-up run, which keeps
+    the highest priority and forces the run if any trigger asked for it.
+    on_change() is called whenever the queue or running state changes.
+    """
+
+    def __init__(self, run_sync, on_change=None):
+        self.run_sync = run_sync
+        self.on_change = on_change
+        self.pending = None
+        self.running = None
+        self.running_since = None
+        self.runs = 0
+        self.coalesced = 0
+        self.last_wait = 0.0
+        self.max_wait = 0.0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._worker, name='SyncScheduler', daemon=True)
+        self._thread.start()
+
+    def request(self, reason, priority=PRIORITY_PERIODIC, force=False):
+        with self._cond:
+            if self._stopped: return False
+            if self.pending:
+                logging.info(f"Sync trigger '{reason}' coalesced into pending '{self.pending.reason}' run.")
+                self.pending.merge(reason, priority, force)
+                self.coalesced += 1
+            else:
+                self.pending = SyncRequest(reason, priority, force)
+                if self.running:
+                    logging.info(f"Sync trigger '{reason}' queued behind running '{self.running.reason}' cycle.")
+            self._cond.notify()
+        self._changed()
+        return True
+
+    def stop(self, timeout=None):
+        with self._cond:
+            self._stopped = True
+            self.pending = None
+            self._cond.notify()
+        if timeout is not None: self._thread.join(timeout)
+
+    def queue_depth(self):
+        """Cycles running or waiting (0, 1 or 2)."""
+        return (1 if self.running else 0) + (1 if self.pending else 0)
+
+    def status(self):
+        with self._cond:
+            now = time.monotonic()
+            return {
+                'running': self.running.reason if self.running else None,
+                'runningFor': round(now - self.running_since, 1) if self.running else 0,
+                'pending': self.pending.reason if self.pending else None,
+                'pendingWait': round(now - self.pending.queued_at, 1) if self.pending else 0,
+                'depth': self.queue_depth(),
+                'runs': self.runs,
+                'coalesced': self.coalesced,
+                'lastWait': round(self.last_wait, 1),
+                'maxWait': round(self.max_wait, 1)
+            }
+
+    def summary(self):
+        """Short one-line state for the tray tooltip."""
+        s = self.status()
+        parts = []
+        if s['running']: parts.append(f"syncing ({s['running']}, {s['runningFor']:.0f}s)")
+        if s['pending']: parts.append(f"queued: {s['pending']}, waiting {s['pendingWait']:.0f}s")
+        if not parts: parts.append(f"idle, last wait {s['lastWait']:.0f}s")
+        return f"depth {s['depth']} | " + "; ".join(parts)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self.pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped: return
+                req, self.pending = self.pending, None
+                self.running, self.running_since = req, time.monotonic()
+                self.last_wait = self.running_since - req.queued_at
+                self.max_wait = max(self.max_wait, self.last_wait)
+                self.runs += 1
+            self._changed()
+            extra = f", {req.coalesced} trigger(s) coalesced" if req.coalesced else ""
+            logging.info(f"Sync cycle start: {req.reason} ({PRIORITY_NAMES.get(req.priority, req.priority)}), waited {self.last_wait:.1f}s{extra}")
+            try:
+                self.run_sync(force=req.force)
+            except Exception as e:
+                logging.error(f"Sync Thread Error: {e}")
+            with self._cond:
+                self.running, self.running_since = None, None
+            self._changed()
+
+    def _changed(self):
+        if not self.on_change: return
+        try: self.on_change()
+        except Exception: pass
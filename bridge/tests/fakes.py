@@ -0,0 +1,577 @@
+"""Offline stand-ins for the bridge's external systems.
+
+- SQLite-backed Access source: build_source_db() writes agenda tables plus a
+  synthetic LAMPIRAN SURAT attachment table; FakeOdbc (pyodbc) and
+  FakeDaoEngine (DAO via win32com) read it with the same calls the bridge
+  makes against a real .accdb.
+- FakeFirestore: in-memory client with document set/update/get and batches.
+- FakeDrive: files/permissions/changes endpoints with configurable latency
+  and injected rate-limit errors.
+
+install(bridge_logic, ...) swaps these into an imported bridge_logic module.
+Every fake counts its calls so benchmarks can report API calls per record.
+"""
+import os
+import time
+import random
+import struct
+import sqlite3
+import hashlib
+import datetime
+import threading
+from types import SimpleNamespace
+
+AGENDA_PREFIX = "DATA AGENDA SURAT MASUK"
+COLUMNS = [
+    ('NO URUT', 'INTEGER'),
+    ('TANGGAL SURAT DITERIMA', 'TIMESTAMP'),
+    ('NOMOR SURAT', 'TEXT'),
+    ('TANGGAL SURAT', 'TIMESTAMP'),
+    ('ASAL SURAT', 'TEXT'),
+    ('PERIHAL', 'TEXT'),
+    ('DISPOSISI', 'TEXT'),
+    ('KETERANGAN', 'TEXT'),
+    ('LAMPIRAN SURAT', 'BLOB'),
+]
+PY_TYPES = {'INTEGER': int, 'TIMESTAMP': datetime.datetime, 'TEXT': str, 'BLOB': bytearray}
+DAO_TYPES = {'INTEGER': 4, 'TIMESTAMP': 8, 'TEXT': 10, 'BLOB': 11}  # dbLong, dbDate, dbText, dbLongBinary
+ATTACHMENT_TABLE = '__attachments'
+
+
+def _q(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql(query):
+    """Access [bracket] identifiers -> SQLite "quoted" identifiers."""
+    return query.replace('[', '"').replace(']', '"')
+
+
+# --- Source database --------------------------------------------------------
+
+def build_source_db(path, rows=10000, years=(2025,), attachment_ratio=0.05, attachment_size=32 * 1024, seed=1):
+    """Create a SQLite file shaped like the agenda .accdb; returns the table names."""
+    if os.path.exists(path): os.remove(path)
+    rnd = random.Random(seed)
+    conn = sqlite3.connect(path)
+    tables = []
+    with conn:
+        conn.execute(f"CREATE TABLE {ATTACHMENT_TABLE} (table_name TEXT, no_urut INTEGER, file_name TEXT, data BLOB)")
+        for year in years:
+            table = f"{AGENDA_PREFIX} {year}"
+            tables.append(table)
+            cols = ", ".join(f"{_q(c)} {t}" for c, t in COLUMNS)
+            conn.execute(f"CREATE TABLE {_q(table)} ({cols})")
+            start = datetime.datetime(year, 1, 2, 8, 0)
+            conn.executemany(
+                f"INSERT INTO {_q(table)} VALUES ({', '.join('?' * len(COLUMNS))})",
+                (_make_row(i, start) for i in range(rows))
+            )
+            att = []
+            for i in range(rows):
+                if rnd.random() < attachment_ratio:
+                    for n in range(1 + (rnd.random() < 0.2)):
+                        att.append((table, i + 1, f"scan_{i + 1}_{n}.pdf", rnd.randbytes(attachment_size)))
+            conn.executemany(f"INSERT INTO {ATTACHMENT_TABLE} VALUES (?, ?, ?, ?)", att)
+    conn.close()
+    return tables
+
+
+def _make_row(i, start):
+    day = start + datetime.timedelta(minutes=7 * i)
+    return (i + 1, day, f"B/{i + 1}/UN.1/{day.year}", day, f"Fakultas Contoh {i % 37}",
+            f"Permohonan data dan informasi nomor {i}", "Wakil Rektor I", "Segera ditindaklanjuti", None)
+
+
+def mutate_source_db(path, fraction=0.01, seed=2):
+    """Edit PERIHAL on `fraction` of the rows of every agenda table; returns rows changed."""
+    rnd = random.Random(seed)
+    conn = sqlite3.connect(path)
+    changed = 0
+    with conn:
+        tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'") if r[0].startswith(AGENDA_PREFIX)]
+        for table in tables:
+            total = conn.execute(f"SELECT COUNT(*) FROM {_q(table)}").fetchone()[0]
+            picks = rnd.sample(range(1, total + 1), max(1, int(total * fraction)))
+            conn.executemany(f'UPDATE {_q(table)} SET "PERIHAL" = "PERIHAL" || \' (revisi)\' WHERE "NO URUT" = ?',
+                             ((p,) for p in picks))
+            changed += len(picks)
+    conn.close()
+    return changed
+
+
+# --- pyodbc stand-in --------------------------------------------------------
+
+class _Table:
+    def __init__(self, name):
+        self.table_name = name
+
+
+class FakeOdbcCursor:
+    def __init__(self, conn, read_latency=0.0):
+        self._conn = conn
+        self._read_latency = read_latency
+        self._cur = None
+        self.description = None
+
+    def tables(self, tableType=None):
+        rows = self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        return [_Table(r[0]) for r in rows if r[0] != ATTACHMENT_TABLE]
+
+    def execute(self, query, *params):
+        self._cur = self._conn.execute(_sql(query), params)
+        table = query.split('FROM', 1)[1].strip().split(']')[0].lstrip('[')
+        declared = {r[1]: r[2] for r in self._conn.execute(f"PRAGMA table_info({_q(table)})")}
+        # pyodbc reports the Python type of each column as type_code
+        self.description = [(d[0], PY_TYPES.get(declared.get(d[0]), str), None, None, None, None, True)
+                            for d in self._cur.description]
+        return self
+
+    def fetchmany(self, size):
+        return self._fetched(self._cur.fetchmany(size))
+
+    def fetchall(self):
+        return self._fetched(self._cur.fetchall())
+
+    def _fetched(self, rows):
+        if self._read_latency and rows: time.sleep(len(rows) / 1000 * self._read_latency)
+        return rows
+
+
+class FakeOdbcConnection:
+    def __init__(self, path, read_latency=0.0):
+        self._conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        self._read_latency = read_latency
+
+    def cursor(self):
+        return FakeOdbcCursor(self._conn, self._read_latency)
+
+    def close(self):
+        self._conn.close()
+
+
+class FakeOdbc:
+    """Module-shaped pyodbc replacement: connect() parses DBQ= from the connection string.
+
+    read_latency: seconds per 1000 rows fetched (a slow share or ODBC driver).
+    """
+
+    def __init__(self, read_latency=0.0):
+        self.connects = 0
+        self.read_latency = read_latency
+
+    def connect(self, conn_str, **kwargs):
+        self.connects += 1
+        path = conn_str.split('DBQ=', 1)[1].split(';', 1)[0]
+        return FakeOdbcConnection(path, self.read_latency)
+
+
+# --- DAO stand-in -----------------------------------------------------------
+
+def encode_attachment(data, wrapped=True):
+    """FileData of an attachment: header-prefixed bytes, by default inside the stored form's raw flag and length."""
+    header = struct.pack('<II', 12, 0) + 'pdf\0'.encode('utf-16-le')[:4]
+    content = header + data
+    return struct.pack('<II', 0, len(content)) + content if wrapped else content
+
+
+class _Field:
+    def __init__(self, value, dao_type=10, blob=None, wrapped=True):
+        self.Value = encode_attachment(blob, wrapped) if blob is not None else value
+        self.Type = dao_type
+        self._blob = blob
+
+    @property
+    def FieldSize(self):
+        return len(self._blob) if self._blob is not None else 0
+
+    def SaveToFile(self, path):
+        with open(path, 'wb') as f:
+            f.write(self._blob or b'')
+
+
+class _Recordset:
+    def __init__(self, rows):
+        self._rows = rows
+        self._i = 0
+
+    @property
+    def EOF(self):
+        return self._i >= len(self._rows)
+
+    def Fields(self, name):
+        return self._rows[self._i][name]
+
+    def MoveNext(self):
+        self._i += 1
+
+    def Close(self):
+        pass
+
+
+class FakeDaoDatabase:
+    def __init__(self, path, engine):
+        self._conn = sqlite3.connect(path)
+        self._engine = engine
+
+    def _children(self, table, no_urut):
+        rows = self._conn.execute(
+            f"SELECT file_name, data FROM {ATTACHMENT_TABLE} WHERE table_name = ? AND no_urut = ?", (table, no_urut)
+        ).fetchall()
+        wrapped = self._engine.file_data_wrapped
+        return _Recordset([{'FileName': _Field(n), 'FileData': _Field(None, 11, blob=b, wrapped=wrapped)} for n, b in rows])
+
+    def OpenRecordset(self, query, *options):
+        self._engine.recordsets += 1
+        table = query.split('FROM', 1)[1].strip().split(']')[0].lstrip('[')
+        if 'WHERE' in query:
+            key = query.rsplit('=', 1)[1].strip().strip("'")
+            rows = [] if not key.lstrip('-').isdigit() else [{'LAMPIRAN SURAT': _Field(self._children(table, int(key)))}]
+            return _Recordset(rows)
+        keys = [r[0] for r in self._conn.execute(f'SELECT "NO URUT" FROM {_q(table)}')]
+        return _Recordset([{'NO URUT': _Field(k, DAO_TYPES['INTEGER']),
+                            'LAMPIRAN SURAT': _Field(self._children(table, k))} for k in keys])
+
+    def Close(self):
+        self._conn.close()
+
+
+class FakeDaoEngine:
+    """file_data_wrapped=False hands FileData over already inflated, without the stored form's 8-byte prefix."""
+
+    def __init__(self, file_data_wrapped=True):
+        self.recordsets = 0
+        self.file_data_wrapped = file_data_wrapped
+
+    def OpenDatabase(self, path):
+        return FakeDaoDatabase(path, self)
+
+
+# --- Firestore stand-in -----------------------------------------------------
+
+class _Snapshot:
+    def __init__(self, data):
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocRef:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+
+    def set(self, data, merge=False, **kwargs):
+        self._db._call('writes')
+        self._db._put(self.path, data, merge)
+
+    def update(self, data, **kwargs):
+        self._db._call('writes')
+        self._db._put(self.path, data, True)
+
+    def get(self, **kwargs):
+        self._db._call('reads')
+        with self._db._lock:
+            return _Snapshot(self._db.docs.get(self.path))
+
+
+class FakeCollection:
+    def __init__(self, db, name):
+        self._db = db
+        self.name = name
+
+    def document(self, doc_id=None):
+        if doc_id is None:
+            with self._db._lock:
+                self._db._auto_id += 1
+                doc_id = f"auto{self._db._auto_id}"
+        return FakeDocRef(self._db, f"{self.name}/{doc_id}")
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self._db = db
+        self._ops = []
+
+    def set(self, ref, data, merge=False):
+        self._ops.append((ref.path, data, merge))
+
+    def commit(self):
+        self._db._call('commits', latency=self._db.commit_latency)
+        with self._db._lock:
+            self._db.counts['batched_writes'] += len(self._ops)
+        for path, data, merge in self._ops:
+            self._db._put(path, data, merge)
+
+
+class FakeFirestore:
+    """In-memory Firestore client (collection/document/batch) with call counters."""
+
+    def __init__(self, latency=0.0, commit_latency=0.0):
+        self.latency = latency
+        self.commit_latency = commit_latency
+        self.docs = {}
+        self.counts = {'reads': 0, 'writes': 0, 'commits': 0, 'batched_writes': 0}
+        self._auto_id = 0
+        self._lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def api_calls(self):
+        return self.counts['reads'] + self.counts['writes'] + self.counts['commits']
+
+    def _call(self, kind, latency=None):
+        with self._lock:
+            self.counts[kind] += 1
+        delay = self.latency if latency is None else latency
+        if delay: time.sleep(delay)
+
+    def _put(self, path, data, merge):
+        # Server timestamps resolve to the local clock
+        data = {k: time.time() if v is SERVER_TIMESTAMP else v for k, v in data.items()}
+        with self._lock:
+            self.docs[path] = dict(self.docs.get(path) or {}, **data) if merge else data
+
+
+SERVER_TIMESTAMP = object()
+firestore_module = SimpleNamespace(SERVER_TIMESTAMP=SERVER_TIMESTAMP)
+google_exceptions_module = SimpleNamespace(PermissionDenied=type('PermissionDenied', (Exception,), {}))
+
+
+# --- Drive stand-in ---------------------------------------------------------
+
+class FakeHttpError(Exception):
+    """Shaped like googleapiclient HttpError: .resp.status plus a reason in the message."""
+
+    def __init__(self, status, reason):
+        super().__init__(f"<HttpError {status} \"{reason}\">")
+        self.resp = SimpleNamespace(status=status)
+
+
+class FakeMediaFileUpload:
+    def __init__(self, filename, mimetype=None, resumable=False, **kwargs):
+        self.filename = filename
+        self.mimetype = mimetype
+        self.resumable = resumable
+        self.size = os.path.getsize(filename)
+        with open(filename, 'rb') as f:
+            self.md5 = hashlib.md5(f.read()).hexdigest()
+
+
+class FakeMediaIoBaseUpload:
+    def __init__(self, fd, mimetype=None, resumable=False, **kwargs):
+        self.mimetype = mimetype
+        self.resumable = resumable
+        self.size = len(fd.getvalue())
+        self.md5 = hashlib.md5(fd.getvalue()).hexdigest()
+
+
+class _Request:
+    def __init__(self, drive, kind, fn):
+        self._drive, self._kind, self._fn = drive, kind, fn
+
+    def execute(self, **kwargs):
+        return self._drive._execute(self._kind, self._fn)
+
+
+class _Batch:
+    """BatchHttpRequest stand-in: one counted request; inner calls may fail (429) individually."""
+
+    def __init__(self, drive, callback):
+        self._drive, self._callback, self._requests = drive, callback, []
+
+    def add(self, request, callback=None, request_id=None):
+        self._requests.append((request, callback or self._callback, request_id or str(len(self._requests))))
+
+    def execute(self, **kwargs):
+        return self._drive._execute('batch', self._run)
+
+    def _run(self):
+        for request, callback, request_id in self._requests:
+            with self._drive._lock:
+                self._drive.batched[request._kind] = self._drive.batched.get(request._kind, 0) + 1
+                fail = self._drive.error_rate and self._drive._rnd.random() < self._drive.error_rate
+                if fail: self._drive.errors += 1
+            try:
+                if fail: raise FakeHttpError(429, 'rateLimitExceeded')
+                response, exc = request._fn(), None
+            except Exception as e:
+                response, exc = None, e
+            if callback: callback(request_id, response, exc)
+
+
+class _Files:
+    def __init__(self, drive):
+        self._d = drive
+
+    def list(self, q='', pageSize=100, pageToken=None, **kwargs):
+        return _Request(self._d, 'files.list', lambda: self._d._list(q, pageSize, pageToken))
+
+    def create(self, body=None, media_body=None, fields=None, **kwargs):
+        return _Request(self._d, 'files.create', lambda: self._d._create(body or {}, media_body))
+
+    def update(self, fileId=None, media_body=None, **kwargs):
+        return _Request(self._d, 'files.update', lambda: self._d._update(fileId, media_body))
+
+    def delete(self, fileId=None, **kwargs):
+        return _Request(self._d, 'files.delete', lambda: self._d._delete(fileId))
+
+
+class _Permissions:
+    def __init__(self, drive):
+        self._d = drive
+
+    def create(self, fileId=None, body=None, **kwargs):
+        return _Request(self._d, 'permissions.create', lambda: {'id': 'anyoneWithLink'})
+
+
+class _Changes:
+    def __init__(self, drive):
+        self._d = drive
+
+    def getStartPageToken(self, **kwargs):
+        return _Request(self._d, 'changes.getStartPageToken', lambda: {'startPageToken': str(self._d._seq)})
+
+    def list(self, pageToken=None, **kwargs):
+        return _Request(self._d, 'changes.list', lambda: self._d._changes_since(int(pageToken)))
+
+
+class FakeDrive:
+    """Drive v3 service stand-in.
+
+    latency: seconds per request (upload_latency_per_mb is added for media).
+    error_rate: share of requests failing with a 429/rateLimitExceeded, which
+    the request governor retries. Thread-safe, so the upload pool can share it.
+    """
+
+    def __init__(self, latency=0.0, upload_latency_per_mb=0.0, error_rate=0.0, seed=3):
+        self.latency = latency
+        self.upload_latency_per_mb = upload_latency_per_mb
+        self.error_rate = error_rate
+        self.files_by_id = {}
+        self.calls = {}
+        self.batched = {}  # calls sent inside batch requests, by kind
+        self.errors = 0
+        self.bytes_uploaded = 0
+        self._seq = 1
+        self._log = []
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def files(self):
+        return _Files(self)
+
+    def permissions(self):
+        return _Permissions(self)
+
+    def changes(self):
+        return _Changes(self)
+
+    def new_batch_http_request(self, callback=None):
+        return _Batch(self, callback)
+
+    def api_calls(self):
+        return sum(self.calls.values())
+
+    def _execute(self, kind, fn):
+        with self._lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+            fail = self.error_rate and self._rnd.random() < self.error_rate
+            if fail: self.errors += 1
+        if self.latency: time.sleep(self.latency)
+        if fail: raise FakeHttpError(429, 'rateLimitExceeded')
+        return fn()
+
+    def _record(self, f, removed=False):
+        self._seq += 1
+        self._log.append((self._seq, f['id'], removed))
+
+    def _list(self, q, page_size, page_token):
+        name = q.split("name = '", 1)[1].split("'", 1)[0] if "name = '" in q else None
+        md5 = q.split("key='contentMd5' and value='", 1)[1].split("'", 1)[0] if "key='contentMd5'" in q else None
+        with self._lock:
+            files = [f for f in self.files_by_id.values() if (name is None or f['name'] == name)
+                     and (md5 is None or f.get('appProperties', {}).get('contentMd5') == md5)]
+        start = int(page_token or 0)
+        page = files[start:start + page_size]
+        res = {'files': [dict(f) for f in page]}
+        if start + page_size < len(files): res['nextPageToken'] = str(start + page_size)
+        return res
+
+    def _media_delay(self, media):
+        if media is None: return
+        with self._lock:
+            self.bytes_uploaded += media.size
+        if self.upload_latency_per_mb:
+            time.sleep(self.upload_latency_per_mb * media.size / (1024 * 1024))
+
+    def _create(self, body, media):
+        self._media_delay(media)
+        with self._lock:
+            fid = f"fake{len(self.files_by_id) + 1:07d}"
+            size = media.size if media else 0
+            f = {'id': fid, 'name': body.get('name'), 'parents': body.get('parents', []), 'size': str(size),
+                 'md5Checksum': getattr(media, 'md5', None) or hashlib.md5(fid.encode()).hexdigest()}
+            if body.get('appProperties'): f['appProperties'] = dict(body['appProperties'])
+            self.files_by_id[fid] = f
+            self._record(f)
+            return dict(f)
+
+    def _update(self, file_id, media):
+        self._media_delay(media)
+        with self._lock:
+            f = self.files_by_id.get(file_id)
+            if not f: raise FakeHttpError(404, 'notFound')
+            f['size'] = str(media.size if media else 0)
+            if getattr(media, 'md5', None): f['md5Checksum'] = media.md5
+            self._record(f)
+            return dict(f)
+
+    def _delete(self, file_id):
+        with self._lock:
+            if self.files_by_id.pop(file_id, None): self._record({'id': file_id}, removed=True)
+        return {}
+
+    def _changes_since(self, token):
+        with self._lock:
+            changes = []
+            for seq, fid, removed in self._log:
+                if seq <= token: continue
+                f = self.files_by_id.get(fid)
+                if removed or not f: changes.append({'fileId': fid, 'removed': True})
+                else: changes.append({'fileId': fid, 'removed': False, 'file': dict(f, trashed=False)})
+            return {'changes': changes, 'newStartPageToken': str(self._seq)}
+
+
+# --- Wiring -----------------------------------------------------------------
+
+def install(bridge_logic, odbc=None, dao_engine=None):
+    """Point an imported bridge_logic module at the stand-ins (ODBC, DAO/COM, Firestore, Drive media)."""
+    odbc = odbc or FakeOdbc()
+    dao_engine = dao_engine or FakeDaoEngine()
+    bridge_logic.pyodbc = odbc
+    bridge_logic.HAS_DAO = True
+    bridge_logic.win32com = SimpleNamespace(client=SimpleNamespace(Dispatch=lambda progid: dao_engine))
+    bridge_logic.pythoncom = SimpleNamespace(CoInitialize=lambda: None, CoUninitialize=lambda: None)
+    bridge_logic.HAS_GOOGLE = False
+    bridge_logic.HAS_FIREBASE = False
+    bridge_logic.MediaFileUpload = FakeMediaFileUpload
+    bridge_logic.MediaIoBaseUpload = FakeMediaIoBaseUpload
+    bridge_logic.firestore = firestore_module
+    bridge_logic.google_exceptions = google_exceptions_module
+    return odbc, dao_engine
+
+
+def attach(bridge, firestore_db, drive, folder_id='bench-folder'):
+    """Give a constructed BridgeLogic the fake Firestore/Drive clients."""
+    bridge.firestore_db = firestore_db
+    bridge.drive_service = drive
+    bridge.drive_folder_id = folder_id
+    bridge._drive_creds = object()
+    bridge._build_drive_service = lambda: drive
@@ -0,0 +1,293 @@
+"""Build agenda.accdb, the small ACE fixture behind tests/test_accdb_reader.py.
+
+Writes one agenda table shaped like the real source (long, date, text, memo
+and attachment columns) with the Jet4/ACE page layout: catalog and
+MSysComplexColumns, table definitions, inline usage maps, data pages and
+LVAL pages. Memo values cover the three long-value forms (inline, one row,
+a chain of rows over several pages) and attachments are stored raw and
+deflated. The output is deterministic. Usage:
+
+    python tests/fixtures/make_agenda_accdb.py [path]
+"""
+import os
+import sys
+import zlib
+import struct
+import datetime
+
+PAGE_SIZE = 4096
+TABLE = 'DATA AGENDA SURAT MASUK 2025'
+ACCESS_EPOCH = datetime.datetime(1899, 12, 30)
+
+T_LONG, T_INT, T_DATETIME, T_TEXT, T_OLE, T_MEMO, T_COMPLEX = 0x04, 0x03, 0x08, 0x0A, 0x0B, 0x0C, 0x12
+FIXED_SIZES = {T_LONG: 4, T_INT: 2, T_DATETIME: 8, T_COMPLEX: 4}
+PACK = {T_LONG: '<i', T_INT: '<h', T_COMPLEX: '<i'}
+
+# Page numbers
+USAGE_PAGE, CATALOG_PAGE, CATALOG_DATA = 1, 2, 3
+COMPLEX_PAGE, COMPLEX_DATA = 4, 5
+AGENDA_PAGE, AGENDA_DATA = 6, 7
+FLAT_PAGE, FLAT_DATA = 8, 9
+LVAL_START = 10
+COMPLEX_ID = 1
+
+AGENDA_COLUMNS = [
+    ('NO URUT', T_LONG), ('TANGGAL SURAT DITERIMA', T_DATETIME), ('NOMOR SURAT', T_TEXT),
+    ('TANGGAL SURAT', T_DATETIME), ('ASAL SURAT', T_TEXT), ('PERIHAL', T_TEXT),
+    ('DISPOSISI', T_TEXT), ('KETERANGAN', T_MEMO), ('LAMPIRAN SURAT', T_COMPLEX),
+]
+
+# Row values as the Access ODBC driver returns them (the attachment column reads as None)
+ROWS = [
+    (1, datetime.datetime(2025, 1, 2, 8, 30), '005/UND/I/2025', datetime.datetime(2024, 12, 30),
+     'Dinas Pendidikan', 'Undangan rapat koordinasi', 'Kasubag Umum', 'Hadir tepat waktu', None),
+    (2, datetime.datetime(2025, 1, 3, 13, 45, 10), '118/SE/2025', None,
+     'Bādan Ādministrasi Ŝtate', 'Surat edaran — jam kerja', None, 'Catatan disposisi. ' * 60, None),
+    (4, datetime.datetime(2025, 2, 14, 9, 0), 'B-77/KP/II/2025', datetime.datetime(2025, 2, 10),
+     'Kantor Pusat', 'Laporan tahunan', 'Sekretaris', 'Ringkasan laporan tahunan, bagian ' * 150, None),
+    (5, datetime.datetime(2025, 3, 1), '', datetime.datetime(1899, 12, 29, 18, 0),
+     'Arsip', 'Dokumen lama', None, None, None),
+    (7, datetime.datetime(2025, 12, 31, 23, 59, 59), '900/X/2025', datetime.datetime(2025, 12, 31),
+     'Inspektorat', 'Pemeriksaan', 'Kepala', None, None),
+]
+DELETED_ROW = (3, datetime.datetime(2025, 1, 5), 'DIHAPUS', None, 'x', 'x', None, None, None)
+
+# NO URUT -> [(file name, content, stored deflated, timestamp)]
+ATTACHMENTS = {
+    1: [('undangan.pdf', b'%PDF-1.4\n' + bytes(range(256)) * 4 + b'\n%%EOF\n', False, datetime.datetime(2025, 1, 2, 8, 0)),
+        ('daftar hadir.txt', b'Nama;Jabatan\n' + b'Peserta;Staf\n' * 300, True, datetime.datetime(2025, 1, 2, 8, 5))],
+    4: [('laporan.txt', ''.join(f"baris {i:05d} laporan\n" for i in range(600)).encode(), False, datetime.datetime(2025, 2, 14, 9, 0)),
+        ('a.bin', b'\x00\x01\x02', False, None)],
+}
+
+
+def _u16(v): return struct.pack('<H', v)
+def _u32(v): return struct.pack('<I', v & 0xFFFFFFFF)
+
+
+def encode_text(s, compressed=False):
+    """UTF-16LE, or Jet4 compressed unicode when every character fits in one byte."""
+    if compressed and all(ord(ch) < 256 and ch != '\x00' for ch in s):
+        return b'\xff\xfe' + s.encode('latin-1')
+    return s.encode('utf-16-le')
+
+
+def encode_datetime(dt):
+    # Days since 1899-12-30 plus the absolute fraction of the day (also before the epoch)
+    day = datetime.datetime(dt.year, dt.month, dt.day)
+    days = (day - ACCESS_EPOCH).days
+    frac = (dt - day).total_seconds() / 86400
+    return struct.pack('<d', days - frac if days < 0 else days + frac)
+
+
+def encode_attachment(name, content, deflate):
+    """FileData: flag and content length, then the (maybe deflated) header-prefixed file."""
+    ext = encode_text(os.path.splitext(name)[1].lstrip('.')) + b'\x00\x00'
+    body = _u32(12 + len(ext)) + _u32(1) + _u32(len(ext)) + ext + content
+    return _u32(1 if deflate else 0) + _u32(len(body)) + (zlib.compress(body, 9) if deflate else body)
+
+
+class Column:
+    def __init__(self, name, type, col_num, var_num=0, fixed_offset=0, flags=0x02, misc=0):
+        self.name, self.type, self.col_num, self.var_num = name, type, col_num, var_num
+        self.fixed_offset, self.flags, self.misc = fixed_offset, flags, misc
+        self.fixed = type in FIXED_SIZES
+        self.size = FIXED_SIZES.get(type, 255 if type == T_TEXT else 0)
+        if self.fixed: self.flags |= 0x01
+
+
+def columns(spec, autonumber=(), complex_id=0):
+    out, fixed_off, var_num = [], 0, 0
+    for i, (name, t) in enumerate(spec):
+        c = Column(name, t, i, misc=complex_id if t == T_COMPLEX else 0)
+        if c.fixed:
+            c.fixed_offset = fixed_off
+            fixed_off += c.size
+        else:
+            c.var_num = var_num
+            var_num += 1
+        if name in autonumber: c.flags |= 0x04
+        out.append(c)
+    return out
+
+
+class Builder:
+    def __init__(self):
+        self.pages = {}
+        self.lval = []  # rows of LVAL pages LVAL_START, LVAL_START + 1, ...
+        self.usage_rows = []
+
+    # --- Long values --------------------------------------------------------
+
+    def _lval_row(self, data):
+        """Place one LVAL row on the first page with room (or a new page); returns its pg_row."""
+        for i, rows in enumerate(self.lval + [[]]):
+            if sum(len(r) + 2 for r in rows) + len(data) + 2 <= PAGE_SIZE - 16:
+                if not rows: self.lval.append(rows)
+                rows.append(data)
+                return LVAL_START + i << 8 | len(rows) - 1
+        raise ValueError(f"long value row too big: {len(data)} bytes")
+
+    def long_value(self, data, form):
+        """12-byte memo/OLE field: 'inline', 'row' (one LVAL row) or 'chain' (rows linked across pages)."""
+        if form == 'inline':
+            return _u32(len(data) | 0x80000000) + _u32(0) + _u32(0) + data
+        if form == 'row':
+            return _u32(len(data) | 0x40000000) + _u32(self._lval_row(data)) + _u32(0)
+        # Chunks too big to share a page, written back to front so every row knows the next one
+        nxt = 0
+        for i in reversed(range(0, len(data), 3000)):
+            nxt = self._lval_row(_u32(nxt) + data[i:i + 3000])
+        return _u32(len(data)) + _u32(nxt) + _u32(0)
+
+    # --- Rows and pages -----------------------------------------------------
+
+    @staticmethod
+    def row(cols, values):
+        """Jet4 row: column count, fixed area, variable data, then offsets (reversed), count and null mask."""
+        fixed = bytearray(sum(c.size for c in cols if c.fixed))
+        var_cols = sorted((c for c in cols if not c.fixed), key=lambda c: c.var_num)
+        mask = bytearray((len(cols) + 7) // 8)
+        var_data, offsets = bytearray(), []
+        start = 2 + len(fixed)
+        by_col = dict(zip((c.col_num for c in cols), values))
+        for c in cols:
+            if by_col[c.col_num] is not None: mask[c.col_num // 8] |= 1 << c.col_num % 8
+        for c in cols:
+            v = by_col[c.col_num]
+            if c.fixed and v is not None:
+                raw = encode_datetime(v) if c.type == T_DATETIME else struct.pack(PACK[c.type], v)
+                fixed[c.fixed_offset:c.fixed_offset + c.size] = raw
+        for c in var_cols:
+            offsets.append(start + len(var_data))
+            v = by_col[c.col_num]
+            if v is not None: var_data += v
+        eod = start + len(var_data)
+        tail = _u16(eod) + b''.join(_u16(o) for o in reversed(offsets)) + _u16(len(var_cols))
+        return _u16(len(cols)) + bytes(fixed) + bytes(var_data) + tail + bytes(mask)
+
+    @staticmethod
+    def data_page(owner, rows, deleted=(), lval=False):
+        page = bytearray(PAGE_SIZE)
+        page[0:2] = b'\x01\x01'
+        page[4:8] = b'LVAL' if lval else _u32(owner)
+        page[12:14] = _u16(len(rows))
+        end = PAGE_SIZE
+        for i, r in enumerate(rows):
+            start = end - len(r)
+            page[start:end] = r
+            page[14 + 2 * i:16 + 2 * i] = _u16(start | (0x8000 if i in deleted else 0))
+            end = start
+        page[2:4] = _u16(end - 14 - 2 * len(rows))
+        return bytes(page)
+
+    def usage_map(self, pages):
+        """Inline usage map row (type 0: start page, then one bit per page); returns its pg_row."""
+        bits = bytearray(64)
+        for p in pages: bits[p // 8] |= 1 << p % 8
+        self.usage_rows.append(b'\x00' + _u32(0) + bytes(bits))
+        return USAGE_PAGE << 8 | len(self.usage_rows) - 1
+
+    def tdef(self, cols, num_rows, data_pages, system=False):
+        used = self.usage_map(data_pages)
+        free = self.usage_map(())
+        head = bytearray(63)
+        head[0:2] = b'\x02\x01'
+        head[2:4] = b'VC'
+        head[16:20] = _u32(num_rows)
+        head[40] = 0x53 if system else 0x4E
+        head[41:43] = _u16(len(cols))
+        head[43:45] = _u16(sum(1 for c in cols if not c.fixed))
+        head[45:47] = _u16(len(cols))
+        head[55:59] = _u32(used)
+        head[59:63] = _u32(free)
+        body = bytearray()
+        for c in cols:
+            d = bytearray(25)
+            d[0] = c.type
+            d[5:7], d[7:9], d[9:11] = _u16(c.col_num), _u16(c.var_num), _u16(c.col_num)
+            d[11:15] = _u32(c.misc)
+            d[15] = c.flags
+            d[21:23], d[23:25] = _u16(c.fixed_offset), _u16(c.size)
+            body += d
+        for c in cols:
+            name = c.name.encode('utf-16-le')
+            body += _u16(len(name)) + name
+        buf = head + body + b'\xff\xff'
+        buf[8:12] = _u32(len(buf))
+        return bytes(buf) + bytes(PAGE_SIZE - len(buf))
+
+    # --- File ---------------------------------------------------------------
+
+    @staticmethod
+    def header():
+        page = bytearray(PAGE_SIZE)
+        page[0:4] = b'\x00\x01\x00\x00'
+        page[4:20] = b'Standard ACE DB\x00'
+        page[0x14] = 0x02  # ACE 12 (Access 2007)
+        return bytes(page)
+
+    def build(self):
+        catalog_cols = columns([('Id', T_LONG), ('ParentId', T_LONG), ('Name', T_TEXT), ('Type', T_INT),
+                                ('DateCreate', T_DATETIME), ('Flags', T_LONG)])
+        complex_cols = columns([('ColumnName', T_TEXT), ('ComplexID', T_LONG), ('ComplexTypeObjectID', T_LONG),
+                                ('ConceptualTableID', T_LONG), ('FlatTableID', T_LONG)])
+        agenda_cols = columns(AGENDA_COLUMNS, complex_id=COMPLEX_ID)
+        flat_cols = columns([('FileData', T_OLE), ('FileFlags', T_LONG), ('FileName', T_TEXT), ('FileTimeStamp', T_DATETIME),
+                             ('FileType', T_TEXT), ('FileURL', T_MEMO), ('Id', T_LONG), ('ParentId', T_LONG)],
+                            autonumber=('Id',))
+        created = datetime.datetime(2025, 1, 1)
+
+        def cat(obj_id, name, obj_type, flags):
+            return self.row(catalog_cols, (obj_id, 0x0F000000, encode_text(name, True), obj_type, created, flags))
+        system = -0x7FFFFFFE  # 0x80000002
+        catalog = [cat(CATALOG_PAGE, 'MSysObjects', 1, system), cat(COMPLEX_PAGE, 'MSysComplexColumns', 1, system),
+                   cat(AGENDA_PAGE, TABLE, 1, 0), cat(FLAT_PAGE, 'f_0123456789ABCDEF_LAMPIRAN SURAT', 1, -0x7FF60000),
+                   cat(0, 'qryAgenda', 5, 0)]
+        complex_rows = [self.row(complex_cols, (encode_text('LAMPIRAN SURAT', True), COMPLEX_ID, 0, AGENDA_PAGE, FLAT_PAGE))]
+
+        memo_forms = {1: 'inline', 2: 'row', 4: 'chain'}
+        refs = {no: i + 1 for i, no in enumerate(sorted(ATTACHMENTS))}
+        agenda = []
+        for rec in ROWS[:2] + [DELETED_ROW] + ROWS[2:]:
+            no, received, number, dated, sender, subject, disposition, note, _ = rec
+            texts = [None if v is None else encode_text(v, compressed=True) for v in (number, sender, subject, disposition)]
+            memo = None
+            if note is not None:
+                # The multi-page memo stays UTF-16; the others are compressed
+                form = memo_forms.get(no, 'inline')
+                memo = self.long_value(encode_text(note, compressed=form != 'chain'), form)
+            agenda.append(self.row(agenda_cols, (no, received, texts[0], dated, texts[1], texts[2], texts[3], memo, refs.get(no))))
+
+        flat, file_id = [], 0
+        for no, files in sorted(ATTACHMENTS.items()):
+            for name, content, deflate, stamp in files:
+                file_id += 1
+                encoded = encode_attachment(name, content, deflate)
+                form = 'inline' if len(encoded) < 64 else 'row' if len(encoded) < 3000 else 'chain'
+                ext = os.path.splitext(name)[1].lstrip('.')
+                flat.append(self.row(flat_cols, (self.long_value(encoded, form), 0, encode_text(name, True), stamp,
+                                                 encode_text(ext, True), None, file_id, refs[no])))
+
+        self.pages[CATALOG_PAGE] = self.tdef(catalog_cols, len(catalog), [CATALOG_DATA], system=True)
+        self.pages[CATALOG_DATA] = self.data_page(CATALOG_PAGE, catalog)
+        self.pages[COMPLEX_PAGE] = self.tdef(complex_cols, len(complex_rows), [COMPLEX_DATA], system=True)
+        self.pages[COMPLEX_DATA] = self.data_page(COMPLEX_PAGE, complex_rows)
+        self.pages[AGENDA_PAGE] = self.tdef(agenda_cols, len(ROWS), [AGENDA_DATA])
+        self.pages[AGENDA_DATA] = self.data_page(AGENDA_PAGE, agenda, deleted={2})
+        self.pages[FLAT_PAGE] = self.tdef(flat_cols, len(flat), [FLAT_DATA], system=True)
+        self.pages[FLAT_DATA] = self.data_page(FLAT_PAGE, flat)
+        for i, rows in enumerate(self.lval):
+            self.pages[LVAL_START + i] = self.data_page(0, rows, lval=True)
+        self.pages[USAGE_PAGE] = self.data_page(0, self.usage_rows)
+        self.pages[0] = self.header()
+        return b''.join(self.pages[p] for p in range(max(self.pages) + 1))
+
+
+def build(path):
+    with open(path, 'wb') as f:
+        f.write(Builder().build())
+
+
+if __name__ == '__main__':
+    build(sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'agenda.accdb'))
@@ -0,0 +1,58 @@
+"""Shared setup for tests that run BridgeLogic against the stand-ins in tests/fakes.py."""
+import os
+import sys
+import shutil
+import logging
+import tempfile
+import unittest
+from unittest import mock
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BRIDGE_DIR = os.path.dirname(TESTS_DIR)
+FIXTURES = os.path.join(TESTS_DIR, 'fixtures')
+for path in (BRIDGE_DIR, TESTS_DIR, FIXTURES):
+    if path not in sys.path: sys.path.insert(0, path)
+
+import fakes
+from log_setup import configure_logging
+
+# Set up before bridge_logic's own call: bridge.log stays out of the tree and the per-test data dirs
+configure_logging(path=os.devnull)
+
+
+class BridgeTestCase(unittest.TestCase):
+    """A BridgeLogic on fake Firestore/Drive with its state in a temp BRIDGE_DATA_DIR.
+
+    Subclasses override `env` for extra settings; os.environ is restored after each test.
+    """
+
+    env = {}
+    source_backend = 'odbc'
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='mtp_test_')
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        env = {'BRIDGE_DATA_DIR': self.work_dir, 'METRICS_PORT': '0',
+               'SYNC_SOURCE': self.source_backend, 'SYNC_TABLES': ''}
+        env.update(self.env)
+        patcher = mock.patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        import bridge_logic
+        from db_snapshot import SourceSnapshot
+        self.bridge_logic = bridge_logic
+        logging.getLogger().setLevel(logging.WARNING)
+        fakes.install(bridge_logic)
+        self.bridge = bridge_logic.BridgeLogic()
+        self.addCleanup(self.bridge.shutdown)
+        self.db = fakes.FakeFirestore()
+        self.drive = fakes.FakeDrive()
+        fakes.attach(self.bridge, self.db, self.drive)
+        self.bridge.target_year = 2025
+        self.bridge.db_snapshot = SourceSnapshot(os.path.join(self.work_dir, 'source_fingerprint.json'), self.work_dir)
+
+    def build_source(self, **kwargs):
+        """Writes a stand-in Access source into the work dir and points the bridge at it."""
+        self.bridge.db_path = os.path.join(self.work_dir, 'source.accdb')
+        return fakes.build_source_db(self.bridge.db_path, **kwargs)
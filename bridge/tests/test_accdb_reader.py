@@ -0,0 +1,166 @@
+"""Native AccessReader against the agenda.accdb fixture (tests/fixtures/make_agenda_accdb.py)
+and against files saved by Access itself (tests/fixtures/THIRD_PARTY.md).
+
+The rows must match what the Access ODBC driver returns for the same file;
+with pyodbc and the driver installed the two backends are compared directly.
+"""
+import os
+import json
+import datetime
+import unittest
+
+from support import BridgeTestCase, FIXTURES
+import make_agenda_accdb as agenda
+from accdb_reader import AccessReader
+
+FIXTURE = os.path.join(FIXTURES, 'agenda.accdb')
+
+try:
+    import pyodbc
+    HAS_ACCESS_DRIVER = any('Microsoft Access Driver' in d for d in pyodbc.drivers())
+except ImportError:
+    HAS_ACCESS_DRIVER = False
+
+ATTACHMENT_COL = [c for c, _ in agenda.AGENDA_COLUMNS].index('LAMPIRAN SURAT')
+
+
+class AccessReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.reader = AccessReader(FIXTURE)
+
+    def tearDown(self):
+        self.reader.close()
+
+    def test_fixture_up_to_date(self):
+        with open(FIXTURE, 'rb') as f:
+            self.assertEqual(f.read(), agenda.Builder().build(), "rerun tests/fixtures/make_agenda_accdb.py")
+
+    def test_table_names_skip_system_and_flat_tables(self):
+        self.assertEqual(self.reader.table_names(), [agenda.TABLE])
+
+    def test_rows(self):
+        cursor = self.reader.cursor(agenda.TABLE)
+        self.assertEqual([d[0] for d in cursor.description], [c for c, _ in agenda.AGENDA_COLUMNS])
+        rows = cursor.fetchall()
+        # Deleted row skipped; memo inline, in one row and chained over pages; pre-1900 date with a time
+        self.assertEqual(rows, agenda.ROWS)
+        self.assertTrue(all(r[ATTACHMENT_COL] is None for r in rows))
+
+    def test_fetchmany(self):
+        cursor = self.reader.cursor(agenda.TABLE, columns=['NO URUT', 'KETERANGAN'])
+        self.assertEqual([r[0] for r in cursor.fetchmany(3)], [1, 2, 4])
+        self.assertEqual([r[0] for r in cursor.fetchmany(3)], [5, 7])
+        self.assertEqual(cursor.fetchmany(3), [])
+
+    def test_attachments(self):
+        index = self.reader.attachments(agenda.TABLE, 'LAMPIRAN SURAT', 'NO URUT')
+        self.assertEqual(sorted(index), sorted(agenda.ATTACHMENTS))
+        for no, expected in agenda.ATTACHMENTS.items():
+            files = index[no]
+            self.assertEqual([f.file_name for f in files], [name for name, *_ in expected])
+            for f, (name, content, deflate, stamp) in zip(files, expected):
+                self.assertEqual(f.data(), content, name)
+                self.assertEqual(f.timestamp, stamp)
+                # size is the stored form: smaller than the file when deflated
+                if deflate: self.assertLess(f.size, len(content))
+
+
+class AccessSavedFileTest(unittest.TestCase):
+    """Catalog and rows of files written by Access, not by our generator."""
+
+    def test_jet4_rows(self):
+        with open(os.path.join(FIXTURES, 'merchant_taylors.json'), encoding='utf-8') as f:
+            expected = json.load(f)
+        dates = [i for i, (_, kind) in enumerate(expected['columns']) if kind == 'datetime']
+        rows = [tuple(datetime.datetime.fromisoformat(v) if i in dates and v else v for i, v in enumerate(row))
+                for row in expected['rows']]
+        with AccessReader(os.path.join(FIXTURES, 'merchant_taylors.mdb')) as reader:
+            self.assertEqual(reader.table_names(), [expected['table']])
+            cursor = reader.cursor(expected['table'])
+            self.assertEqual([[d[0], d[1].__name__] for d in cursor.description], expected['columns'])
+            self.assertEqual(cursor.fetchall(), rows)
+
+    def test_ace_catalog(self):
+        with AccessReader(os.path.join(FIXTURES, 'empty.accdb')) as reader:
+            self.assertEqual(reader.table_names(), [])
+
+
+@unittest.skipUnless(HAS_ACCESS_DRIVER, "needs pyodbc and the Microsoft Access ODBC driver")
+class OdbcComparisonTest(unittest.TestCase):
+
+    def test_native_rows_match_odbc(self):
+        conn = pyodbc.connect(r"DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};DBQ=" + FIXTURE + ";ReadOnly=1;")
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT * FROM [{agenda.TABLE}] ORDER BY [NO URUT]")
+            odbc_desc = [(d[0], d[1]) for d in cursor.description]
+            odbc_rows = [tuple(r) for r in cursor.fetchall()]
+        finally:
+            conn.close()
+        with AccessReader(FIXTURE) as reader:
+            cursor = reader.cursor(agenda.TABLE)
+            native_desc = [(d[0], d[1]) for d in cursor.description]
+            native_rows = sorted(cursor.fetchall())
+        skip = lambda seq: [v for i, v in enumerate(seq) if i != ATTACHMENT_COL]
+        self.assertEqual(skip(native_desc), skip(odbc_desc))
+        self.assertEqual([skip(r) for r in native_rows], [skip(r) for r in odbc_rows])
+        self.assertTrue(all(r[ATTACHMENT_COL] is None for r in native_rows))
+
+
+class NativeSyncTest(BridgeTestCase):
+    """A full cycle with SYNC_SOURCE=native over the fixture."""
+
+    source_backend = 'native'
+
+    def setUp(self):
+        super().setUp()
+        self.bridge.db_path = FIXTURE
+
+    def test_sync_from_fixture(self):
+        self.assertEqual(self.bridge.source_backend, 'native')
+        self.bridge.perform_sync()
+        self.assertEqual(self.bridge.metrics.last_cycle()['result'], 'ok')
+        stats = self.bridge.last_sync_stats
+        self.assertEqual(stats['added'], len(agenda.ROWS))
+        uploaded = {f['name'] for f in self.drive.files_by_id.values()}
+        for files in agenda.ATTACHMENTS.values():
+            for name, *_ in files:
+                self.assertTrue(any(name in u for u in uploaded), name)
+
+    def test_uploads_submitted_outside_content_lock(self):
+        pool = self.bridge._get_upload_pool()
+        submit, held = pool.submit, []
+
+        def checked(fn, *args):
+            held.append(self.bridge._content_lock.locked())
+            return submit(fn, *args)
+        pool.submit = checked
+        self.bridge.perform_sync()
+
+        self.assertEqual(held, [False] * sum(len(files) for files in agenda.ATTACHMENTS.values()))
+        self.assertEqual(self.bridge.metrics.last_cycle()['result'], 'ok')
+        links = [a for doc in self.db.docs.values() for a in doc.get('attachments') or []]
+        self.assertEqual(len(links), len(held))
+        self.assertTrue(all(a.get('driveFileId') for a in links))
+
+    def test_memory_limit_uses_decoded_size(self):
+        # daftar hadir.txt is stored deflated well under 1 KB but decodes to about 4 KB
+        self.bridge.attachment_memory_max = 1024
+        sources = {}
+        upload = self.bridge._upload_attachment
+
+        def record(service, source, smart_name, fname, run, meta=None):
+            sources[fname] = source if isinstance(source, str) else len(source)
+            return upload(service, source, smart_name, fname, run, meta)
+        self.bridge._upload_attachment = record
+        self.bridge.perform_sync()
+
+        self.assertIsInstance(sources['daftar hadir.txt'], str)
+        self.assertIsInstance(sources['laporan.txt'], str)
+        self.assertEqual(sources['a.bin'], 3)
+        self.assertEqual(self.bridge.metrics.last_cycle()['result'], 'ok')
+
+
+if __name__ == '__main__':
+    unittest.main()
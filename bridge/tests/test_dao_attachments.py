@@ -0,0 +1,54 @@
+"""Attachment bytes read through DAO's FileData field, in either form it may hand them over."""
+import sqlite3
+import struct
+import hashlib
+import unittest
+import zlib
+
+from support import BridgeTestCase, fakes
+from accdb_reader import AccessFormatError, decode_file_data
+
+CONTENT = b'%PDF-1.4 surat undangan rapat\n' * 40
+
+
+class DecodeFileDataTest(unittest.TestCase):
+
+    def test_stored_form(self):
+        self.assertEqual(decode_file_data(fakes.encode_attachment(CONTENT)), CONTENT)
+
+    def test_stored_form_deflated(self):
+        content = fakes.encode_attachment(CONTENT, wrapped=False)
+        stored = struct.pack('<II', 1, len(content)) + zlib.compress(content)
+        self.assertEqual(decode_file_data(stored), CONTENT)
+
+    def test_inflated_header_prefixed(self):
+        self.assertEqual(decode_file_data(fakes.encode_attachment(CONTENT, wrapped=False)), CONTENT)
+
+    def test_com_byte_array(self):
+        # pywin32 returns the SAFEARRAY of bytes as a memoryview
+        self.assertEqual(decode_file_data(memoryview(fakes.encode_attachment(CONTENT, wrapped=False))), CONTENT)
+
+    def test_truncated_header(self):
+        with self.assertRaises(AccessFormatError):
+            decode_file_data(struct.pack('<I', 64) + b'pdf')
+
+
+class DaoInflatedFileDataTest(BridgeTestCase):
+    """A full cycle where DAO returns FileData without the stored form's prefix."""
+
+    def test_uploaded_bytes_match_source(self):
+        self.build_source(rows=100, attachment_ratio=0.2, attachment_size=2048)
+        fakes.install(self.bridge_logic, dao_engine=fakes.FakeDaoEngine(file_data_wrapped=False))
+        self.bridge.perform_sync()
+
+        self.assertEqual(self.bridge.metrics.last_cycle()['result'], 'ok')
+        conn = sqlite3.connect(self.bridge.db_path)
+        try: expected = {hashlib.md5(b).hexdigest() for b, in conn.execute(f"SELECT data FROM {fakes.ATTACHMENT_TABLE}")}
+        finally: conn.close()
+        uploaded = {f['md5Checksum'] for f in self.drive.files_by_id.values() if f.get('appProperties')}
+        self.assertTrue(expected)
+        self.assertEqual(uploaded, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""Each thread that calls Drive uses its own client (see DriveUploadPool)."""
+import threading
+import unittest
+
+from support import BridgeTestCase
+
+
+class ThreadCheckedDrive:
+    """Wraps the fake Drive and records every thread that sends requests through it."""
+
+    def __init__(self, drive):
+        self.drive = drive
+        self.threads = set()
+
+    def __getattr__(self, name):
+        attr = getattr(self.drive, name)
+        if name in ('files', 'permissions', 'changes', 'new_batch_http_request'):
+            self.threads.add(threading.get_ident())
+        return attr
+
+
+class DriveClientPerThreadTest(BridgeTestCase):
+
+    # Two tables synced in parallel, attachments uploaded inline on the stage threads
+    env = {'SYNC_TABLES': 'all', 'DRIVE_UPLOAD_WORKERS': '0', 'DRIVE_RATE_PER_SEC': '1000'}
+
+    def test_each_thread_uses_its_own_client(self):
+        self.build_source(rows=300, years=(2024, 2025), attachment_ratio=0.2, attachment_size=1024)
+        shared = self.bridge.drive_service = ThreadCheckedDrive(self.drive)
+        clients, lock = [], threading.Lock()
+
+        def build():
+            with lock:
+                clients.append(ThreadCheckedDrive(self.drive))
+                return clients[-1]
+        self.bridge._build_drive_service = build
+        self.bridge.perform_sync()
+
+        self.assertEqual(self.bridge.metrics.last_cycle()['result'], 'ok')
+        self.assertEqual(self.bridge.last_sync_stats['added'], 600)
+        links = [a for doc in self.db.docs.values() for a in doc.get('attachments') or []]
+        self.assertTrue(links and all(a.get('driveFileId') for a in links))
+        self.assertEqual(shared.threads, set())
+        used = [c.threads for c in clients if c.threads]
+        self.assertGreater(len(used), 1)
+        self.assertTrue(all(len(threads) == 1 for threads in used))
+        self.assertEqual(len(set.union(*used)), len(used))
+
+
+if __name__ == '__main__':
+    unittest.main()
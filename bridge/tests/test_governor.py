@@ -0,0 +1,108 @@
+"""RequestGovernor: daily budgets, the per-service rate bucket, retries and the circuit breaker."""
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import governor
+from governor import RequestGovernor, RequestShed, QuotaExhausted, TokenBucket
+
+
+class QuotaError(Exception):
+    code = 429
+
+
+def failing(times):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= times: raise QuotaError("Quota exceeded")
+        return 'ok'
+    return fn, calls
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(governor.time, 'sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=10, capacity=5)
+        for _ in range(5): bucket.acquire()
+        self.sleep.assert_not_called()
+        bucket.acquire()
+        self.assertAlmostEqual(self.sleep.call_args[0][0], 0.1, delta=0.02)
+
+    def test_batch_commit_is_one_request(self):
+        gov = RequestGovernor(rates={'firestore': 10})
+        for _ in range(50):
+            gov.call('firestore', 'write', lambda: None, cost=400)
+        # 50 requests fit the 5 s burst; budgets still count the 20000 ops
+        self.sleep.assert_not_called()
+        self.assertEqual(gov.used['firestore.write'], 20000)
+
+
+class BudgetTest(unittest.TestCase):
+
+    def test_background_shed_before_budget_runs_out(self):
+        gov = RequestGovernor(budgets={'firestore.write': 10})
+        for _ in range(8): gov.call('firestore', 'write', lambda: None, essential=False)
+        with self.assertRaises(RequestShed):
+            gov.call('firestore', 'write', lambda: None, essential=False)
+        # Sync writes get the last 20%
+        gov.call('firestore', 'write', lambda: None, cost=2)
+        with self.assertRaises(QuotaExhausted):
+            gov.call('firestore', 'write', lambda: None)
+        self.assertEqual(gov.snapshot()['shed'], 1)
+
+
+class BreakerTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(governor.time, 'sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.gov = RequestGovernor(max_retries=4, base_delay=0.01, breaker_threshold=3, breaker_cooldown=60)
+
+    def test_quota_errors_retried_with_backoff(self):
+        fn, calls = failing(2)
+        self.assertEqual(self.gov.call('drive', 'write', fn), 'ok')
+        self.assertEqual(len(calls), 3)
+        delays = [c[0][0] for c in self.sleep.call_args_list]
+        self.assertLess(delays[0], delays[1])
+        self.assertEqual(self.gov.snapshot()['breakers']['drive'], 'closed')
+
+    def test_open_breaker_sheds_background_only(self):
+        fn, _ = failing(3)
+        with self.assertRaises(QuotaError):
+            self.gov.call('firestore', 'write', fn, retries=2)
+        self.assertEqual(self.gov.snapshot()['breakers']['firestore'], 'open')
+
+        with self.assertRaises(RequestShed):
+            self.gov.call('firestore', 'write', lambda: None, essential=False)
+        # Essential traffic still goes out, and a success closes the breaker
+        self.gov.call('firestore', 'write', lambda: None)
+        self.assertEqual(self.gov.snapshot()['breakers']['firestore'], 'closed')
+        self.gov.call('firestore', 'write', lambda: None, essential=False)
+
+    def test_half_open_after_cooldown(self):
+        fn, _ = failing(3)
+        with self.assertRaises(QuotaError):
+            self.gov.call('firestore', 'write', fn, retries=2)
+        with mock.patch.object(governor.time, 'time', return_value=self.gov._breaker('firestore').opened_at + 61):
+            self.assertEqual(self.gov._breaker('firestore').state, 'half-open')
+            self.gov.call('firestore', 'write', lambda: None, essential=False)
+
+    def test_other_errors_not_retried(self):
+        def broken(): raise ValueError("bad document")
+        with self.assertRaises(ValueError):
+            self.gov.call('firestore', 'write', broken)
+        self.sleep.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
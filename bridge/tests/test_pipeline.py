@@ -0,0 +1,141 @@
+"""Pipeline runs (order, errors, cancel under backpressure) and the sync's uploads stage."""
+import time
+import threading
+import unittest
+from collections import deque
+from concurrent.futures import Future
+
+from support import BridgeTestCase
+from pipeline import Pipeline, PipelineAborted, Stage
+
+
+def double(item, emit):
+    emit(item * 2)
+
+
+class PipelineTest(unittest.TestCase):
+
+    def collect(self, source, *stages, threaded=True):
+        out = []
+        pipeline = Pipeline('test', source, list(stages) + [Stage('sink', lambda item, emit: out.append(item))])
+        pipeline.run(threaded=threaded)
+        return pipeline, out
+
+    def test_single_worker_stages_keep_order(self):
+        for threaded in (True, False):
+            pipeline, out = self.collect(range(500), Stage('double', double, queue_size=2), threaded=threaded)
+            self.assertEqual(out, [n * 2 for n in range(500)])
+            self.assertEqual(pipeline.report()['stages']['double']['items'], 500)
+
+    def test_finish_runs_after_last_item(self):
+        def batch(item, emit):
+            pending.append(item)
+            if len(pending) == 3:
+                emit(pending[:])
+                pending.clear()
+        for threaded in (True, False):
+            pending = []
+            _, out = self.collect(range(7), Stage('batch', batch, finish=lambda emit: emit(pending[:])), threaded=threaded)
+            self.assertEqual(out, [[0, 1, 2], [3, 4, 5], [6]])
+
+    def test_stage_error_raised_from_run(self):
+        def fail(item, emit):
+            if item == 42: raise ValueError("bad row 42")
+            emit(item)
+        for threaded in (True, False):
+            with self.assertRaisesRegex(ValueError, "bad row 42"):
+                self.collect(range(1000), Stage('check', fail, workers=2 if threaded else 1), threaded=threaded)
+
+    def test_source_error_raised_from_run(self):
+        def rows():
+            yield 1
+            raise OSError("share went away")
+        for threaded in (True, False):
+            with self.assertRaisesRegex(OSError, "share went away"):
+                self.collect(rows(), Stage('double', double), threaded=threaded)
+
+    def test_cancel_while_source_blocked_on_full_queue(self):
+        started, release, closed = threading.Event(), threading.Event(), threading.Event()
+        self.addCleanup(release.set)
+
+        def rows():
+            try:
+                n = 0
+                while True:
+                    yield n
+                    n += 1
+            finally:
+                closed.set()
+
+        def stuck(item, emit):
+            started.set()
+            release.wait(10)  # holds its item: the reader fills the queue and blocks on put
+        pipeline, raised = Pipeline('test', rows(), [Stage('stuck', stuck, queue_size=2)]), []
+
+        def run():
+            try: pipeline.run()
+            except PipelineAborted as e: raised.append(e)
+        runner = threading.Thread(target=run, daemon=True)
+        runner.start()
+        self.assertTrue(started.wait(5))
+        time.sleep(0.3)
+        self.assertLessEqual(pipeline.source_stage.items, 3)
+
+        pipeline.cancel()
+        self.assertTrue(closed.wait(2), "source not closed after cancel")
+        release.set()
+        runner.join(2)
+        self.assertFalse(runner.is_alive())
+        self.assertEqual(len(raised), 1)
+
+
+class UploadsStageTest(BridgeTestCase):
+    """_await_uploads hands records on in scan order whatever order their uploads finish in."""
+
+    def setUp(self):
+        super().setUp()
+        self.run = {'table': 'T'}
+        self.finalized = []
+
+        def finalize(run, rec, backup):
+            self.finalized.append(rec['no_urut'])
+            return {'no_urut': rec['no_urut']}
+        self.bridge._finalize_record = finalize
+        self.bridge.write_batch_size = 100
+
+    def scan(self, max_awaiting):
+        return {'awaiting': deque(), 'pending': [], 'backup': None, 'max_awaiting': max_awaiting}
+
+    @staticmethod
+    def record(no_urut, *uploads):
+        return {'no_urut': no_urut, 'attachments': list(uploads)}
+
+    def test_waits_for_head_of_line(self):
+        scan, emit = self.scan(max_awaiting=8), lambda batch: None
+        first, third = Future(), Future()
+        self.bridge._await_uploads(self.run, scan, self.record(1, first), emit)
+        self.bridge._await_uploads(self.run, scan, self.record(2), emit)
+        self.bridge._await_uploads(self.run, scan, self.record(3, third), emit)
+        self.assertEqual(self.finalized, [])
+
+        third.set_result({'name': 'c.pdf'})
+        self.bridge._await_uploads(self.run, scan, self.record(4), emit)
+        self.assertEqual(self.finalized, [])
+        first.set_result({'name': 'a.pdf'})
+        self.bridge._await_uploads(self.run, scan, self.record(5), emit)
+        self.assertEqual(self.finalized, [1, 2, 3, 4, 5])
+
+    def test_limit_finalizes_oldest_first(self):
+        scan, emit = self.scan(max_awaiting=2), lambda batch: None
+        for n in range(1, 6):
+            self.bridge._await_uploads(self.run, scan, self.record(n, Future()), emit)
+        self.assertEqual(self.finalized, [1, 2, 3])
+
+        batches = []
+        self.bridge._drain_uploads(self.run, scan, batches.append)
+        self.assertEqual(self.finalized, [1, 2, 3, 4, 5])
+        self.assertEqual([r['no_urut'] for r in batches[0]], [1, 2, 3, 4, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
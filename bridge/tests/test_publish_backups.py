@@ -0,0 +1,82 @@
+"""Cycle status (config/bridge_status) and backup links (config/system) after a sync cycle.
+
+Runs perform_sync against the offline stand-ins in tests/fakes.py.
+"""
+import unittest
+
+from support import BridgeTestCase
+
+GOOD_URL = 'https://drive.google.com/uc?id=previous&export=download'
+
+
+class PublishBackupsTest(BridgeTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.build_source(rows=200, attachment_ratio=0)
+        self.db.docs['config/system'] = {'backup_json_url': GOOD_URL, 'backup_json_id': 'previous'}
+
+    def system(self):
+        return self.db.docs['config/system']
+
+    def status(self):
+        return self.db.docs['config/bridge_status']
+
+    def test_status_written_when_drive_unavailable(self):
+        self.bridge.drive_service = None
+        self.bridge.perform_sync()
+
+        system, status = self.system(), self.status()
+        self.assertEqual(status['syncStatus'], 'healthy')
+        self.assertIn('lastSyncAt', status)
+        self.assertIn('Google Drive not initialized', status['lastError'])
+        # The last good link is kept, not blanked
+        self.assertEqual(system['backup_json_url'], GOOD_URL)
+        self.assertEqual(system['backup_json_id'], 'previous')
+        # Records synced, so the cycle is clean and the change gate arms
+        self.assertEqual(self.bridge.metrics.last_cycle()['result'], 'ok')
+        self.assertEqual(self.bridge.last_sync_stats['added'], 200)
+        self.bridge.perform_sync()
+        self.assertEqual(self.bridge.metrics.last_cycle()['result'], 'skipped')
+
+    def test_failed_upload_reported_in_last_error(self):
+        def fail(path, name): raise Exception("quota exceeded")
+        self.bridge._upload_simple_file = fail
+        self.bridge.perform_sync()
+
+        system, status = self.system(), self.status()
+        self.assertIn('lastSyncAt', status)
+        self.assertIn('quota exceeded', status['lastError'])
+        self.assertEqual(system['backup_json_url'], GOOD_URL)
+        # A transient failure is retried: the cycle is partial and the gate stays open
+        self.assertEqual(self.bridge.metrics.last_cycle()['result'], 'partial')
+
+    def test_links_published_on_success(self):
+        self.bridge.perform_sync()
+
+        system = self.system()
+        self.assertIsNone(self.status()['lastError'])
+        self.assertNotEqual(system['backup_json_url'], GOOD_URL)
+        self.assertTrue(system['backup_json_url'])
+
+    def test_status_kept_out_of_config_system(self):
+        self.bridge.perform_sync()
+        published, put, written = dict(self.system()), self.db._put, []
+
+        def record(path, data, merge):
+            written.append(path)
+            put(path, data, merge)
+        self.db._put = record
+        self.bridge.update_bridge_status("healthy")
+        self.bridge.perform_sync(force=True)
+
+        # The trigger listener watches config/system: no heartbeat there, and unchanged links are not rewritten
+        self.assertIn('config/bridge_status', written)
+        self.assertNotIn('config/system', written)
+        for field in ('syncStatus', 'lastActive', 'lastError', 'quota'):
+            self.assertNotIn(field, published)
+        self.assertEqual(self.status()['syncStatus'], 'healthy')
+
+
+if __name__ == '__main__':
+    unittest.main()
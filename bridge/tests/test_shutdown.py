@@ -0,0 +1,31 @@
+"""Quitting while the Drive client is still being built (OAuth consent pending)."""
+import threading
+import unittest
+from unittest import mock
+
+from support import BridgeTestCase
+
+
+class ShutdownDuringInitTest(BridgeTestCase):
+
+    def test_shutdown_does_not_wait_for_drive(self):
+        consent = threading.Event()
+        self.addCleanup(consent.set)
+
+        def init_drive(bridge):
+            consent.wait(10)
+            return None
+        with mock.patch.object(self.bridge_logic, 'HAS_GOOGLE', True), \
+                mock.patch.object(self.bridge_logic.BridgeLogic, '_init_drive', init_drive):
+            bridge = self.bridge_logic.BridgeLogic(background_init=True)
+        self.assertFalse(bridge.services_ready('drive_service'))
+
+        done = threading.Thread(target=bridge.shutdown, daemon=True)
+        done.start()
+        done.join(2)
+        self.assertFalse(done.is_alive(), "shutdown blocked on the Drive client")
+        self.assertFalse(bridge.services_ready())
+
+
+if __name__ == '__main__':
+    unittest.main()
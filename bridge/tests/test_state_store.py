@@ -0,0 +1,72 @@
+"""StateStore: one-time import of the old sync_state.json, and commit/rollback."""
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from support import BridgeTestCase
+from state_store import StateStore
+
+LEGACY = {'2025_1': {'hash': 'a' * 32, 'attachments': []}, '2025_2': {'hash': 'b' * 32, 'uploaded': True}}
+
+
+class MigrationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='mtp_test_state_')
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        self.db_path = os.path.join(self.work_dir, 'sync_state.db')
+        self.json_path = os.path.join(self.work_dir, 'sync_state.json')
+        with open(self.json_path, 'w') as f:
+            json.dump(LEGACY, f)
+
+    def open(self):
+        store = StateStore(self.db_path, legacy_json_path=self.json_path)
+        self.addCleanup(store.close)
+        return store
+
+    def test_records_imported_and_json_renamed(self):
+        store = self.open()
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store['2025_2'], LEGACY['2025_2'])
+        self.assertFalse(os.path.exists(self.json_path))
+        self.assertTrue(os.path.exists(self.json_path + '.migrated'))
+
+    def test_runs_once(self):
+        first = self.open()
+        first['2025_1'] = {'hash': 'c' * 32}
+        first.commit()
+        # A sync_state.json that reappears (an old build still running) is not imported over newer state
+        with open(self.json_path, 'w') as f:
+            json.dump(LEGACY, f)
+        store = self.open()
+        self.assertEqual(store['2025_1'], {'hash': 'c' * 32})
+        self.assertTrue(os.path.exists(self.json_path))
+
+    def test_unreadable_json_starts_fresh(self):
+        with open(self.json_path, 'w') as f:
+            f.write('{"2025_1": {"hash": ')
+        store = self.open()
+        self.assertEqual(len(store), 0)
+        self.assertTrue(os.path.exists(self.json_path + '.migrated'))
+
+    def test_rollback_keeps_committed_state(self):
+        store = self.open()
+        store['2025_3'] = {'hash': 'd' * 32}
+        store.rollback()
+        self.assertNotIn('2025_3', store)
+        self.assertIn('2025_1', store)
+
+
+class BridgeMigrationTest(BridgeTestCase):
+
+    def test_legacy_state_migrated_on_first_use(self):
+        with open(os.path.join(self.work_dir, 'sync_state.json'), 'w') as f:
+            json.dump(LEGACY, f)
+        self.assertEqual(self.bridge.processed_state.get('2025_2'), LEGACY['2025_2'])
+        self.assertTrue(os.path.exists(os.path.join(self.work_dir, 'sync_state.json.migrated')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""SyncScheduler coalescing, and its state as shown in the tray tooltip."""
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sync_scheduler import SyncScheduler, tooltip_text, TOOLTIP_MAX, PRIORITY_MANUAL, PRIORITY_SIGNAL
+
+METRICS = "last 184.3s (attachments 96.4s, firestore_write 61.2s)"
+
+
+class CoalescingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.started, self.release = threading.Event(), threading.Event()
+        self.runs, self.active, self.overlap = [], [0], []
+        self.done = threading.Semaphore(0)
+
+        def run_sync(force=False):
+            self.active[0] += 1
+            self.overlap.append(self.active[0] > 1)
+            self.runs.append(force)
+            self.started.set()
+            self.release.wait(5)
+            self.active[0] -= 1
+            self.done.release()
+        self.scheduler = SyncScheduler(run_sync)
+
+    def tearDown(self):
+        self.release.set()
+        self.scheduler.stop(timeout=5)
+
+    def wait_runs(self, n):
+        for _ in range(n): self.assertTrue(self.done.acquire(timeout=5))
+
+    def test_triggers_during_a_cycle_become_one_follow_up(self):
+        self.scheduler.request("periodic")
+        self.assertTrue(self.started.wait(5))
+        self.scheduler.request("signal file", PRIORITY_SIGNAL)
+        self.scheduler.request("web trigger", PRIORITY_MANUAL, force=True)
+        self.scheduler.request("periodic")
+
+        status = self.scheduler.status()
+        self.assertEqual(status['depth'], 2)
+        self.assertEqual(status['pending'], "web trigger")
+        self.assertEqual(status['coalesced'], 2)
+
+        self.release.set()
+        self.wait_runs(2)
+        # One follow-up run, forced because one trigger asked for it; never two cycles at once
+        self.assertEqual(self.runs, [False, True])
+        self.assertEqual(self.overlap, [False, False])
+        self.assertEqual(self.scheduler.status()['runs'], 2)
+
+    def test_lower_priority_does_not_rename_pending(self):
+        self.scheduler.request("periodic")
+        self.assertTrue(self.started.wait(5))
+        self.scheduler.request("web trigger", PRIORITY_MANUAL)
+        self.scheduler.request("periodic")
+        self.assertEqual(self.scheduler.status()['pending'], "web trigger")
+
+    def test_stopped_scheduler_refuses_requests(self):
+        self.scheduler.stop(timeout=5)
+        self.assertFalse(self.scheduler.request("periodic"))
+        self.assertEqual(self.runs, [])
+
+
+class TooltipTest(unittest.TestCase):
+
+    def setUp(self):
+        self.started, self.release = threading.Event(), threading.Event()
+
+        def run_sync(force=False):
+            self.started.set()
+            self.release.wait(5)
+        self.scheduler = SyncScheduler(run_sync)
+
+    def tearDown(self):
+        self.release.set()
+        self.scheduler.stop(timeout=5)
+
+    def test_queued_trigger_survives_limit(self):
+        self.scheduler.request("periodic")
+        self.assertTrue(self.started.wait(5))
+        self.scheduler.request("web trigger", PRIORITY_MANUAL, force=True)
+
+        text = tooltip_text(self.scheduler.summary(), "09:41:07", METRICS)
+        self.assertLessEqual(len(text), TOOLTIP_MAX)
+        self.assertIn("depth 2", text)
+        self.assertRegex(text, r"queued: web trigger, waiting \d+s")
+        self.assertIn("Last Sync: 09:41:07", text)
+        # Metrics get whatever room is left
+        self.assertIn(" | last 184.3s", text)
+
+    def test_short_state_keeps_all_metrics(self):
+        text = tooltip_text("depth 0 | idle, last wait 0s", "09:41:07", METRICS)
+        self.assertTrue(text.endswith(METRICS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+"""Firestore write batches and the last committed NO URUT recorded for checkpoints."""
+import unittest
+
+from support import BridgeTestCase, fakes
+
+
+class FailingBatch(fakes.FakeBatch):
+    def commit(self):
+        raise Exception("deadline exceeded")
+
+
+class CommitWriteBatchTest(BridgeTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.run = self.bridge._new_table_run(self.bridge_logic.AGENDA_TABLE_PREFIX + ' 2025', False)
+
+    @staticmethod
+    def batch(*numbers):
+        return [{'doc_id': f"2025_{n}", 'no_urut': n, 'data': {'NO URUT': n}, 'action': 'added', 'state': {'uploaded': True}}
+                for n in numbers]
+
+    def test_last_no_urut_is_highest_committed(self):
+        self.bridge._commit_write_batch(self.run, self.batch(10, 12, 11))
+        self.assertEqual(self.run['last_no_urut'], 12)
+        # Write workers finish out of order: an earlier batch must not move it back
+        self.bridge._commit_write_batch(self.run, self.batch(3, 4))
+        self.assertEqual(self.run['last_no_urut'], 12)
+
+    def test_failed_batch_does_not_advance(self):
+        self.bridge._commit_write_batch(self.run, self.batch(1, 2))
+
+        self.db.batch = lambda: FailingBatch(self.db)
+        self.bridge._commit_write_batch(self.run, self.batch(3, 4))
+
+        self.assertEqual(self.run['last_no_urut'], 2)
+        self.assertEqual(self.run['stats']['failed'], 2)
+        self.assertNotIn('2025_3', self.run['state'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import time
+import logging
+import datetime
+import threading
+
+CONFIG_FIELDS = ('accessDbPath', 'targetYear', 'driveFolderId')
+
+
+class FirestoreTriggerSource:
+    """Push-based sync triggers and config updates from Firestore listeners.
+
+    Watches config/sync_trigger (written by the web UI's "Sync now" button,
+    same contract as the Node bridge's listenForManualSync) and config/system.
+    on_trigger() is called once per trigger after the flag has been reset;
+    on_config(data) is called when one of CONFIG_FIELDS changes. Callbacks
+    run on the listener thread and should return quickly.
+    """
+
+    def __init__(self, db, on_trigger, on_config=None, governor=None):
+        self.db = db
+        self.governor = governor
+        self.on_trigger = on_trigger
+        self.on_config = on_config
+        self._watches = []
+        self._last_config = None
+
+    def start(self):
+        config = self.db.collection('config')
+        self._trigger_ref = config.document('sync_trigger')
+        self._watches = [self._trigger_ref.on_snapshot(self._on_trigger_snapshot)]
+        if self.on_config:
+            self._watches.append(config.document('system').on_snapshot(self._on_config_snapshot))
+        logging.info("Listening for sync triggers and config changes (Firestore).")
+        return self
+
+    def is_alive(self):
+        return bool(self._watches) and all(getattr(w, 'is_active', True) for w in self._watches)
+
+    def stop(self):
+        for w in self._watches:
+            try: w.unsubscribe()
+            except Exception: pass
+        self._watches = []
+
+    def _on_trigger_snapshot(self, docs, changes, read_time):
+        for snap in docs:
+            data = snap.to_dict() if snap.exists else None
+            if not data or data.get('trigger') is not True: continue
+            try:
+                # Reset immediately so one click is one sync
+                reset = lambda: self._trigger_ref.set({
+                    'trigger': False,
+                    'handledAt': datetime.datetime.now(datetime.timezone.utc),
+                    'handledBy': 'BRIDGE_ENGINE'
+                }, merge=True)
+                if self.governor: self.governor.call('firestore', 'write', reset)
+                else: reset()
+            except Exception as e:
+                logging.warning(f"Trigger reset failed: {e}")
+            logging.info(f"Sync trigger received (by {data.get('triggeredBy', 'unknown')})")
+            self.on_trigger()
+
+    def _on_config_snapshot(self, docs, changes, read_time):
+        for snap in docs:
+            data = snap.to_dict() if snap.exists else None
+            if not data: continue
+            # config/system also carries backup links and the Node bridge's status; only react to real config edits
+            relevant = {k: data.get(k) for k in CONFIG_FIELDS}
+            if relevant == self._last_config: continue
+            self._last_config = relevant
+            self.on_config(data)
+
+
+# --- Offline stand-in -------------------------------------------------------
+
+class _FakeSnapshot:
+    def __init__(self, data):
+        self._data = dict(data) if data is not None else None
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class _FakeWatch:
+    def __init__(self, doc, callback):
+        self._doc, self._callback = doc, callback
+        self.is_active = True
+
+    def unsubscribe(self):
+        self.is_active = False
+        self._doc._watches.discard(self)
+
+
+class FakeDocument:
+    def __init__(self):
+        self.data = None
+        self._watches = set()
+        self._lock = threading.Lock()
+
+    def get(self, **kwargs):
+        return _FakeSnapshot(self.data)
+
+    def set(self, data, merge=False):
+        with self._lock:
+            self.data = dict(self.data or {}, **data) if merge else dict(data)
+        self._notify()
+
+    def on_snapshot(self, callback):
+        watch = _FakeWatch(self, callback)
+        self._watches.add(watch)
+        # Like Firestore, deliver the current state on subscription (on a listener thread)
+        threading.Thread(target=callback, args=([_FakeSnapshot(self.data)], [], None), daemon=True).start()
+        return watch
+
+    def _notify(self):
+        snap = _FakeSnapshot(self.data)
+        for w in list(self._watches):
+            threading.Thread(target=w._callback, args=([snap], [], None), daemon=True).start()
+
+
+class FakeConfigStore:
+    """In-memory stand-in for the Firestore `config` collection with on_snapshot support.
+
+    Lets FirestoreTriggerSource run without network access:
+
+        store = FakeConfigStore()
+        FirestoreTriggerSource(store, on_trigger, on_config).start()
+        store.press_sync_now()
+    """
+
+    def __init__(self):
+        self._docs = {}
+
+    def collection(self, name):
+        return self
+
+    def document(self, name):
+        return self._docs.setdefault(name, FakeDocument())
+
+    def press_sync_now(self, user='offline-test'):
+        self.document('sync_trigger').set({'trigger': True, 'triggeredBy': user}, merge=True)
+
+    def update_config(self, **fields):
+        self.document('system').set(fields, merge=True)
+
+
+if __name__ == '__main__':
+    # Offline demo: python triggers.py
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    store = FakeConfigStore()
+    store.update_config(accessDbPath='C:/data/agenda.accdb', targetYear=2025)
+    source = FirestoreTriggerSource(
+        store,
+        on_trigger=lambda: logging.info("-> sync would start now"),
+        on_config=lambda d: logging.info(f"-> config applied: {d.get('accessDbPath')} / {d.get('targetYear')}")
+    ).start()
+    time.sleep(0.2)
+    store.press_sync_now()
+    time.sleep(0.2)
+    store.update_config(lastActive='heartbeat')  # ignored: not a config field
+    store.update_config(targetYear=2026)
+    time.sleep(0.2)
+    print("trigger flag after handling:", store.document('sync_trigger').data.get('trigger'))
+    source.stop()
@@ -0,0 +1,51 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+
+
+def is_rate_limited(exc):
+    """True for Drive 429s and 403s whose reason is a rate limit (not a real permission error)."""
+    status = getattr(getattr(exc, 'resp', None), 'status', None)
+    if status == 429: return True
+    if status == 403: return any(reason in str(exc) for reason in RATE_LIMIT_REASONS)
+    return False
+
+
+class DriveUploadPool:
+    """Bounded thread pool for Drive uploads.
+
+    googleapiclient/httplib2 objects are not thread-safe, so every worker
+    thread lazily builds its own Drive service through service_factory and
+    hands it to the submitted function as its first argument. submit()
+    blocks once max_pending uploads are queued or running.
+    """
+
+    def __init__(self, service_factory, workers=4, max_pending=None):
+        self.workers = workers
+        self._factory = service_factory
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='DriveUpload')
+        self._slots = threading.BoundedSemaphore(max_pending or workers * 4)
+
+    def service(self):
+        svc = getattr(self._local, 'service', None)
+        if svc is None:
+            svc = self._local.service = self._factory()
+        return svc
+
+    def submit(self, fn, *args):
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._run, fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _run(self, fn, *args):
+        return fn(self.service(), *args)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
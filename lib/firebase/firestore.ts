@@ -4,7 +4,6 @@ import {
     getDoc,
     getDocs,
     setDoc,
-    updateDoc,
     query,
     where,
     orderBy,
@@ -66,10 +65,16 @@ export interface SystemConfig {
     driveFolderId?: string;
     backup_json_url?: string; // URL to latest_data.json on Drive
     backup_json_id?: string;
+    backup_json_urls?: Record<string, string>; // Per-year backups (bridge multi-table mode)
+    backup_delta_url?: string; // Records changed since the last full latest_data snapshot
     maintenanceMode?: boolean; // Added maintenanceMode
     targetYear?: number;
 }
 
+// The Python bridge writes its heartbeat (syncStatus, lastActive, lastError, quota) to config/bridge_status,
+// not config/system, which it watches for config edits. Readers overlay it on config/system.
+const BRIDGE_STATUS_DOC = 'bridge_status';
+
 // HARDCODED FALLBACK (To be filled by user in Vercel ENV)
 // This MUST clearly be set to your Google Drive direct download link
 const FALLBACK_BACKUP_URL = process.env.NEXT_PUBLIC_BACKUP_JSON_URL || "";
@@ -316,10 +321,13 @@ export const searchMails = async (
 export const getSystemConfig = async (): Promise<SystemConfig | null> => {
     try {
         const configRef = doc(db, 'config', 'system');
-        const configDoc = await getDoc(configRef);
+        const [configDoc, statusDoc] = await Promise.all([
+            getDoc(configRef),
+            getDoc(doc(db, 'config', BRIDGE_STATUS_DOC))
+        ]);
 
         if (configDoc.exists()) {
-            return configDoc.data() as SystemConfig;
+            return { ...configDoc.data(), ...(statusDoc.exists() ? statusDoc.data() : {}) } as SystemConfig;
         }
         return null;
     } catch (error) {
@@ -349,12 +357,12 @@ export const updateSystemConfig = async (
  */
 export const resetSystemStatus = async (): Promise<boolean> => {
     try {
-        const configRef = doc(db, 'config', 'system');
-        await updateDoc(configRef, {
+        const statusRef = doc(db, 'config', BRIDGE_STATUS_DOC);
+        await setDoc(statusRef, {
             syncStatus: 'healthy',
             lastError: null,
             lastSyncAt: serverTimestamp()
-        });
+        }, { merge: true });
         return true;
     } catch (error) {
         console.error('Error resetting system status:', error);
@@ -366,15 +374,31 @@ export const resetSystemStatus = async (): Promise<boolean> => {
  * Listen to config changes in real-time
  */
 export const onConfigChange = (callback: (config: SystemConfig) => void, onError?: (error: any) => void) => {
-    const configRef = doc(db, 'config', 'system');
-    return onSnapshot(configRef, (doc) => {
-        if (doc.exists()) {
-            callback(doc.data() as SystemConfig);
-        }
-    }, (error) => {
+    let system: SystemConfig | null = null;
+    let status: Partial<SystemConfig> = {};
+    const emit = () => {
+        if (system) callback({ ...system, ...status });
+    };
+    const handleError = (error: any) => {
         if (onError) onError(error);
         else console.error("Config listener error:", error);
-    });
+    };
+
+    const unsubSystem = onSnapshot(doc(db, 'config', 'system'), (snap) => {
+        if (snap.exists()) {
+            system = snap.data() as SystemConfig;
+            emit();
+        }
+    }, handleError);
+    const unsubStatus = onSnapshot(doc(db, 'config', BRIDGE_STATUS_DOC), (snap) => {
+        status = snap.exists() ? snap.data() as Partial<SystemConfig> : {};
+        emit();
+    }, handleError);
+
+    return () => {
+        unsubSystem();
+        unsubStatus();
+    };
 };
 
 /**